@@ -0,0 +1,115 @@
+import argparse
+import random
+import time
+import codec
+from request_builder import RequestBuilder
+
+# Compares message codec with the plain JSON requests:
+# python camera_app/benchmark_codec.py --messages 100000
+
+MESSAGES = [
+    {'request_type': 'signal', 'subscribe': True},
+    {'request_type': 'stream_request', 'camera_name': 'yard'},
+    {'request_type': 'video_response',
+     'video_name': '2024-09-01T12:00:00|yard',
+     'video_size': 15728640},
+    {'request_type': 'new_video_record',
+     'date_created': '2024-09-01T12:00:00',
+     'camera_id': 'yard',
+     'car_det': True,
+     'human_det': False,
+     'chiken_det': False,
+     'cat_det': False,
+     'detection_stats': {'car': {'frames': 120,
+                                 'max_conf': 0.91,
+                                 'peak': 2,
+                                 'objects': 3}}},
+]
+
+
+def chunks(data, max_chunk):
+    position = 0
+    while position < len(data):
+        size = random.randint(1, max_chunk)
+        yield data[position:position + size]
+        position += size
+
+
+class MessageParserCounter(codec.MessageParser):
+
+    messages = 0
+
+    def feed(self, data):
+        messages = super().feed(data)
+        self.messages += len(messages)
+        return messages
+
+
+def benchmark_json(messages):
+    requests = [RequestBuilder().with_args(**fields).build()
+                for fields in messages]
+    start = time.perf_counter()
+    encoded = [request.serialize().encode() for request in requests]
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in encoded:
+        RequestBuilder().with_bytes(data).build()
+    decode_time = time.perf_counter() - start
+    return encode_time, decode_time, sum(map(len, encoded))
+
+
+def benchmark_codec(messages, body_format, max_chunk):
+    requests = [RequestBuilder().with_args(**fields).build()
+                for fields in messages]
+    start = time.perf_counter()
+    encoded = [codec.encode(request.__dict__, body_format)
+               for request in requests]
+    encode_time = time.perf_counter() - start
+
+    stream = b''.join(encoded)
+    parts = list(chunks(stream, max_chunk))
+    parser = MessageParserCounter()
+    start = time.perf_counter()
+    for part in parts:
+        for fields in parser.feed(part):
+            RequestBuilder().with_args(**fields).build()
+    decode_time = time.perf_counter() - start
+    assert parser.messages == len(messages)
+    return encode_time, decode_time, len(stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Message codec benchmark')
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--max-chunk', type=int, default=1500,
+                        help='largest TCP read size for codec stream')
+    args = parser.parse_args()
+
+    random.seed(0)
+    messages = [random.choice(MESSAGES) for _ in range(args.messages)]
+    results = {'json': benchmark_json(messages),
+               'codec json': benchmark_codec(messages,
+                                             codec.JSON,
+                                             args.max_chunk)}
+    if codec.msgpack:
+        results['codec msgpack'] = benchmark_codec(messages,
+                                                   codec.MSGPACK,
+                                                   args.max_chunk)
+    else:
+        print('msgpack is not installed, msgpack body is skipped')
+
+    print(f'{len(messages)} messages, '
+          f'codec stream read in chunks up to {args.max_chunk} bytes')
+    print(f'{"format":<15}{"encode us":>10}{"decode us":>10}{"bytes":>8}')
+    for name, (encode_time, decode_time, size) in results.items():
+        print(f'{name:<15}'
+              f'{encode_time / len(messages) * 1e6:>10.2f}'
+              f'{decode_time / len(messages) * 1e6:>10.2f}'
+              f'{size / len(messages):>8.1f}')
+    print('json requests are decoded one per read, '
+          'they can not be split or joined')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import time
+import cv2
+import numpy
+from pathlib import Path
+from inference import load_model
+from settings import (
+    MODEL_PATH,
+    CONFIDENCE
+)
+
+# Compares inference backends on the same clip:
+# python camera_app/benchmark_inference.py clip.mp4 --backends torch onnx
+
+
+def read_frames(clip, frames_number):
+    cap = cv2.VideoCapture(str(clip))
+    frames = []
+    while len(frames) < frames_number:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def benchmark(backend, weights, frames, warmup):
+    model = load_model(backend, weights)
+    for frame in frames[:warmup]:
+        model(frame, conf=CONFIDENCE, verbose=False)
+
+    latencies = []
+    start = time.perf_counter()
+    for frame in frames:
+        frame_start = time.perf_counter()
+        model(frame, conf=CONFIDENCE, verbose=False)
+        latencies.append(time.perf_counter() - frame_start)
+    total = time.perf_counter() - start
+
+    latencies = numpy.array(latencies) * 1000
+    return {'backend': backend,
+            'fps': len(frames) / total,
+            'mean': latencies.mean(),
+            'p50': numpy.percentile(latencies, 50),
+            'p95': numpy.percentile(latencies, 95)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inference benchmark')
+    parser.add_argument('clip', type=Path)
+    parser.add_argument('--backends',
+                        nargs='+',
+                        default=['torch', 'onnx', 'openvino'])
+    parser.add_argument('--weights', type=Path, default=MODEL_PATH)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=10)
+    args = parser.parse_args()
+
+    frames = read_frames(args.clip, args.frames)
+    if not frames:
+        raise SystemExit(f'No frames in {args.clip}')
+
+    print(f'{len(frames)} frames '
+          f'{frames[0].shape[1]}x{frames[0].shape[0]}')
+    print(f'{"backend":<10}{"fps":>8}{"mean ms":>10}'
+          f'{"p50 ms":>10}{"p95 ms":>10}')
+    for backend in args.backends:
+        result = benchmark(backend, args.weights, frames, args.warmup)
+        print(f'{result["backend"]:<10}{result["fps"]:>8.1f}'
+              f'{result["mean"]:>10.1f}{result["p50"]:>10.1f}'
+              f'{result["p95"]:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
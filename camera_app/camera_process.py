@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import threading
+from frame_bus import FrameRing
+from utils import Signal
+from connection_client import NewRecordHandler
+from camera_worker import CameraWorker
+from settings import (
+    DISPLAY_WIDTH,
+    DISPLAY_HEIGHT,
+    FRAME_BUS_SLOTS,
+    MODEL_UPDATE_TIMEOUT
+)
+
+
+class CameraProcess:
+    '''
+    Runs camera worker in a separate process. Has the same interface
+    as `CameraWorker`, frames come through shared memory rings and
+    only their sequence numbers are passed over the event queue
+    '''
+    def __init__(self, camera_name, camera_source, record_source=None):
+        self.changePixmap = Signal()
+        self.status_changed = Signal()
+        self.finished = Signal()
+        context = multiprocessing.get_context('spawn')
+        self.camera_name = camera_name
+        self.log = logging.getLogger(self.camera_name)
+        self.videostream_frame = asyncio.Queue(maxsize=1)
+        self.stream_active = context.Event()
+        self.gui_visible = context.Event()
+        self.stream_demand = context.Event()
+        self.stream_demand.set()
+        self.events = context.Queue()
+        self.commands = context.Queue()
+        self.model_updates = queue.Queue()
+        self.gui_ring = None
+        self.stream_ring = None
+        self.process = context.Process(
+            target=run_camera_process,
+            args=(camera_name,
+                  camera_source,
+                  record_source,
+                  self.stream_active,
+                  self.gui_visible,
+                  self.stream_demand,
+                  self.events,
+                  self.commands),
+            name=f'Camera {camera_name}',
+            daemon=True
+        )
+
+    def enable_detection(self):
+        self.commands.put(('enable_detection',))
+
+    def disable_detection(self):
+        self.commands.put(('disable_detection',))
+
+    def update_model(self, weights, backend):
+        '''
+        Waits for the camera process to report the result,
+        result of an earlier timed out update is discarded
+        '''
+        while not self.model_updates.empty():
+            self.model_updates.get_nowait()
+        self.commands.put(('update_model', weights, backend))
+        try:
+            return self.model_updates.get(timeout=MODEL_UPDATE_TIMEOUT)
+        except queue.Empty:
+            self.log.error('No model update result from camera process')
+            return False
+
+    def set_loop(self, loop):
+        self._loop = loop
+
+    def run_worker(self):
+        self.status_changed.emit(self.camera_name, 'starting')
+        self.init_worker()
+        self.run_camera()
+
+    def init_worker(self):
+        self.process.start()
+
+    def run_camera(self):
+        self.log.info('Camera process started, pid %s', self.process.pid)
+        while True:
+            try:
+                event = self.events.get(timeout=1)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    break
+                continue
+            if event[0] == 'stopped':
+                break
+            self.handle_event(*event)
+        self.process.join()
+        for ring in (self.gui_ring, self.stream_ring):
+            if ring:
+                ring.close()
+        self.log.info('Camera process stopped, exit code %s',
+                      self.process.exitcode)
+        self.status_changed.emit(self.camera_name, 'stopped')
+        self.finished.emit()
+
+    def handle_event(self, event, *args):
+        if event == 'gui':
+            frame = self.gui_ring.read(*args)
+            if frame is not None:
+                self.changePixmap.emit(frame, self.camera_name)
+        elif event == 'stream':
+            self.put_stream_frame(self.stream_ring.read(*args))
+        elif event == 'model_updated':
+            self.model_updates.put(*args)
+        elif event == 'record':
+            self._loop.call_soon_threadsafe(
+                NewRecordHandler.record_queue.put_nowait, *args)
+        elif event == 'ready':
+            gui_ring, stream_ring, status = args
+            self.gui_ring = FrameRing(**gui_ring)
+            self.stream_ring = FrameRing(**stream_ring)
+            self.status_changed.emit(self.camera_name, status)
+
+    def put_stream_frame(self, encoded_frame):
+        if encoded_frame is None:
+            self.stream_demand.set()
+            return
+        future = asyncio.run_coroutine_threadsafe(
+            self.videostream_frame.put(encoded_frame), self._loop)
+        future.add_done_callback(lambda _: self.stream_demand.set())
+
+
+class FrameBusWriter:
+    '''
+    Camera process side: copies GUI and stream frames to shared memory
+    rings and forwards video records to the main process.
+    Next stream frame is sent only after the previous one was taken
+    '''
+    def __init__(self, worker, loop, stream_demand, events):
+        self.worker = worker
+        self.loop = loop
+        self.stream_demand = stream_demand
+        self.events = events
+        width, height = worker.resolution
+        self.gui_ring = FrameRing(FRAME_BUS_SLOTS,
+                                  DISPLAY_WIDTH * DISPLAY_HEIGHT * 3)
+        self.stream_ring = FrameRing(FRAME_BUS_SLOTS,
+                                     width * height * 3)
+
+    def ring_args(self, ring):
+        return {'slots': ring.slots,
+                'slot_size': ring.slot_size,
+                'name': ring.name}
+
+    def start(self):
+        self.worker.changePixmap.connect(self.send_gui_frame)
+        asyncio.run_coroutine_threadsafe(self.forward_stream(), self.loop)
+        asyncio.run_coroutine_threadsafe(self.forward_records(), self.loop)
+        self.events.put(('ready',
+                         self.ring_args(self.gui_ring),
+                         self.ring_args(self.stream_ring),
+                         self.worker.status))
+
+    def send_gui_frame(self, frame, camera_name):
+        seq = self.gui_ring.write(frame, frame.shape[:2])
+        if seq is not None:
+            self.events.put(('gui', seq))
+
+    async def forward_stream(self):
+        while True:
+            encoded_frame = await self.worker.videostream_frame.get()
+            seq = self.stream_ring.write(encoded_frame)
+            if seq is None:
+                continue
+            self.stream_demand.clear()
+            self.events.put(('stream', seq))
+            await self.loop.run_in_executor(None, self.stream_demand.wait)
+
+    async def forward_records(self):
+        while True:
+            record = await NewRecordHandler.record_queue.get()
+            self.events.put(('record', record))
+
+    def close(self):
+        self.gui_ring.close()
+        self.stream_ring.close()
+
+
+def run_camera_process(camera_name, camera_source, record_source,
+                       stream_active, gui_visible, stream_demand,
+                       events, commands):
+    # Inference engine and recording pool are per process here,
+    # every camera loads its own model and recording workers
+    worker = CameraWorker(camera_name, camera_source, record_source)
+    worker.stream_active = stream_active
+    worker.gui_visible = gui_visible
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    worker.set_loop(loop)
+    worker.init_worker()
+    threading.Thread(target=run_commands,
+                     args=(worker, commands, events),
+                     daemon=True).start()
+    bus = FrameBusWriter(worker, loop, stream_demand, events)
+    bus.start()
+    try:
+        worker.run_camera()
+    finally:
+        bus.close()
+        events.put(('stopped',))
+
+
+def run_commands(worker, commands, events):
+    for name, *args in iter(commands.get, None):
+        if name in ('enable_detection', 'disable_detection'):
+            getattr(worker, name)(*args)
+        elif name == 'update_model':
+            events.put(('model_updated', worker.update_model(*args)))
@@ -1,110 +1,145 @@
 import cv2
-import os
-import base64
 import struct
 import threading
-import queue
 import logging
 import asyncio
-import torchvision
-import numpy
-from ultralytics import YOLO
-from datetime import (
-    date,
-    datetime
+import time
+from frame_buffer import (
+    LatestFrame,
+    DecodeSchedule,
+    PreEventBuffer
 )
-from PyQt6.QtCore import (
-    QObject,
-    pyqtSignal,
-    pyqtSlot
+from recording import (
+    RecordingPool,
+    SaveVideo
+)
+from inference import InferenceEngine
+from tracker import Tracker
+from utils import (
+    Signal,
+    log_duration
+)
+from detection_utils import (
+    DetectionStride,
+    MotionDetector,
+    RegionOfInterest,
+    detections_from_boxes,
+    detections_from_tracks,
+    draw_detections
 )
-from PyQt6.QtGui import QImage
-from connection_client import NewRecordHandler
 from settings import (
     MAX_VIDEO_LENGTH,
-    MODEL_PATH,
-    CONFIDENCE,
     DEFAULT_DETECTION,
-    TIMEZONE,
-    SAVE_PATH,
-    SAVE_FRAME_TIMEOUT,
     NO_DETECTION_LEN,
-    FPS
+    FPS,
+    ADAPTIVE_STRIDE,
+    MAX_STRIDE,
+    INFERENCE_LOAD,
+    MOTION_DETECTION,
+    MOTION_THRESHOLD,
+    MOTION_KEEPALIVE,
+    CAMERA_MOTION_THRESHOLD,
+    CAMERA_ROI,
+    PRE_EVENT_SECONDS,
+    JPEG_QUALITY,
+    TRACKING,
+    TRACK_CONFIDENCE,
+    TRACK_IOU,
+    TRACK_MAX_AGE,
+    GUI_FPS,
+    DISPLAY_WIDTH,
+    DISPLAY_HEIGHT,
+    CAPTURE_STATS_INTERVAL,
+    DECODE_ON_DEMAND
 )
 
 
-class CameraWorker(QObject):
-
-    changePixmap = pyqtSignal(QImage, str)
-    finished = pyqtSignal()
-
-    def __init__(self, camera_name, camera_source):
-        super().__init__()
+class CameraWorker:
+    '''
+    Captures frames from one camera and passes them to current frame
+    handler. Display frames are sent with `changePixmap` signal,
+    startup progress with `status_changed`
+    '''
+    def __init__(self, camera_name, camera_source, record_source=None):
+        self.changePixmap = Signal()
+        self.status_changed = Signal()
+        self.finished = Signal()
+        self.status = 'starting'
+        self.ready = threading.Event()
         self.camera_name = camera_name
         self.camera_source = camera_source
+        self.record_source = record_source
         self.log = logging.getLogger(self.camera_name)
         self.videostream_frame = asyncio.Queue(maxsize=1)
+        self.stream_active = threading.Event()
+        self.gui_visible = threading.Event()
         self._lock = threading.Lock()
         self._frame_handler = None
         self._model_exist = False
 
-    @pyqtSlot()
     def enable_detection(self):
-        if self._model_exist:
+        if self.ready.is_set() and self._model_exist:
             with self._lock:
                 self._frame_handler = DetectingObjects(
-                    camera_name=self.camera_name,
-                    logger=self.log,
-                    event_loop=self._loop,
-                    frame_queue=self.videostream_frame,
-                    gui_signal=self.changePixmap,
-                    resolution=self.resolution,
-                    model=self.model
+                    model=self.model,
+                    **self.frame_handler_args()
                 )
 
-    @pyqtSlot()
     def disable_detection(self):
+        if not self.ready.is_set():
+            return
         with self._lock:
-            self._frame_handler = NoDetecting(
-                camera_name=self.camera_name,
-                logger=self.log,
-                event_loop=self._loop,
-                frame_queue=self.videostream_frame,
-                gui_signal=self.changePixmap,
-                resolution=self.resolution
-            )
+            self._frame_handler = NoDetecting(**self.frame_handler_args())
+
+    def update_model(self, weights, backend):
+        if not (self.ready.is_set() and self._model_exist):
+            return False
+        return self.model.swap_model(weights, backend)
+
+    def frame_handler_args(self):
+        return {'camera_name': self.camera_name,
+                'logger': self.log,
+                'event_loop': self._loop,
+                'frame_queue': self.videostream_frame,
+                'stream_active': self.stream_active,
+                'gui_signal': self.changePixmap,
+                'gui_visible': self.gui_visible,
+                'resolution': self.resolution,
+                'record_source': self.record_source}
+
+    def run_worker(self):
+        self.set_status('starting')
+        self.init_worker()
+        self.run_camera()
+
+    def set_status(self, status):
+        self.status = status
+        self.status_changed.emit(self.camera_name, status)
 
     def init_worker(self):
-        self.get_video_capture()
+        with log_duration(self.log, 'video capture opened'):
+            self.get_video_capture()
         try:
-            self.get_model()
+            with log_duration(self.log, 'model loaded'):
+                self.get_model()
         except OSError:
             self._model_exist = False
         else:
             self._model_exist = True
         self.set_default_frame_handler()
+        self.ready.set()
+        self.set_status('ready' if self.cap.isOpened() else 'unavailable')
 
     def set_default_frame_handler(self):
         with self._lock:
             if DEFAULT_DETECTION and self._model_exist:
                 self._frame_handler = DetectingObjects(
-                    camera_name=self.camera_name,
-                    logger=self.log,
-                    event_loop=self._loop,
-                    frame_queue=self.videostream_frame,
-                    gui_signal=self.changePixmap,
-                    resolution=self.resolution,
-                    model=self.model
+                    model=self.model,
+                    **self.frame_handler_args()
                 )
             else:
                 self._frame_handler = NoDetecting(
-                    camera_name=self.camera_name,
-                    logger=self.log,
-                    event_loop=self._loop,
-                    frame_queue=self.videostream_frame,
-                    gui_signal=self.changePixmap,
-                    resolution=self.resolution
-                )
+                    **self.frame_handler_args())
 
     def get_video_capture(self):
         self.cap = cv2.VideoCapture(self.camera_source)
@@ -112,72 +147,144 @@ class CameraWorker(QObject):
                            int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
 
     def get_model(self):
-        self.model = YOLO(MODEL_PATH)
+        self.model = InferenceEngine()
+        self.model.load_model()
 
     def set_loop(self, loop):
         self._loop = loop
 
     def run_camera(self):
         self.log.info('CAMERA SOURCE %s', self.camera_source)
-        while self.cap.isOpened():
-            success, frame = self.cap.read()
-            if success:
-                with self._lock:
-                    self._frame_handler.process_frame(frame)
-            else:
+        self.frame_slot = LatestFrame()
+        self.decode_schedule = DecodeSchedule(enabled=DECODE_ON_DEMAND)
+        grab_thread = threading.Thread(target=self.grab_frames, daemon=True)
+        grab_thread.start()
+        last_stats = time.monotonic()
+        first_frame = True
+        while True:
+            frame = self.frame_slot.get()
+            if frame is None:
                 break
+            with self._lock:
+                self._frame_handler.process_frame(frame)
+            if first_frame:
+                self.log.info('Startup: first frame processed in %.2fs',
+                              time.monotonic() - last_stats)
+                first_frame = False
+            if time.monotonic() - last_stats > CAPTURE_STATS_INTERVAL:
+                self.log.debug('Capture stats: %s', self.capture_stats())
+                last_stats = time.monotonic()
+        grab_thread.join()
+        self.log.info('Camera stopped. Capture stats: %s',
+                      self.capture_stats())
+        self.set_status('stopped')
+        self.finished.emit()
+
+    def grab_frames(self):
+        try:
+            while self.cap.isOpened():
+                if not self.cap.grab():
+                    break
+                if not self.decode_schedule.decode_due(
+                        self._frame_handler.required_fps(),
+                        self.frame_slot.is_empty()):
+                    continue
+                success, frame = self.cap.retrieve()
+                if not success:
+                    break
+                self.frame_slot.put(frame)
+        finally:
+            self.frame_slot.close()
+
+    def capture_stats(self):
+        return {**self.decode_schedule.stats(), **self.frame_slot.stats()}
 
 
 class FrameProcessing:
 
+    def __init__(self, **kwargs):
+        self.camera_name = kwargs['camera_name']
+        self.log = kwargs['logger']
+        self._loop = kwargs['event_loop']
+        self.videostream_frame = kwargs['frame_queue']
+        self.stream_active = kwargs['stream_active']
+        self.gui_signal = kwargs['gui_signal']
+        self.gui_visible = kwargs['gui_visible']
+        self.resolution = kwargs['resolution']
+        self.display_size = self.get_display_size()
+        self._last_gui_frame = 0
+        self._jpeg_frame = None
+        self._jpeg = None
+
     def process_frame(self, frame):
         self.frame = self.process_detections(frame)
         self.send_frame_to_stream(self.frame)
         self.send_frame_to_GUI(self.frame)
 
     def send_frame_to_stream(self, frame):
-        if self.videostream_frame.qsize() == 0:
-            encoded_frame = self.encode(frame)
+        if self.stream_active.is_set() and \
+           self.videostream_frame.qsize() == 0:
+            encoded_frame = self.encode(self.annotate(frame))
             self._loop.call_soon_threadsafe(
                 self.videostream_frame.put_nowait, encoded_frame)
 
     def send_frame_to_GUI(self, frame):
-        converted_frame = self.convert_to_QImage(frame)
-        self.gui_signal.emit(converted_frame, self.camera_name)
+        if not self.gui_visible.is_set():
+            return
+        now = time.monotonic()
+        if now - self._last_gui_frame < 1 / GUI_FPS:
+            return
+        self._last_gui_frame = now
+        display_frame = self.resize_for_display(self.annotate(frame))
+        self.gui_signal.emit(display_frame, self.camera_name)
 
     def process_detections(self, frame):
         return frame
 
-    def convert_to_QImage(self, frame):
-        rgbImage = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        height, width, channels = rgbImage.shape
-        bytesPerLine = channels * width
-        convertToQtFormat = QImage(
-            rgbImage.data,
-            width,
-            height,
-            bytesPerLine,
-            QImage.Format.Format_RGB888
-        )
-        return convertToQtFormat.scaled(self.resolution[0], self.resolution[1])
+    def annotate(self, frame):
+        return frame
+
+    def required_fps(self):
+        fps = GUI_FPS if self.gui_visible.is_set() else 0
+        if self.stream_active.is_set():
+            fps = max(fps, FPS)
+        return fps
+
+    def get_display_size(self):
+        scale = min(DISPLAY_WIDTH / self.resolution[0],
+                    DISPLAY_HEIGHT / self.resolution[1],
+                    1)
+        return (int(self.resolution[0] * scale),
+                int(self.resolution[1] * scale))
+
+    def resize_for_display(self, frame):
+        if (frame.shape[1], frame.shape[0]) != self.display_size:
+            frame = cv2.resize(frame,
+                               self.display_size,
+                               interpolation=cv2.INTER_AREA)
+        return frame
+
+    def encode_jpeg(self, frame):
+        if frame is not self._jpeg_frame:
+            ret, jpeg = cv2.imencode('.jpg',
+                                     frame,
+                                     [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            self._jpeg = jpeg.tobytes()
+            self._jpeg_frame = frame
+        return self._jpeg
 
     def encode(self, frame):
-        ret, jpeg = cv2.imencode('.jpg', frame)
-        b64_img = base64.b64encode(jpeg)
-        encoded_frame = struct.pack("Q", len(b64_img)) + b64_img
+        jpeg = self.encode_jpeg(frame)
+        encoded_frame = struct.pack("Q", len(jpeg)) + jpeg
         return encoded_frame
 
 
 class DetectingObjects(FrameProcessing):
 
     def __init__(self, **kwargs):
-        self.camera_name = kwargs['camera_name']
-        self.log = kwargs['logger']
-        self._loop = kwargs['event_loop']
-        self.videostream_frame = kwargs['frame_queue']
-        self.gui_signal = kwargs['gui_signal']
+        super().__init__(**kwargs)
         self.model = kwargs['model']
-        self.resolution = kwargs['resolution']
+        self.record_source = kwargs['record_source']
         self._detection = {
             'car_det': False,
             'cat_det': False,
@@ -186,46 +293,153 @@ class DetectingObjects(FrameProcessing):
             'camera_id': self.camera_name
         }
         self._obj_detected = False
-        self.frames_to_save = []
         self.video_length = 0
         self.frames_from_last_detection = 0
         self.save_thread = None
+        self.stride = DetectionStride(fps=FPS,
+                                      max_stride=MAX_STRIDE,
+                                      load=INFERENCE_LOAD,
+                                      enabled=ADAPTIVE_STRIDE)
+        self.motion_detector = MotionDetector(
+            threshold=CAMERA_MOTION_THRESHOLD.get(self.camera_name,
+                                                  MOTION_THRESHOLD),
+            enabled=MOTION_DETECTION)
+        self.roi = None
+        if self.camera_name in CAMERA_ROI:
+            self.roi = RegionOfInterest(CAMERA_ROI[self.camera_name])
+        self.motion_detected = False
+        self.frames_from_inference = 0
+        self.inference_calls = 0
+        self.last_results = None
+        self.detections = detections_from_tracks([])
+        self.tracker = None
+        if TRACKING:
+            self.tracker = Tracker(confidence=TRACK_CONFIDENCE,
+                                   iou_threshold=TRACK_IOU,
+                                   max_age=TRACK_MAX_AGE)
+        self.object_counts = {}
+        self._annotated = (None, None)
+        self._last_frame_time = None
+        self.recording_pool = RecordingPool()
+        self.pre_event = PreEventBuffer(size=PRE_EVENT_SECONDS * FPS)
+
+    def required_fps(self):
+        # Called from grab thread, save thread may be reset meanwhile
+        save_thread = self.save_thread
+        if self.pre_event.enabled or \
+           (save_thread is not None and
+                save_thread.records_detection_stream()):
+            return FPS
+        return max(super().required_fps(), FPS / self.stride.stride)
+
+    def frames_elapsed(self):
+        now = time.monotonic()
+        frames = 1
+        if self._last_frame_time is not None:
+            frames = max(1, round((now - self._last_frame_time) * FPS))
+        self._last_frame_time = now
+        return frames
+
+    def inference_due(self, frame, frames=1):
+        if self.roi:
+            motion = self.motion_detector.detect(self.roi.crop(frame),
+                                                 self.roi.crop_mask())
+        else:
+            motion = self.motion_detector.detect(frame)
+        if motion:
+            self.motion_detected = True
+        self.frames_from_inference += frames
+        if self.last_results is None:
+            return True
+        if not self.stride.inference_due(frames):
+            return False
+        return self._obj_detected \
+            or self.motion_detected \
+            or self.frames_from_inference > MOTION_KEEPALIVE
+
+    def predict(self, frame):
+        if not self.roi:
+            return self.model.predict(frame)
+        results = self.model.predict(self.roi.crop(frame))
+        return [self.roi.restore(results[0], frame)]
 
     def process_detections(self, frame):
-        results = self.model(frame, conf=CONFIDENCE, verbose=False)
-        annotated_frame = results[0].plot()
-        if results[0]:
+        frames = self.frames_elapsed()
+        if self.inference_due(frame, frames):
+            start = time.monotonic()
+            results = self.predict(frame)
+            latency = time.monotonic() - start
+            self.last_results = results
+            self.motion_detected = False
+            self.frames_from_inference = 0
+            self.inference_calls += 1
+            self.detections = self.track_detections(results, frames)
+            # Same detections that start and stop clips
+            self.stride.update(latency, len(self.detections.cls) > 0)
+        elif self.tracker:
+            self.detections = detections_from_tracks(
+                self.tracker.predict(frames))
+        if len(self.detections.cls):
             self.frames_from_last_detection = 0
-            self.update_detection(results)
             if not self._obj_detected:
                 self._obj_detected = True
+                if self.tracker:
+                    self.tracker.reset_counts()
                 self.save_thread = SaveVideo(
                     self.resolution,
                     self.camera_name,
-                    self._loop
+                    self._loop,
+                    self.pre_event.flush(),
+                    self.record_source,
+                    self.model.names
                 )
-                th = threading.Thread(target=self.save_thread.run)
-                th.start()
+                self.save_thread.active = self.recording_pool.submit(
+                    self.save_thread)
         elif self._obj_detected:
             self.frames_from_last_detection += 1
         if self._obj_detected:
-            self.save_thread.frame_queue.put(annotated_frame)
+            self.save_thread.put_frame(frame, self.normalized_detections())
             self.video_length += 1
+        elif self.pre_event.enabled:
+            self.pre_event.add(self.encode_jpeg(frame))
 
         if (self.video_length > MAX_VIDEO_LENGTH) or \
            (self.frames_from_last_detection > NO_DETECTION_LEN):
             self.save_thread.update_record(self._detection)
             self.save_thread.end_of_file()
             self.reset_detection_and_counters()
-        return annotated_frame
+        return frame
 
-    def update_detection(self, results):
-        for r in results:
-            for c in r.boxes.cls:
-                if not self._detection[self.model.names[int(c)]]:
-                    self._detection[self.model.names[int(c)]] = True
+    def track_detections(self, results, frames):
+        detections = detections_from_boxes(results[0].boxes)
+        if not self.tracker:
+            return detections
+        return detections_from_tracks(
+            self.tracker.update(detections.boxes,
+                                detections.cls,
+                                detections.conf,
+                                frames))
+
+    def normalized_detections(self):
+        width, height = self.resolution
+        return (self.detections.boxes / (width, height, width, height),
+                self.detections.cls,
+                self.detections.conf,
+                self.detections.track_id)
+
+    def annotate(self, frame):
+        if self._annotated[0] is not frame:
+            self._annotated = (frame, draw_detections(frame,
+                                                      self.detections,
+                                                      self.model.names))
+        return self._annotated[1]
 
     def reset_detection_and_counters(self):
+        if self.tracker:
+            self.object_counts = {self.model.names[cls]: count
+                                  for cls, count
+                                  in self.tracker.counts().items()}
+            self.log.info('Objects in clip: %s', self.object_counts)
         self._detection = {'car_det': False,
                            'cat_det': False,
                            'chiken_det': False,
@@ -233,77 +447,9 @@ class DetectingObjects(FrameProcessing):
                            'camera_id': self.camera_name}
         self.video_length = 0
         self.frames_from_last_detection = 0
-        self.save_thread = None
         self._obj_detected = False
+        self.save_thread = None
 
 
 class NoDetecting(FrameProcessing):
-
-    def __init__(self, **kwargs):
-        self.camera_name = kwargs['camera_name']
-        self.log = kwargs['logger']
-        self._loop = kwargs['event_loop']
-        self.videostream_frame = kwargs['frame_queue']
-        self.gui_signal = kwargs['gui_signal']
-        self.resolution = kwargs['resolution']
-
-
-class SaveVideo:
-
-    def __init__(self, resolution, camera_name, event_loop):
-        self.resolution = resolution
-        self.camera_name = camera_name
-        self.loop = event_loop
-        self.frame_queue = queue.Queue()
-        self._end_of_file = threading.Event()
-        self._record_updated = threading.Event()
-        self._lock = threading.Lock()
-        self.log = logging.getLogger('Save video')
-        self.record = {}
-        self.record_handler = NewRecordHandler()
-        self.save_path = SAVE_PATH / self.camera_name
-        if not os.path.isdir(self.save_path):
-            os.mkdir(self.save_path)
-
-    def end_of_file(self):
-        self._end_of_file.set()
-
-    def not_end_of_file(self):
-        return not self._end_of_file.is_set()
-
-    def update_record(self, detection):
-        with self._lock:
-            self.record.update(detection)
-        self._record_updated.set()
-
-    def run(self):
-        frames = []
-        current_time = datetime.now(tz=TIMEZONE)
-        self.record.update({'date_created': current_time.isoformat()})
-        self.log.debug('Thread started')
-        today = date.today()
-        today_save_path = self.save_path / (today.strftime("%d_%m_%Y") + '/')
-        if not os.path.isdir(today_save_path):
-            os.mkdir(today_save_path)
-
-        video_name = os.path.join(
-            today_save_path,
-            current_time.strftime("%d_%m_%YT%H_%M_%S") + '.mp4'
-        )
-        self.log.debug('video name: %s', video_name)
-        while self.not_end_of_file():
-            try:
-                frame = self.frame_queue.get(timeout=SAVE_FRAME_TIMEOUT)
-            except queue.Empty:
-                break
-            else:
-                frame = cv2.resize(
-                    frame,
-                    (self.resolution[0], self.resolution[1]))
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
-                frames.append(frame)
-        torchvision.io.write_video(video_name, numpy.array(frames), FPS)
-        self._record_updated.wait()
-        self.log.debug('Put record to queue')
-        self.loop.call_soon_threadsafe(
-            self.record_handler.record_queue.put_nowait, self.record)
+    pass
@@ -0,0 +1,42 @@
+import av
+from fractions import Fraction
+
+
+class ClipWriter:
+    '''
+    Incremental mp4 encoder, every frame is encoded and muxed
+    as soon as it is written so memory usage does not depend on clip length
+    '''
+    def __init__(self, path, resolution, fps, codec='libx264'):
+        self.path = str(path)
+        self.resolution = resolution
+        self.container = av.open(self.path, mode='w')
+        self.stream = self.container.add_stream(codec, rate=fps)
+        self.stream.width = resolution[0]
+        self.stream.height = resolution[1]
+        self.stream.pix_fmt = 'yuv420p'
+        self.time_base = Fraction(1, fps)
+        self.frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, frame, pts=None):
+        video_frame = av.VideoFrame.from_ndarray(frame, format='bgr24')
+        if pts is not None:
+            video_frame.pts = pts
+            video_frame.time_base = self.time_base
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+        self.frames += 1
+
+    def close(self):
+        if self.container is None:
+            return
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+        self.container = None
@@ -0,0 +1,107 @@
+import json
+import struct
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Same module is used by camera_app and server/camera_conn
+
+MAGIC = 0xCA
+VERSION = 1
+JSON = 1
+MSGPACK = 2
+MAX_MESSAGE = 1 << 20
+
+header = struct.Struct('!BBBI')
+
+
+class CodecError(ValueError):
+    pass
+
+
+def encode(fields, body_format=None):
+    '''
+    Message is magic byte, version, body format and body length
+    followed by body. Body is msgpack if it is installed, JSON otherwise
+    '''
+    if body_format is None:
+        body_format = MSGPACK if msgpack else JSON
+    if body_format == MSGPACK:
+        body = msgpack.packb(fields, use_bin_type=True)
+    else:
+        body = json.dumps(fields, separators=(',', ':')).encode()
+    return header.pack(MAGIC, VERSION, body_format, len(body)) + body
+
+
+def decode_body(body_format, body):
+    if body_format == MSGPACK and msgpack is None:
+        raise CodecError('msgpack is not installed')
+    try:
+        if body_format == JSON:
+            return json.loads(body.decode())
+        if body_format == MSGPACK:
+            return msgpack.unpackb(body, raw=False)
+    except (ValueError, TypeError) as error:
+        raise CodecError(f'Wrong message body: {error}') from error
+    raise CodecError(f'Unknown body format: {body_format}')
+
+
+def unpack_header(data, offset=0):
+    magic, version, body_format, length = header.unpack_from(data, offset)
+    if magic != MAGIC:
+        raise CodecError('Not a codec message')
+    if version != VERSION:
+        raise CodecError(f'Unsupported codec version: {version}')
+    if length > MAX_MESSAGE:
+        raise CodecError(f'Message too large: {length}')
+    return body_format, header.size + length
+
+
+def is_message(data):
+    return data[:1] == bytes([MAGIC])
+
+
+def decode(data):
+    body_format, end = unpack_header(data)
+    if len(data) < end:
+        raise CodecError('Incomplete message')
+    return decode_body(body_format, bytes(data[header.size:end]))
+
+
+class MessageParser:
+    '''
+    Collects stream data and returns complete messages,
+    so messages split or joined by TCP are parsed the same way
+    '''
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        position = 0
+        while len(buffer) - position >= header.size:
+            body_format, size = unpack_header(buffer, position)
+            if len(buffer) - position < size:
+                break
+            messages.append(decode_body(
+                body_format,
+                buffer[position + header.size:position + size]))
+            position += size
+        del buffer[:position]
+        return messages
+
+
+async def read_message(reader, data=b''):
+    '''
+    Reads one complete message from stream, `data` is its
+    already received beginning
+    '''
+    if len(data) < header.size:
+        data += await reader.readexactly(header.size - len(data))
+    _, end = unpack_header(data)
+    if len(data) < end:
+        data += await reader.readexactly(end - len(data))
+    return data
@@ -7,27 +7,50 @@ from settings import (
     GET_SERVER_EVENTS_TIMEOUT,
     CAMERA_LIST,
     RECONNECTION_TIMEOUT,
-    MAX_RECORDS
+    MAX_RECORDS,
+    SIGNAL_SUBSCRIPTION,
+    HEARTBEAT_TIMEOUT
 )
 from request_builder import RequestBuilder
+from codec import (
+    CodecError,
+    MessageParser,
+    is_message
+)
 from utils import (
     ConnectionMixin,
-    Singleton
+    Singleton,
+    Signal
 )
 from streaming import VideoStreamManager
-from PyQt6.QtCore import QObject, pyqtSignal
 
 
-class ConnectionClient(ConnectionMixin, QObject):
+class JSONLineParser:
+    '''
+    Parses newline separated JSON signals sent by servers
+    older than the message codec
+    '''
+    def __init__(self):
+        self._buffer = b''
+
+    def feed(self, data):
+        *lines, self._buffer = (self._buffer + data).split(b'\n')
+        try:
+            return [json.loads(line) for line in lines if line.strip()]
+        except ValueError as error:
+            raise CodecError(f'Wrong JSON signal: {error}') from error
+
+
+class ConnectionClient(ConnectionMixin):
 
     handlers = []
-    connection_status = pyqtSignal(bool)
-    event_loop_created = pyqtSignal()
-    finished = pyqtSignal()
+    signal_subscription = SIGNAL_SUBSCRIPTION
     log = logging.getLogger('Connection Client')
 
     def __init__(self, camera_workers_list):
-        super().__init__()
+        self.connection_status = Signal()
+        self.event_loop_created = Signal()
+        self.finished = Signal()
         self.log.debug('Init connection client')
         self.log.debug('CAMERA WORKERS %s', camera_workers_list)
         self.camera_list = camera_workers_list
@@ -101,31 +124,89 @@ class ConnectionClient(ConnectionMixin, QObject):
 
     async def get_server_events(self):
         while True:
-            reader, writer = await self.connect_to_server(self.request)
-            if writer:
-                messages = await self.get_messages(reader)
-                msg_list = messages.decode().split('\n')
-                if len(messages) > 10:
-                    self.log.debug('SERVER EVENTS RECEIVED: %s', msg_list)
-                self.connection_status.emit(True)
-                for message in msg_list:
-                    if not message:
-                        continue
-                    builder = RequestBuilder().with_args(**json.loads(message))
-                    request = builder.build()
-                    for handler in self.handlers:
-                        result = await handler().handle(request, self.loop)
-                        if result:
-                            break
-                    else:
-                        self.log.info('Wrong request type')
+            if self.signal_subscription:
+                connected = await self.subscribe_server_events()
             else:
-                self.connection_status.emit(False)
+                connected = await self.poll_server_events()
+            if connected and self.signal_subscription:
+                continue  # resubscribe at once
             try:
                 await asyncio.sleep(GET_SERVER_EVENTS_TIMEOUT)
             except asyncio.CancelledError:
                 return
 
+    async def poll_server_events(self):
+        reader, writer = await self.connect_to_server(self.request)
+        if not writer:
+            self.connection_status.emit(False)
+            return False
+        messages = await self.get_messages(reader)
+        msg_list = messages.decode().split('\n')
+        if len(messages) > 10:
+            self.log.debug('SERVER EVENTS RECEIVED: %s', msg_list)
+        self.connection_status.emit(True)
+        for message in msg_list:
+            if message:
+                await self.handle_message(json.loads(message))
+        return True
+
+    async def subscribe_server_events(self):
+        '''
+        Server keeps subscription open and sends signals as soon as
+        they arrive, heartbeats are sent while there are no signals.
+        Returns after connection is lost or heartbeats stopped,
+        reconnection is immediate if anything was received.
+        Servers without message codec send newline separated JSON
+        '''
+        builder = RequestBuilder().with_args(request_type='signal',
+                                             subscribe=True)
+        reader, writer = await self.connect_to_server(builder.build())
+        if not writer:
+            self.connection_status.emit(False)
+            return False
+        self.log.info('Subscribed to server events')
+        self.connection_status.emit(True)
+        parser = None
+        received = False
+        while True:
+            try:
+                data = await asyncio.wait_for(reader.read(self.buff_size),
+                                              HEARTBEAT_TIMEOUT)
+            except TimeoutError:
+                self.log.warning('No heartbeat from server')
+                self.abort_connection(writer)
+                break
+            except ConnectionError:
+                break
+            if not data:
+                break
+            received = True
+            if parser is None:
+                parser = MessageParser() if is_message(data) \
+                    else JSONLineParser()
+            try:
+                messages = parser.feed(data)
+            except CodecError as error:
+                self.log.error('Wrong server event: %s', error)
+                break
+            for message in messages:
+                await self.handle_message(message)
+        self.log.info('Subscription to server events lost')
+        writer.close()
+        return received
+
+    async def handle_message(self, message):
+        builder = RequestBuilder().with_args(**message)
+        request = builder.build()
+        if request.request_type == 'heartbeat':
+            return
+        for handler in self.handlers:
+            result = await handler().handle(request, self.loop)
+            if result:
+                break
+        else:
+            self.log.info('Wrong request type')
+
     async def get_messages(self, reader):
         messages = b""
         while True:
@@ -1,23 +1,30 @@
+import asyncio
 import logging
 import json
-import smtplib
-import ssl
 import os
 import aiofiles
 from streaming import VideoStreamManager
 from request_builder import RequestBuilder
 from utils import ConnectionMixin
+from notifications import EmailSender
+from codec import (
+    CodecError,
+    decode,
+    read_message
+)
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from settings import (
     APROVED_USER_LIST,
     APROVE_ALL,
     EMAIL_ENABLED,
-    EMAIL_BACKEND,
-    EMAIL_PASSWORD,
-    EMAIL_PORT,
     EMAIL_USER,
     SAVE_PATH,
+    RECONNECTION_TIMEOUT,
+    UPLOAD_RETRIES,
+    INFERENCE_BACKEND,
+    PROCESS_PER_CAMERA,
+    base_dir,
 )
 
 
@@ -64,7 +71,6 @@ class AproveUserHandler(BaseClientHandler):
             if EMAIL_ENABLED:
                 self.send_email(username, email, result)
 
-    # TODO MAKE ASYNC
     def send_email(self, username, email, result):
         message = MIMEMultipart('alternative')
 
@@ -108,12 +114,7 @@ class AproveUserHandler(BaseClientHandler):
         part2 = MIMEText(html, 'html')
         message.attach(part1)
         message.attach(part2)
-        context = ssl.create_default_context()
-
-        with smtplib.SMTP(EMAIL_BACKEND, EMAIL_PORT) as server:
-            server.starttls(context=context)
-            server.login(EMAIL_USER, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_USER, email, message.as_string())
+        EmailSender().submit(message)
 
 
 class VideoRequestHandler(BaseClientHandler):
@@ -123,7 +124,6 @@ class VideoRequestHandler(BaseClientHandler):
 
     async def process_request(self, request):
         self.log.info('Handler started')
-        video_bytes = b""
         video_name = request.video_name.split('|')[0]
         camera_name = request.video_name.split('|')[1]
         self.log.debug('Video name:%s, Camera name: %s',
@@ -137,34 +137,81 @@ class VideoRequestHandler(BaseClientHandler):
                                        + '.mp4')
         self.log.debug('Full video name^ %s', full_video_name)
 
-        if os.path.exists(full_video_name):
-            async with aiofiles.open(full_video_name, mode="rb") as video:
-                video_bytes = await video.read()
-                self.log.debug('video length: %s', len(video_bytes))
-            builder = RequestBuilder().with_args(
-                request_type='video_response',
-                video_name=request.video_name,
-                video_size=len(video_bytes))
-        else:
+        if not os.path.exists(full_video_name):
             builder = RequestBuilder().with_args(
                 request_type='video_response',
                 video_name=request.video_name,
                 video_size=0)
             self.log.error('No such video %s', full_video_name)
-
-        request = builder.build()
-        _, writer = await self.connect_to_server(request)
-        if writer and video_bytes:
-            try:
-                writer.write(video_bytes)
-                await writer.drain()
-            except (ConnectionResetError, BrokenPipeError):
-                self.log.error('Connection error')
-            else:
+            _, writer = await self.connect_to_server(builder.build())
+            if writer:
                 writer.close()
-                await writer.wait_closed()
+            return
+
+        await self.send_video(request.video_name, full_video_name)
         self.log.info('Handler ended')
 
+    async def send_video(self, video_name, path):
+        video_size = os.path.getsize(path)
+        for _ in range(UPLOAD_RETRIES):
+            if await self.upload(video_name, path, video_size):
+                return True
+            await asyncio.sleep(RECONNECTION_TIMEOUT)
+        self.log.error('Failed to upload %s', path)
+        return False
+
+    async def upload(self, video_name, path, video_size):
+        '''
+        Server replies with the size of the part it already has,
+        file is sent from that offset. After the upload server
+        replies with the size it received
+        '''
+        builder = RequestBuilder().with_args(
+            request_type='video_response',
+            video_name=video_name,
+            video_size=video_size,
+            resumable=True)
+        reader, writer = await self.connect_to_server(builder.build())
+        if not writer:
+            return False
+        try:
+            offset = decode(await read_message(reader))['offset']
+            self.log.debug('Sending %s from %s of %s bytes',
+                           path,
+                           offset,
+                           video_size)
+            await self.send_file(writer, path, offset, video_size - offset)
+            received = decode(await read_message(reader))['offset']
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError,
+                asyncio.IncompleteReadError,
+                CodecError,
+                KeyError) as error:
+            self.log.error('Upload interrupted: %s', error)
+            writer.close()
+            return False
+        return received == video_size
+
+    async def send_file(self, writer, path, offset, count):
+        # Plain connections send file with sendfile, session channels
+        # need framing, so file is read in chunks
+        transport = getattr(writer, 'transport', None)
+        if transport is not None:
+            loop = asyncio.get_running_loop()
+            with open(path, 'rb') as video:
+                await loop.sendfile(transport, video, offset, count)
+            return
+        async with aiofiles.open(path, mode='rb') as video:
+            await video.seek(offset)
+            while count > 0:
+                chunk = await video.read(min(self.buff_size, count))
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+                count -= len(chunk)
+
 
 class StreamHandler(BaseClientHandler):
 
@@ -173,3 +220,44 @@ class StreamHandler(BaseClientHandler):
 
     async def process_request(self, request):
         await self.manager.requesters.put(request)
+
+
+class ModelUpdateHandler(BaseClientHandler):
+    '''
+    Loads new detection weights. Model is swapped only after
+    successful warm-up, otherwise old one keeps running.
+    Result is sent back to the server
+    '''
+    request_type = 'model_update'
+    manager = VideoStreamManager()
+    log = logging.getLogger('Model update handler')
+
+    async def process_request(self, request):
+        weights = base_dir / request.weights
+        backend = getattr(request, 'backend', INFERENCE_BACKEND)
+        self.log.info('Model update requested: %s, backend: %s',
+                      weights,
+                      backend)
+        workers = [stream.camera_worker
+                   for stream in self.manager.cameras.values()]
+        if not PROCESS_PER_CAMERA:
+            # Cameras share one inference engine, it is swapped once
+            workers = [worker for worker in workers
+                       if worker.ready.is_set()][:1]
+        loop = asyncio.get_running_loop()
+        results = []
+        for worker in workers:
+            results.append(await loop.run_in_executor(None,
+                                                      worker.update_model,
+                                                      weights,
+                                                      backend))
+        result = 'success' if results and all(results) else 'failure'
+        self.log.info('Model update %s: %s', result, weights)
+        builder = RequestBuilder().with_args(
+            request_type='model_update_response',
+            weights=request.weights,
+            backend=backend,
+            request_result=result)
+        _, writer = await self.connect_to_server(builder.build())
+        if writer:
+            writer.close()
@@ -0,0 +1,199 @@
+import cv2
+import math
+import numpy
+import collections
+
+
+COLORS = ((56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255),
+          (49, 210, 207), (10, 249, 72), (23, 204, 146), (134, 219, 61))
+
+Detections = collections.namedtuple('Detections',
+                                    ['boxes', 'cls', 'conf', 'track_id'])
+
+
+class DetectionStride:
+    '''
+    Decides on which frames inference runs.
+    While nothing is detected stride grows until inference takes
+    `load` part of camera frame time, detection resets stride to 1
+    '''
+    def __init__(self, fps, max_stride, load, enabled=True, smoothing=0.2):
+        self.fps = fps
+        self.max_stride = max_stride
+        self.load = load
+        self.enabled = enabled
+        self.smoothing = smoothing
+        self.stride = 1
+        self.latency = None
+        self.frames_from_inference = 0
+
+    def inference_due(self, frames=1):
+        self.frames_from_inference += frames
+        if not self.enabled or self.frames_from_inference >= self.stride:
+            self.frames_from_inference = 0
+            return True
+        return False
+
+    def update(self, latency, detected):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        if detected:
+            self.stride = 1
+        else:
+            self.stride = min(self.stride * 2, self.target_stride())
+
+    def target_stride(self):
+        stride = math.ceil(self.latency * self.fps / self.load)
+        return max(1, min(stride, self.max_stride))
+
+
+class MotionDetector:
+    '''
+    Cheap motion check on downscaled grayscale frame against
+    running average background. `threshold` is the part of changed pixels
+    '''
+    def __init__(self, threshold, enabled=True, width=160,
+                 pixel_threshold=25, alpha=0.1):
+        self.threshold = threshold
+        self.enabled = enabled
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.alpha = alpha
+        self.background = None
+        self.motion = 0.0
+
+    def detect(self, frame, mask=None):
+        if not self.enabled:
+            return True
+        height = max(1, frame.shape[0] * self.width // frame.shape[1])
+        small = cv2.resize(frame,
+                           (self.width, height),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0).astype(numpy.float32)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray
+            return True
+        diff = cv2.absdiff(gray, self.background)
+        cv2.accumulateWeighted(gray, self.background, self.alpha)
+        changed = diff > self.pixel_threshold
+        if mask is None:
+            self.motion = numpy.count_nonzero(changed) / changed.size
+        else:
+            mask = cv2.resize(mask,
+                              (self.width, height),
+                              interpolation=cv2.INTER_NEAREST) > 0
+            self.motion = numpy.count_nonzero(changed & mask) \
+                / max(1, numpy.count_nonzero(mask))
+        return self.motion >= self.threshold
+
+
+class RegionOfInterest:
+    '''
+    Polygon (or rectangle given by two corners) in frame size fractions.
+    Inference runs on bounding region of the polygon,
+    detections with center outside of the polygon are ignored
+    '''
+    def __init__(self, points):
+        points = numpy.array(points, dtype=numpy.float32)
+        if len(points) == 2:
+            (x0, y0), (x1, y1) = points
+            points = numpy.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+                                 dtype=numpy.float32)
+        self.points = points
+        self.shape = None
+        self.mask = None
+        self.bbox = None
+
+    def prepare(self, shape):
+        if shape[:2] == self.shape:
+            return
+        height, width = shape[:2]
+        polygon = numpy.round(self.points * [width, height]) \
+                       .astype(numpy.int32)
+        self.mask = numpy.zeros((height, width), dtype=numpy.uint8)
+        cv2.fillPoly(self.mask, [polygon], 255)
+        x, y, box_width, box_height = cv2.boundingRect(polygon)
+        self.bbox = (max(0, x),
+                     max(0, y),
+                     min(width, x + box_width),
+                     min(height, y + box_height))
+        self.shape = shape[:2]
+
+    def crop(self, frame):
+        self.prepare(frame.shape)
+        x0, y0, x1, y1 = self.bbox
+        return frame[y0:y1, x0:x1]
+
+    def crop_mask(self):
+        x0, y0, x1, y1 = self.bbox
+        return self.mask[y0:y1, x0:x1]
+
+    def inside(self, boxes):
+        height, width = self.shape
+        centers_x = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(int)
+        centers_y = ((boxes[:, 1] + boxes[:, 3]) / 2).astype(int)
+        centers_x = numpy.clip(centers_x, 0, width - 1)
+        centers_y = numpy.clip(centers_y, 0, height - 1)
+        return self.mask[centers_y, centers_x] > 0
+
+    def restore(self, result, frame):
+        x0, y0 = self.bbox[:2]
+        boxes = result.boxes.data.clone()
+        boxes[:, [0, 2]] += x0
+        boxes[:, [1, 3]] += y0
+        result.orig_img = frame
+        result.orig_shape = frame.shape[:2]
+        result.update(boxes=boxes)
+        keep = self.inside(boxes[:, :4].cpu().numpy())
+        return result[keep.nonzero()[0].tolist()]
+
+
+def detections_from_boxes(boxes):
+    boxes = boxes.cpu().numpy()
+    return Detections(boxes.xyxy,
+                      boxes.cls.astype(int),
+                      boxes.conf,
+                      numpy.full(len(boxes.cls), -1))
+
+
+def detections_from_tracks(tracks):
+    if not tracks:
+        return Detections(numpy.empty((0, 4), numpy.float32),
+                          numpy.empty(0, int),
+                          numpy.empty(0, numpy.float32),
+                          numpy.empty(0, int))
+    return Detections(numpy.stack([track.box for track in tracks]),
+                      numpy.array([track.cls for track in tracks]),
+                      numpy.array([track.conf for track in tracks]),
+                      numpy.array([track.track_id for track in tracks]))
+
+
+def draw_detections(frame, detections, names):
+    '''
+    Draws boxes on a copy of the frame, label shows track ID if there is one.
+    Frame without detections is returned as is, so its JPEG can be reused
+    '''
+    if not len(detections.cls):
+        return frame
+    frame = frame.copy()
+    boxes = detections.boxes.astype(int).tolist()
+    for box, cls, conf, track_id in zip(boxes,
+                                        detections.cls,
+                                        detections.conf,
+                                        detections.track_id):
+        color = COLORS[int(cls) % len(COLORS)]
+        label = f'{names[int(cls)]} {conf:.2f}'
+        if track_id >= 0:
+            label = f'#{track_id} {label}'
+        cv2.rectangle(frame, tuple(box[:2]), tuple(box[2:]), color, 2)
+        cv2.putText(frame,
+                    label,
+                    (box[0], max(box[1] - 5, 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5,
+                    color,
+                    1)
+    return frame
@@ -0,0 +1,114 @@
+import cv2
+import numpy
+import threading
+import time
+import collections
+
+
+class LatestFrame:
+    '''
+    Single slot holding the newest captured frame.
+    Frame that was not taken before the next one arrives is dropped
+    '''
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._closed = False
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+
+    def put(self, frame):
+        with self._cond:
+            if self._frame is not None:
+                self.frames_dropped += 1
+            self._frame = frame
+            self.frames_captured += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._frame is not None or self._closed,
+                timeout
+            )
+            frame = self._frame
+            if frame is not None:
+                self._frame = None
+                self.frames_processed += 1
+            return frame
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def is_empty(self):
+        with self._cond:
+            return self._frame is None
+
+    def is_closed(self):
+        with self._cond:
+            return self._closed and self._frame is None
+
+    def stats(self):
+        with self._cond:
+            return {'captured': self.frames_captured,
+                    'processed': self.frames_processed,
+                    'dropped': self.frames_dropped}
+
+
+class DecodeSchedule:
+    '''
+    Decides which grabbed frames are decoded. Frame is decoded only
+    when previous one was already taken and requested frame rate allows it
+    '''
+    jitter = 0.9
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.frames_grabbed = 0
+        self.frames_decoded = 0
+        self._last_decode = None
+
+    def decode_due(self, fps, slot_empty=True, now=None):
+        self.frames_grabbed += 1
+        if self.enabled:
+            if not slot_empty or not fps:
+                return False
+            now = time.monotonic() if now is None else now
+            if self._last_decode is not None and \
+               now - self._last_decode < self.jitter / fps:
+                return False
+            self._last_decode = now
+        self.frames_decoded += 1
+        return True
+
+    def stats(self):
+        return {'grabbed': self.frames_grabbed,
+                'decoded': self.frames_decoded}
+
+
+class PreEventBuffer:
+    '''
+    Ring buffer of JPEG compressed frames preceding detection
+    '''
+    def __init__(self, size):
+        self.enabled = size > 0
+        self._frames = collections.deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def add(self, jpeg):
+        self._frames.append(jpeg)
+
+    def flush(self):
+        frames = list(self._frames)
+        self._frames.clear()
+        return frames
+
+    @staticmethod
+    def decode(jpeg):
+        return cv2.imdecode(numpy.frombuffer(jpeg, numpy.uint8),
+                            cv2.IMREAD_COLOR)
@@ -0,0 +1,65 @@
+import struct
+import numpy
+from multiprocessing import shared_memory
+
+
+class FrameRing:
+    '''
+    Ring of fixed size slots in shared memory. Writer copies frame
+    into the next slot and passes only its sequence number to readers,
+    reader gets None if slot was overwritten while it was copied
+    '''
+    header = struct.Struct('QQII')
+
+    def __init__(self, slots, slot_size, name=None):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.slot_stride = self.header.size + slot_size
+        self.create = name is None
+        self.shm = shared_memory.SharedMemory(name=name,
+                                              create=self.create,
+                                              size=slots * self.slot_stride)
+        self.seq = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def slot(self, seq, length):
+        offset = (seq % self.slots) * self.slot_stride + self.header.size
+        return numpy.ndarray((length,),
+                             numpy.uint8,
+                             buffer=self.shm.buf,
+                             offset=offset)
+
+    def write(self, data, shape=(0, 0)):
+        data = numpy.frombuffer(data, numpy.uint8) \
+            if isinstance(data, bytes) \
+            else numpy.ascontiguousarray(data).reshape(-1)
+        if data.size > self.slot_size:
+            return None
+        self.seq += 1
+        offset = (self.seq % self.slots) * self.slot_stride
+        self.header.pack_into(self.shm.buf, offset, 0, 0, 0, 0)
+        self.slot(self.seq, data.size)[:] = data
+        self.header.pack_into(self.shm.buf, offset,
+                              self.seq, data.size, *shape)
+        return self.seq
+
+    def read(self, seq):
+        offset = (seq % self.slots) * self.slot_stride
+        slot_seq, length, height, width = self.header.unpack_from(
+            self.shm.buf, offset)
+        if slot_seq != seq:
+            return None
+        data = self.slot(seq, length).copy()
+        if self.header.unpack_from(self.shm.buf, offset)[0] != seq:
+            return None
+        if height:
+            return data.reshape(height, width, -1)
+        return data.tobytes()
+
+    def close(self):
+        self.shm.close()
+        if self.create:
+            self.shm.unlink()
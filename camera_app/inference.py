@@ -0,0 +1,200 @@
+import threading
+import queue
+import logging
+import time
+import numpy
+from utils import Singleton
+from settings import (
+    MODEL_PATH,
+    INFERENCE_BACKEND,
+    CONFIDENCE,
+    BATCH_SIZE,
+    BATCH_MAX_WAIT,
+    MODEL_WARMUP_RUNS,
+    MODEL_MAX_LATENCY
+)
+
+
+EXPORT_FORMATS = ('onnx', 'openvino')
+
+
+def get_model_path(backend=INFERENCE_BACKEND, weights=MODEL_PATH):
+    if backend == 'torch':
+        return weights
+    if backend == 'onnx':
+        return weights.with_suffix('.onnx')
+    if backend == 'openvino':
+        return weights.parent / f'{weights.stem}_openvino_model'
+    raise ValueError(f'Unknown inference backend: {backend}')
+
+
+def load_model(backend=INFERENCE_BACKEND, weights=MODEL_PATH):
+    '''
+    Loads YOLO model for selected backend. ONNX Runtime and OpenVINO
+    models are exported from the PyTorch weights on first use.
+    Ultralytics (and torch) are imported here, not on app startup
+    '''
+    from ultralytics import YOLO
+    model_path = get_model_path(backend, weights)
+    if backend in EXPORT_FORMATS and not model_path.exists():
+        InferenceEngine.log.info('Exporting %s to %s', weights, backend)
+        YOLO(weights).export(format=backend, dynamic=True)
+    return YOLO(model_path, task='detect')
+
+
+class InferenceRequest:
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    def set_result(self, result):
+        self.result = result
+        self._done.set()
+
+    def set_error(self, error):
+        self.error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class InferenceEngine(metaclass=Singleton):
+    '''
+    Owns the single detection model shared by all cameras.
+    Frames submitted by camera workers are collected into one batch
+    until the batch is full or `BATCH_MAX_WAIT` ms have passed
+    '''
+    log = logging.getLogger('Inference engine')
+
+    def __init__(self):
+        self.model = None
+        self.names = {}
+        self.weights = MODEL_PATH
+        self.backend = INFERENCE_BACKEND
+        self.cameras = 0
+        self.batches = 0
+        self.frames = 0
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._thread = None
+
+    def load_model(self):
+        with self._lock:
+            if self.model is None:
+                self.model = self.load_backend_model()
+                self.names = self.model.names
+                self.log.info('Model loaded: %s, backend: %s',
+                              self.weights,
+                              self.backend)
+            self.cameras += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run_engine,
+                                                daemon=True)
+                self._thread.start()
+
+    def load_backend_model(self):
+        '''
+        PyTorch weights are used if model for selected backend
+        can not be exported or loaded
+        '''
+        try:
+            return load_model(self.backend, self.weights)
+        except Exception as error:
+            if self.backend == 'torch':
+                raise
+            self.log.error('Failed to load %s model, using torch: %s',
+                           self.backend,
+                           error)
+        self.backend = 'torch'
+        return load_model(self.backend, self.weights)
+
+    def swap_model(self, weights, backend=INFERENCE_BACKEND):
+        '''
+        Loads new weights and runs warm-up while old model keeps serving
+        requests. Old model is kept if loading fails
+        or warm-up latency exceeds `MODEL_MAX_LATENCY` ms
+        '''
+        with self._swap_lock:
+            if (weights, backend) == (self.weights, self.backend):
+                return True
+            self.log.info('Loading model %s, backend: %s', weights, backend)
+            try:
+                model = load_model(backend, weights)
+                latency = self.warm_up(model)
+            except Exception as error:
+                self.log.error('Failed to load model %s: %s', weights, error)
+                return False
+            if latency > MODEL_MAX_LATENCY:
+                self.log.error('Model %s rejected, warm-up latency %.1f ms',
+                               weights,
+                               latency)
+                return False
+            with self._lock:
+                self.model = model
+                self.names = model.names
+                self.weights = weights
+                self.backend = backend
+            self.log.info('Model swapped to %s, warm-up latency %.1f ms',
+                          weights,
+                          latency)
+            return True
+
+    def warm_up(self, model):
+        frame = numpy.zeros((640, 640, 3), dtype=numpy.uint8)
+        model(frame, conf=CONFIDENCE, verbose=False)
+        latencies = []
+        for _ in range(MODEL_WARMUP_RUNS):
+            start = time.perf_counter()
+            model(frame, conf=CONFIDENCE, verbose=False)
+            latencies.append(time.perf_counter() - start)
+        return numpy.median(latencies) * 1000
+
+    def predict(self, frame):
+        request = InferenceRequest(frame)
+        self._requests.put(request)
+        return request.wait()
+
+    def batch_size(self):
+        return max(1, min(BATCH_SIZE, self.cameras))
+
+    def run_engine(self):
+        self.log.debug('Engine started')
+        while True:
+            batch = self.collect_batch()
+            self.process_batch(batch)
+
+    def collect_batch(self):
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + BATCH_MAX_WAIT / 1000
+        while len(batch) < self.batch_size():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def process_batch(self, batch):
+        frames = [request.frame for request in batch]
+        model = self.model
+        try:
+            results = model(frames, conf=CONFIDENCE, verbose=False)
+        except Exception as error:
+            self.log.error('Inference failed: %s', error)
+            for request in batch:
+                request.set_error(error)
+            return
+        self.batches += 1
+        self.frames += len(batch)
+        for request, result in zip(batch, results):
+            request.set_result([result])
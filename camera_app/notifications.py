@@ -0,0 +1,140 @@
+import logging
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from utils import Singleton
+from settings import (
+    EMAIL_BACKEND,
+    EMAIL_PORT,
+    EMAIL_USER,
+    EMAIL_PASSWORD,
+    EMAIL_TLS,
+    EMAIL_TIMEOUT,
+    EMAIL_RETRIES,
+    EMAIL_RETRY_TIMEOUT,
+    EMAIL_IDLE_TIMEOUT
+)
+
+
+class EmailSender(metaclass=Singleton):
+    '''
+    Sends emails from one background thread, so SMTP handshake and
+    login do not block event loop. Queued emails are sent over the same
+    logged in connection, it is closed after EMAIL_IDLE_TIMEOUT seconds
+    without emails. Failed email is retried on a new connection,
+    reused connection closed by server is replaced at once
+    '''
+    log = logging.getLogger('Email sender')
+    permanent_errors = (smtplib.SMTPAuthenticationError,
+                        smtplib.SMTPRecipientsRefused,
+                        smtplib.SMTPSenderRefused)
+
+    def __init__(self):
+        self.host = EMAIL_BACKEND
+        self.port = EMAIL_PORT
+        self.user = EMAIL_USER
+        self.password = EMAIL_PASSWORD
+        self.use_tls = EMAIL_TLS
+        self.timeout = EMAIL_TIMEOUT
+        self.retries = EMAIL_RETRIES
+        self.retry_timeout = EMAIL_RETRY_TIMEOUT
+        self.idle_timeout = EMAIL_IDLE_TIMEOUT
+        self.messages = queue.Queue()
+        self.connection = None
+        self.worker = None
+        self._lock = threading.Lock()
+        self.emails_sent = 0
+        self.emails_failed = 0
+        self.connections = 0
+
+    def start(self):
+        with self._lock:
+            if self.worker:
+                return
+            self.worker = threading.Thread(target=self.run_worker,
+                                           name='Email sender',
+                                           daemon=True)
+            self.worker.start()
+
+    def submit(self, message):
+        self.start()
+        self.messages.put(message)
+
+    def run_worker(self):
+        while True:
+            try:
+                message = self.messages.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self.disconnect()
+                continue
+            try:
+                self.send(message)
+            except Exception as error:
+                self.log.error('Email to %s failed: %s', message['To'], error)
+            finally:
+                self.messages.task_done()
+
+    def send(self, message):
+        for attempt in range(1, self.retries + 1):
+            try:
+                self.send_message(message)
+            except self.permanent_errors as error:
+                self.log.error('Email to %s rejected: %s',
+                               message['To'], error)
+                break
+            except (smtplib.SMTPException, OSError) as error:
+                self.log.warning('Email to %s failed, attempt %s of %s: %s',
+                                 message['To'], attempt, self.retries, error)
+                self.disconnect()
+                if attempt < self.retries:
+                    time.sleep(self.retry_timeout)
+                continue
+            self.emails_sent += 1
+            self.log.info('Email sent to %s', message['To'])
+            return True
+        self.emails_failed += 1
+        return False
+
+    def send_message(self, message):
+        reused = self.connection is not None
+        try:
+            self.connect().send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            if not reused:
+                raise
+            self.log.debug('Idle connection closed by server, reconnecting')
+            self.disconnect()
+            self.connect().send_message(message)
+
+    def connect(self):
+        if self.connection is not None:
+            return self.connection
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                connection.starttls(context=ssl.create_default_context())
+            connection.login(self.user, self.password)
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+            raise
+        self.connection = connection
+        self.connections += 1
+        self.log.debug('Connected to %s:%s', self.host, self.port)
+        return connection
+
+    def disconnect(self):
+        if self.connection is None:
+            return
+        try:
+            self.connection.quit()
+        except (smtplib.SMTPException, OSError):
+            self.connection.close()
+        self.connection = None
+
+    def stats(self):
+        return {'queued': self.messages.qsize(),
+                'sent': self.emails_sent,
+                'failed': self.emails_failed,
+                'connections': self.connections}
@@ -0,0 +1,376 @@
+import cv2
+import numpy
+import os
+import threading
+import queue
+import logging
+import time
+from datetime import (
+    date,
+    datetime
+)
+from connection_client import NewRecordHandler
+from frame_buffer import PreEventBuffer
+from clip_writer import ClipWriter
+from utils import Singleton
+from settings import (
+    TIMEZONE,
+    SAVE_PATH,
+    SAVE_FRAME_TIMEOUT,
+    FPS,
+    RECORDING_WORKERS,
+    RECORDING_QUEUE_SIZE,
+    RECORDING_FRAME_QUEUE_SIZE,
+    RECORDING_MAX_CLIP_SECONDS
+)
+
+
+class RecordingPool(metaclass=Singleton):
+    '''
+    Fixed number of recording workers shared by all cameras.
+    New clip is rejected if job queue is full
+    '''
+    log = logging.getLogger('Recording pool')
+
+    def __init__(self):
+        self.jobs = queue.Queue(maxsize=RECORDING_QUEUE_SIZE)
+        self.workers = []
+        self._lock = threading.Lock()
+        self.jobs_submitted = 0
+        self.jobs_rejected = 0
+        self.jobs_done = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        with self._lock:
+            if self.workers:
+                return
+            for number in range(RECORDING_WORKERS):
+                worker = threading.Thread(target=self.run_worker,
+                                          name=f'Recording worker {number}',
+                                          daemon=True)
+                self.workers.append(worker)
+                worker.start()
+
+    def submit(self, job):
+        self.start()
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.jobs_rejected += 1
+            self.log.warning('Recording queue is full, clip rejected. %s',
+                             self.stats())
+            return False
+        with self._lock:
+            self.jobs_submitted += 1
+        return True
+
+    def run_worker(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                job.run()
+            except Exception as error:
+                self.log.error('Recording failed: %s', error)
+            finally:
+                self.jobs.task_done()
+            with self._lock:
+                self.jobs_done += 1
+                self.frames_written += job.frames_written
+                self.frames_dropped += job.frames_dropped
+            self.log.debug('Recording stats: %s', self.stats())
+
+    def stats(self):
+        return {'queued': self.jobs.qsize(),
+                'submitted': self.jobs_submitted,
+                'rejected': self.jobs_rejected,
+                'done': self.jobs_done,
+                'frames_written': self.frames_written,
+                'frames_dropped': self.frames_dropped}
+
+
+class ClipDetections:
+    '''
+    Per-frame detections of a clip stored as flat numpy arrays,
+    one row per box with the index of its frame and track ID (-1 if none)
+    '''
+    def __init__(self, class_names=None):
+        self.class_names = class_names or {}
+        self._frames = []
+        self._boxes = []
+        self._cls = []
+        self._conf = []
+        self._track_id = []
+
+    def __len__(self):
+        return sum(len(frames) for frames in self._frames)
+
+    def add(self, index, boxes, cls, conf, track_id=None):
+        if not len(boxes):
+            return
+        self._frames.append(numpy.full(len(boxes), index, numpy.int32))
+        self._boxes.append(numpy.asarray(boxes, numpy.float32))
+        self._cls.append(numpy.asarray(cls, numpy.int16))
+        self._conf.append(numpy.asarray(conf, numpy.float16))
+        if track_id is None:
+            track_id = numpy.full(len(boxes), -1)
+        self._track_id.append(numpy.asarray(track_id, numpy.int32))
+
+    def arrays(self):
+        if not self._frames:
+            return {'frame': numpy.empty(0, numpy.int32),
+                    'boxes': numpy.empty((0, 4), numpy.float32),
+                    'cls': numpy.empty(0, numpy.int16),
+                    'conf': numpy.empty(0, numpy.float16),
+                    'track_id': numpy.empty(0, numpy.int32)}
+        return {'frame': numpy.concatenate(self._frames),
+                'boxes': numpy.concatenate(self._boxes),
+                'cls': numpy.concatenate(self._cls),
+                'conf': numpy.concatenate(self._conf),
+                'track_id': numpy.concatenate(self._track_id)}
+
+    def stats(self):
+        '''
+        Per class clip stats: number of frames with the class,
+        max confidence, peak number of boxes in one frame
+        and number of tracked objects
+        '''
+        arrays = self.arrays()
+        frame, cls = arrays['frame'], arrays['cls'].astype(numpy.intp)
+        if not frame.size:
+            return {}
+        classes = max(len(self.class_names), int(cls.max()) + 1)
+        frame = frame - frame.min()
+        per_frame = numpy.bincount(frame * classes + cls,
+                                   minlength=(frame.max() + 1) * classes)
+        per_frame = per_frame.reshape(-1, classes)
+        frames_with_class = numpy.count_nonzero(per_frame, axis=0)
+        peak = per_frame.max(axis=0)
+        max_conf = numpy.zeros(classes, numpy.float32)
+        numpy.maximum.at(max_conf, cls, arrays['conf'])
+        tracked = arrays['track_id'] >= 0
+        objects = numpy.zeros(classes, numpy.intp)
+        if tracked.any():
+            pairs = numpy.unique(numpy.stack([cls[tracked],
+                                              arrays['track_id'][tracked]]),
+                                 axis=1)
+            objects = numpy.bincount(pairs[0], minlength=classes)
+        stats = {}
+        for index in numpy.flatnonzero(frames_with_class).tolist():
+            stats[self.class_names.get(index, str(index))] = {
+                'frames': int(frames_with_class[index]),
+                'max_conf': round(float(max_conf[index]), 3),
+                'peak': int(peak[index]),
+                'objects': int(objects[index])}
+        return stats
+
+    def save(self, path):
+        '''
+        Class names are saved aligned with class IDs, `names[cls]`
+        is the name of a box class
+        '''
+        arrays = self.arrays()
+        classes = max(list(self.class_names) + arrays['cls'].tolist(),
+                      default=-1) + 1
+        names = [self.class_names.get(index, str(index))
+                 for index in range(classes)]
+        numpy.savez_compressed(path, names=numpy.array(names), **arrays)
+
+
+class SaveVideo:
+    '''
+    Recording job. When encoder falls behind frame queue fills up
+    and only every 2nd or 4th frame is kept, so clip degrades to lower FPS.
+    If camera has separate recording stream it is decoded only
+    while the job is running, detection frames are queued only
+    until it is opened.
+    Frames are recorded raw, detections are saved to `.npz` next to video
+    '''
+    def __init__(self, resolution, camera_name, event_loop,
+                 pre_event_frames=(), record_source=None, class_names=None):
+        self.resolution = resolution
+        self.camera_name = camera_name
+        self.loop = event_loop
+        self.pre_event_frames = pre_event_frames
+        self.record_source = record_source
+        self.use_record_source = record_source is not None
+        self.frame_queue = queue.Queue(maxsize=RECORDING_FRAME_QUEUE_SIZE)
+        self.pre_event_length = len(pre_event_frames)
+        self.frame_index = self.pre_event_length
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.detections = ClipDetections(class_names)
+        self.active = True
+        self._end_of_file = threading.Event()
+        self._record_updated = threading.Event()
+        self._record_source_opened = threading.Event()
+        self._lock = threading.Lock()
+        self._last_update = time.monotonic()
+        self.log = logging.getLogger('Save video')
+        self.record = {}
+        self.record_handler = NewRecordHandler()
+        self.save_path = SAVE_PATH / self.camera_name
+
+    def end_of_file(self):
+        self._end_of_file.set()
+
+    def not_end_of_file(self):
+        return not self._end_of_file.is_set()
+
+    def update_record(self, detection):
+        with self._lock:
+            self.record.update(detection)
+        self._last_update = time.monotonic()
+        self._record_updated.set()
+
+    def update_record_stats(self):
+        stats = self.detections.stats()
+        with self._lock:
+            for name in stats:
+                if name in self.record:
+                    self.record[name] = True
+            self.record['detection_stats'] = stats
+
+    def records_detection_stream(self):
+        return not self._record_source_opened.is_set()
+
+    def decimation(self):
+        load = self.frame_queue.qsize() / self.frame_queue.maxsize
+        if load < 0.5:
+            return 1
+        if load < 0.75:
+            return 2
+        return 4
+
+    def put_frame(self, frame, detections=None):
+        self._last_update = time.monotonic()
+        index = self.frame_index
+        self.frame_index += 1
+        if self.active and detections is not None:
+            self.detections.add(index, *detections)
+        if not self.records_detection_stream():
+            return
+        if not self.active or index % self.decimation():
+            self.frames_dropped += 1
+            return
+        try:
+            self.frame_queue.put_nowait((index, frame))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def run(self):
+        current_time = datetime.now(tz=TIMEZONE)
+        self.record.update({'date_created': current_time.isoformat()})
+        self.log.debug('Recording started')
+        today = date.today()
+        today_save_path = self.save_path / (today.strftime("%d_%m_%Y") + '/')
+        os.makedirs(today_save_path, exist_ok=True)
+
+        video_name = os.path.join(
+            today_save_path,
+            current_time.strftime("%d_%m_%YT%H_%M_%S") + '.mp4'
+        )
+        self.log.debug('video name: %s', video_name)
+        cap = self.open_record_source()
+        with ClipWriter(video_name, self.resolution, FPS) as writer:
+            self.write_pre_event_frames(writer)
+            if cap:
+                first_index = self.write_queued_frames(writer)
+                self.record_frames(writer, cap, first_index)
+                cap.release()
+            else:
+                self.write_frames(writer)
+        self.detections.save(os.path.splitext(video_name)[0] + '.npz')
+        self.log.debug('Video saved, %s frames written, %s dropped',
+                       self.frames_written,
+                       self.frames_dropped)
+        self._record_updated.wait(SAVE_FRAME_TIMEOUT)
+        self.update_record_stats()
+        self.log.debug('Put record to queue')
+        self.loop.call_soon_threadsafe(
+            self.record_handler.record_queue.put_nowait, self.record)
+
+    def open_record_source(self):
+        if not self.use_record_source:
+            return None
+        cap = cv2.VideoCapture(self.record_source)
+        if not cap.isOpened():
+            self.log.error('Failed to open record source %s, '
+                           'recording detection stream',
+                           self.record_source)
+            self.use_record_source = False
+            return None
+        self.resolution = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                           int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self._record_source_opened.set()
+        return cap
+
+    def write_queued_frames(self, writer):
+        '''
+        Writes detection stream frames queued before record source
+        was opened, returns index of the next frame
+        '''
+        next_index = self.pre_event_length
+        while True:
+            try:
+                index, frame = self.frame_queue.get_nowait()
+            except queue.Empty:
+                return next_index
+            self.write_frame(writer, frame, index)
+            next_index = index + 1
+
+    def record_frames(self, writer, cap, first_index):
+        '''
+        Every frame of record source is grabbed, only frames
+        that are written are decoded. Stops if detection stream stopped
+        sending frames or clip is longer than RECORDING_MAX_CLIP_SECONDS
+        '''
+        start = time.monotonic()
+        last_index = first_index - 1
+        while not self._end_of_file.is_set():
+            now = time.monotonic()
+            if now - self._last_update > SAVE_FRAME_TIMEOUT:
+                self.log.warning('No detection frames, recording stopped')
+                break
+            if now - start > RECORDING_MAX_CLIP_SECONDS:
+                self.log.warning('Clip length limit reached')
+                break
+            if not cap.grab():
+                self.log.error('Record source lost')
+                break
+            index = first_index + round((time.monotonic() - start) * FPS)
+            if index <= last_index:
+                self.frames_dropped += 1
+                continue
+            success, frame = cap.retrieve()
+            if not success:
+                self.log.error('Record source lost')
+                break
+            self.write_frame(writer, frame, index)
+            last_index = index
+
+    def write_pre_event_frames(self, writer):
+        for index, jpeg in enumerate(self.pre_event_frames):
+            self.write_frame(writer, PreEventBuffer.decode(jpeg), index)
+        self.pre_event_frames = ()
+
+    def write_frames(self, writer):
+        last_frame = time.monotonic()
+        while True:
+            try:
+                index, frame = self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._end_of_file.is_set() or \
+                   time.monotonic() - last_frame > SAVE_FRAME_TIMEOUT:
+                    break
+                continue
+            last_frame = time.monotonic()
+            self.write_frame(writer, frame, index)
+
+    def write_frame(self, writer, frame, index):
+        if (frame.shape[1], frame.shape[0]) != self.resolution:
+            frame = cv2.resize(frame, self.resolution)
+        writer.write(frame, index)
+        self.frames_written += 1
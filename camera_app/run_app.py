@@ -1,4 +1,7 @@
 import sys
+import logging
+import threading
+import time
 from PyQt6.QtWidgets import (
     QApplication,
     QWidget,
@@ -8,7 +11,7 @@ from PyQt6.QtWidgets import (
     QPushButton
 )
 from PyQt6.QtCore import (
-    QThread,
+    QEvent,
     pyqtSignal,
     pyqtSlot,
     Qt,
@@ -21,12 +24,18 @@ from connection_client import ConnectionClient
 from connection_handlers import (
     AproveUserHandler,
     VideoRequestHandler,
-    StreamHandler
+    StreamHandler,
+    ModelUpdateHandler
 )
 from settings import (
-    CAMERA_LIST
+    CAMERA_LIST,
+    CAMERA_RECORD_SOURCE,
+    DISPLAY_WIDTH,
+    DISPLAY_HEIGHT,
+    PROCESS_PER_CAMERA
 )
 from camera_worker import CameraWorker
+from camera_process import CameraProcess
 
 
 class MainWindow(QMainWindow):
@@ -35,11 +44,16 @@ class MainWindow(QMainWindow):
     camera_workers = {}
     camera_threads = {}
     buttons = {}
-    enable_detection = pyqtSignal()
-    disable_detection = pyqtSignal()
+    frame_received = pyqtSignal(object, str)
+    camera_status = pyqtSignal(str, str)
+    connection_status_changed = pyqtSignal(bool)
+    loop_created = pyqtSignal()
+    stopped = pyqtSignal()
+    log = logging.getLogger('Main window')
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.started = time.monotonic()
         self.setWindowTitle('ChikenGun 9000')
         self.setGeometry(100, 100, 900, 900)
         self.init_central_widget()
@@ -47,6 +61,9 @@ class MainWindow(QMainWindow):
         self.status_bar.showMessage('Connection status:')
         self.init_camera_workers()
         self.init_network_thread()
+        self.show()
+        self.log.info('Startup: window shown in %.2fs',
+                      time.monotonic() - self.started)
 
     def init_central_widget(self):
         self.central_widget = QWidget()
@@ -59,6 +76,9 @@ class MainWindow(QMainWindow):
         column = 0
         for camera in CAMERA_LIST:
             current_label = QLabel(self)
+            current_label.setFixedSize(DISPLAY_WIDTH, DISPLAY_HEIGHT)
+            current_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            current_label.setText(f'{camera}: starting')
             self.camera_labels.update({camera: current_label})
             self.central_widget_layout.addWidget(
                 current_label,
@@ -87,62 +107,101 @@ class MainWindow(QMainWindow):
         self.client.add_handlers(
             AproveUserHandler,
             VideoRequestHandler,
-            StreamHandler
+            StreamHandler,
+            ModelUpdateHandler
         )
-        self.network_thread = QThread(self)
-        self.client.moveToThread(self.network_thread)
-        self.client.finished.connect(self.network_thread.quit)
-        self.network_thread.started.connect(self.client.run_client)
-        self.network_thread.finished.connect(app.exit)
-        self.client.connection_status.connect(self.update_connection_status)
-        self.client.event_loop_created.connect(self.event_loop_created)
+        self.network_thread = threading.Thread(target=self.client.run_client,
+                                               name='Network',
+                                               daemon=True)
+        self.client.finished.connect(self.stopped.emit)
+        self.client.connection_status.connect(
+            self.connection_status_changed.emit)
+        self.client.event_loop_created.connect(self.loop_created.emit)
+        self.connection_status_changed.connect(self.update_connection_status)
+        self.loop_created.connect(self.event_loop_created)
+        self.stopped.connect(app.exit)
         self.network_thread.start()
 
     def init_camera_workers(self):
+        worker_class = CameraProcess if PROCESS_PER_CAMERA else CameraWorker
         for camera in CAMERA_LIST:
-            current_worker = CameraWorker(
+            current_worker = worker_class(
                 camera_name=camera,
-                camera_source=CAMERA_LIST[camera]
+                camera_source=CAMERA_LIST[camera],
+                record_source=CAMERA_RECORD_SOURCE.get(camera)
             )
-            current_thread = QThread(self)
+            current_thread = threading.Thread(target=current_worker.run_worker,
+                                              name=camera,
+                                              daemon=True)
             self.camera_workers.update({camera: current_worker})
             self.camera_threads.update({camera: current_thread})
-            current_worker.moveToThread(current_thread)
-            current_worker.finished.connect(current_thread.quit)
-            current_thread.started.connect(current_worker.run_camera)
-            current_thread.finished.connect(app.exit)
-            current_worker.changePixmap.connect(self.setFrame)
-            self.enable_detection.connect(current_worker.enable_detection)
-            self.disable_detection.connect(current_worker.disable_detection)
+            current_worker.changePixmap.connect(self.frame_received.emit)
+            current_worker.status_changed.connect(self.camera_status.emit)
+        self.frame_received.connect(self.setFrame)
+        self.camera_status.connect(self.setStatus)
 
     @pyqtSlot()
     def event_loop_created(self):
+        self.log.info('Startup: event loop created in %.2fs',
+                      time.monotonic() - self.started)
         self.workers_set_loop()
-        self.workers_init()
         self.start_workers()
-        self.show()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_gui_visibility()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_gui_visibility()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.update_gui_visibility()
+
+    def update_gui_visibility(self):
+        visible = self.isVisible() and not self.isMinimized()
+        for worker in self.camera_workers.values():
+            if visible:
+                worker.gui_visible.set()
+            else:
+                worker.gui_visible.clear()
 
     def workers_set_loop(self):
         for worker in self.camera_workers:
             self.camera_workers[worker].set_loop(self.client.loop)
 
-    def workers_init(self):
-        for worker in self.camera_workers:
-            self.camera_workers[worker].init_worker()
-
     def start_workers(self):
         for camera_name in self.camera_threads:
             self.camera_threads[camera_name].start()
 
     def enable_det(self):
-        self.enable_detection.emit()
+        for worker in self.camera_workers.values():
+            worker.enable_detection()
 
     def disable_det(self):
-        self.disable_detection.emit()
+        for worker in self.camera_workers.values():
+            worker.disable_detection()
 
-    @pyqtSlot(QImage, str)
+    @pyqtSlot(object, str)
     def setFrame(self, frame, camera_name):
-        self.camera_labels[camera_name].setPixmap(QPixmap.fromImage(frame))
+        image = QImage(
+            frame.data,
+            frame.shape[1],
+            frame.shape[0],
+            frame.strides[0],
+            QImage.Format.Format_BGR888
+        )
+        self.camera_labels[camera_name].setPixmap(QPixmap.fromImage(image))
+
+    @pyqtSlot(str, str)
+    def setStatus(self, camera_name, status):
+        self.log.info('Camera %s %s, %.2fs from start',
+                      camera_name,
+                      status,
+                      time.monotonic() - self.started)
+        self.camera_labels[camera_name].setText(f'{camera_name}: {status}')
 
     @pyqtSlot(bool)
     def update_connection_status(self, status):
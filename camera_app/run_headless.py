@@ -0,0 +1,77 @@
+import logging
+import threading
+from connection_client import ConnectionClient
+from connection_handlers import (
+    AproveUserHandler,
+    VideoRequestHandler,
+    StreamHandler,
+    ModelUpdateHandler
+)
+from settings import (
+    CAMERA_LIST,
+    CAMERA_RECORD_SOURCE,
+    PROCESS_PER_CAMERA
+)
+from camera_worker import CameraWorker
+from camera_process import CameraProcess
+
+# Runs cameras and server connection without GUI, PyQt6 is not imported:
+# python camera_app/run_headless.py
+
+
+class HeadlessApp:
+
+    camera_workers = {}
+    camera_threads = {}
+    log = logging.getLogger('Headless app')
+
+    def __init__(self):
+        self.init_camera_workers()
+        self.client = ConnectionClient(camera_workers_list=self.camera_workers)
+        self.client.add_handlers(
+            AproveUserHandler,
+            VideoRequestHandler,
+            StreamHandler,
+            ModelUpdateHandler
+        )
+        self.client.event_loop_created.connect(self.event_loop_created)
+        self.client.connection_status.connect(self.update_connection_status)
+
+    def init_camera_workers(self):
+        worker_class = CameraProcess if PROCESS_PER_CAMERA else CameraWorker
+        for camera in CAMERA_LIST:
+            current_worker = worker_class(
+                camera_name=camera,
+                camera_source=CAMERA_LIST[camera],
+                record_source=CAMERA_RECORD_SOURCE.get(camera)
+            )
+            current_thread = threading.Thread(target=current_worker.run_worker,
+                                              name=camera,
+                                              daemon=True)
+            self.camera_workers.update({camera: current_worker})
+            self.camera_threads.update({camera: current_thread})
+            current_worker.status_changed.connect(self.update_camera_status)
+
+    def event_loop_created(self):
+        for worker in self.camera_workers.values():
+            worker.set_loop(self.client.loop)
+        for camera_name in self.camera_threads:
+            self.camera_threads[camera_name].start()
+
+    def update_camera_status(self, camera_name, status):
+        self.log.info('Camera %s %s', camera_name, status)
+
+    def update_connection_status(self, status):
+        self.log.info('Connection status: %s',
+                      'OK' if status else 'NO CONNECTION')
+
+    def run(self):
+        try:
+            self.client.run_client()
+        except KeyboardInterrupt:
+            self.log.info('Stopping')
+            self.client.shutdown()
+
+
+if __name__ == '__main__':
+    HeadlessApp().run()
@@ -15,7 +15,6 @@ SAVE_PATH = base_dir / 'video_archive/'
 if not os.path.isdir(SAVE_PATH):
     os.mkdir(SAVE_PATH)
 
-MODEL_PATH = base_dir / 'camera_app/weights/test_weights.pt'
 TIMEZONE = pytz.timezone('Europe/Moscow')
 
 config = configparser.ConfigParser()
@@ -28,6 +27,10 @@ GET_SERVER_EVENTS_TIMEOUT = int(config['SERVER']['GET_SERVER_EVENTS_TIMEOUT'])
 SOCKET_BUFF_SIZE = int(config['SERVER']['SOCKET_BUFF_SIZE'])
 RECONNECTION_TIMEOUT = int(config['SERVER']['RECONNECTION_TIMEOUT'])
 MAX_RECORDS = int(config['SERVER']['MAX_RECORDS'])
+MULTIPLEXED_SESSION = bool(int(config['SERVER']['MULTIPLEXED_SESSION']))
+SIGNAL_SUBSCRIPTION = bool(int(config['SERVER']['SIGNAL_SUBSCRIPTION']))
+HEARTBEAT_TIMEOUT = int(config['SERVER']['HEARTBEAT_TIMEOUT'])
+UPLOAD_RETRIES = int(config['SERVER']['UPLOAD_RETRIES'])
 
 # EMAIL SETTINGS
 EMAIL_ENABLED = bool(int(config['EMAIL']['EMAIL_ENABLED']))
@@ -35,6 +38,11 @@ EMAIL_USER = config['EMAIL']['EMAIL_USER']
 EMAIL_PASSWORD = config['EMAIL']['EMAIL_PASSWORD']
 EMAIL_PORT = int(config['EMAIL']['EMAIL_PORT'])
 EMAIL_BACKEND = config['EMAIL']['EMAIL_BACKEND']
+EMAIL_TLS = bool(int(config['EMAIL']['EMAIL_TLS']))
+EMAIL_TIMEOUT = int(config['EMAIL']['EMAIL_TIMEOUT'])
+EMAIL_RETRIES = int(config['EMAIL']['EMAIL_RETRIES'])
+EMAIL_RETRY_TIMEOUT = int(config['EMAIL']['EMAIL_RETRY_TIMEOUT'])
+EMAIL_IDLE_TIMEOUT = int(config['EMAIL']['EMAIL_IDLE_TIMEOUT'])
 
 # USER LIST
 APROVED_USER_LIST = config['USER_LIST']['APROVED_USER_LIST'].split(' ')
@@ -43,17 +51,67 @@ APROVE_ALL = bool(int(config['USER_LIST']['APROVE_ALL']))
 # CAMERA LIST
 cam_list = config['CAMERA_LIST'].keys()
 CAMERA_LIST = {}
+CAMERA_ROI = {}
+CAMERA_RECORD_SOURCE = {}
 for camera in cam_list:
+    if camera.endswith('.roi'):
+        points = [tuple(float(coord) for coord in point.split(','))
+                  for point in config['CAMERA_LIST'][camera].split()]
+        CAMERA_ROI.update({camera[:-len('.roi')]: points})
+        continue
     try:
         source = int(config['CAMERA_LIST'][camera])
     except ValueError:
         source = config['CAMERA_LIST'][camera]
+    if camera.endswith('.record'):
+        CAMERA_RECORD_SOURCE.update({camera[:-len('.record')]: source})
+        continue
     CAMERA_LIST.update({camera: source})
 
 # DETECTION SETTINGS
+MODEL_PATH = base_dir / config['DETECTION']['MODEL_PATH']
+INFERENCE_BACKEND = config['DETECTION']['INFERENCE_BACKEND']
+MODEL_WARMUP_RUNS = int(config['DETECTION']['MODEL_WARMUP_RUNS'])
+MODEL_MAX_LATENCY = int(config['DETECTION']['MODEL_MAX_LATENCY'])
+MODEL_UPDATE_TIMEOUT = int(config['DETECTION']['MODEL_UPDATE_TIMEOUT'])
 MAX_VIDEO_LENGTH = int(config['DETECTION']['MAX_VIDEO_LENGTH'])
 DEFAULT_DETECTION = bool(int(config['DETECTION']['DEFAULT_DETECTION']))
 CONFIDENCE = float(config['DETECTION']['CONFIDENCE'])
 SAVE_FRAME_TIMEOUT = int(config['DETECTION']['SAVE_FRAME_TIMEOUT'])
 NO_DETECTION_LEN = int(config['DETECTION']['NO_DETECTION_LEN'])
 FPS = int(config['DETECTION']['FPS'])
+BATCH_SIZE = int(config['DETECTION']['BATCH_SIZE'])
+BATCH_MAX_WAIT = int(config['DETECTION']['BATCH_MAX_WAIT'])
+ADAPTIVE_STRIDE = bool(int(config['DETECTION']['ADAPTIVE_STRIDE']))
+MAX_STRIDE = int(config['DETECTION']['MAX_STRIDE'])
+INFERENCE_LOAD = float(config['DETECTION']['INFERENCE_LOAD'])
+MOTION_DETECTION = bool(int(config['DETECTION']['MOTION_DETECTION']))
+MOTION_THRESHOLD = float(config['DETECTION']['MOTION_THRESHOLD'])
+MOTION_KEEPALIVE = int(config['DETECTION']['MOTION_KEEPALIVE'])
+PRE_EVENT_SECONDS = int(config['DETECTION']['PRE_EVENT_SECONDS'])
+JPEG_QUALITY = int(config['DETECTION']['JPEG_QUALITY'])
+TRACKING = bool(int(config['DETECTION']['TRACKING']))
+TRACK_CONFIDENCE = float(config['DETECTION']['TRACK_CONFIDENCE'])
+TRACK_IOU = float(config['DETECTION']['TRACK_IOU'])
+TRACK_MAX_AGE = int(config['DETECTION']['TRACK_MAX_AGE'])
+CAMERA_MOTION_THRESHOLD = {}
+for item in config['DETECTION']['CAMERA_MOTION_THRESHOLD'].split():
+    camera, threshold = item.split(':')
+    CAMERA_MOTION_THRESHOLD.update({camera.lower(): float(threshold)})
+
+# RECORDING SETTINGS
+RECORDING_WORKERS = int(config['RECORDING']['WORKERS'])
+RECORDING_QUEUE_SIZE = int(config['RECORDING']['QUEUE_SIZE'])
+RECORDING_FRAME_QUEUE_SIZE = int(config['RECORDING']['FRAME_QUEUE_SIZE'])
+RECORDING_MAX_CLIP_SECONDS = int(config['RECORDING']['MAX_CLIP_SECONDS'])
+
+# GUI SETTINGS
+GUI_FPS = int(config['GUI']['GUI_FPS'])
+DISPLAY_WIDTH = int(config['GUI']['DISPLAY_WIDTH'])
+DISPLAY_HEIGHT = int(config['GUI']['DISPLAY_HEIGHT'])
+
+# CAPTURE SETTINGS
+CAPTURE_STATS_INTERVAL = int(config['CAPTURE']['STATS_INTERVAL'])
+DECODE_ON_DEMAND = bool(int(config['CAPTURE']['DECODE_ON_DEMAND']))
+PROCESS_PER_CAMERA = bool(int(config['CAPTURE']['PROCESS_PER_CAMERA']))
+FRAME_BUS_SLOTS = int(config['CAPTURE']['FRAME_BUS_SLOTS'])
@@ -73,6 +73,7 @@ class VideoStream(ConnectionMixin):
             self.log.error('Failed to connect to server')
         else:
             self.log.debug('Connected to server. Stream begin')
+            self.camera_worker.stream_active.set()
         while writer:
             try:
                 encoded_frame = await \
@@ -88,4 +89,5 @@ class VideoStream(ConnectionMixin):
             except (ConnectionResetError, BrokenPipeError):
                 self.log.error('Connection to server lost')
                 break
+        self.camera_worker.stream_active.clear()
         self.task = None
@@ -0,0 +1,116 @@
+import pytest
+import asyncio
+import sys
+import queue
+import threading
+import numpy
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from camera_process import (
+    CameraProcess,
+    FrameBusWriter,
+    run_commands
+)
+from utils import Signal
+
+pytest_plugins = ('pytest_asyncio', )
+camera_name = 'test_camera'
+
+
+@pytest.fixture
+def frame_bus(mocker):
+    worker = mocker.Mock(resolution=(160, 120), status='ready')
+    worker.changePixmap = Signal()
+    bus = FrameBusWriter(worker,
+                         mocker.Mock(),
+                         threading.Event(),
+                         queue.Queue())
+    yield bus
+    bus.close()
+
+
+@pytest.fixture
+def camera_process(frame_bus):
+    process = CameraProcess(camera_name=camera_name, camera_source=0)
+    process.handle_event('ready',
+                         frame_bus.ring_args(frame_bus.gui_ring),
+                         frame_bus.ring_args(frame_bus.stream_ring),
+                         'ready')
+    yield process
+    process.gui_ring.close()
+    process.stream_ring.close()
+
+
+# -----------------------------------------------
+# ------------ Test Frame Bus -------------------
+# -----------------------------------------------
+
+def test_gui_frame_round_trip(frame_bus, camera_process):
+    received = []
+    camera_process.changePixmap.connect(
+        lambda frame, name: received.append((frame, name)))
+    frame = numpy.random.randint(0, 255, (120, 160, 3), dtype=numpy.uint8)
+    frame_bus.send_gui_frame(frame, camera_name)
+    camera_process.handle_event(*frame_bus.events.get_nowait())
+    assert numpy.array_equal(received[0][0], frame)
+    assert received[0][1] == camera_name
+
+
+def test_overwritten_gui_frame_skipped(frame_bus, camera_process, mocker):
+    slot = mocker.Mock()
+    camera_process.changePixmap.connect(slot)
+    frame = numpy.zeros((120, 160, 3), dtype=numpy.uint8)
+    frame_bus.send_gui_frame(frame, camera_name)
+    event = frame_bus.events.get_nowait()
+    for _ in range(frame_bus.gui_ring.slots):
+        frame_bus.send_gui_frame(frame, camera_name)
+    camera_process.handle_event(*event)
+    slot.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stream_frame_round_trip(frame_bus, camera_process):
+    camera_process.set_loop(asyncio.get_running_loop())
+    camera_process.stream_demand.clear()
+    seq = frame_bus.stream_ring.write(b'encoded frame')
+    camera_process.handle_event('stream', seq)
+    frame = await asyncio.wait_for(camera_process.videostream_frame.get(), 1)
+    assert frame == b'encoded frame'
+    await asyncio.sleep(0)
+    assert camera_process.stream_demand.is_set()
+
+
+def test_run_commands(mocker):
+    worker = mocker.Mock()
+    worker.update_model.return_value = True
+    commands = queue.Queue()
+    events = queue.Queue()
+    commands.put(('enable_detection',))
+    commands.put(('update_model', 'weights.pt', 'onnx'))
+    commands.put(('run_worker',))
+    commands.put(None)
+    run_commands(worker, commands, events)
+    worker.enable_detection.assert_called_once_with()
+    worker.update_model.assert_called_once_with('weights.pt', 'onnx')
+    worker.run_worker.assert_not_called()
+    assert events.get_nowait() == ('model_updated', True)
+
+
+def test_update_model_waits_for_result(camera_process):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(
+        camera_process.update_model('weights.pt', 'onnx')))
+    thread.start()
+    assert camera_process.commands.get(timeout=1) == ('update_model',
+                                                      'weights.pt',
+                                                      'onnx')
+    camera_process.handle_event('model_updated', True)
+    thread.join(timeout=1)
+    assert result == [True]
+
+
+def test_update_model_timeout(camera_process, mocker):
+    mocker.patch('camera_process.MODEL_UPDATE_TIMEOUT', 0.01)
+    camera_process.model_updates.put(True)
+    assert camera_process.update_model('weights.pt', 'onnx') is False
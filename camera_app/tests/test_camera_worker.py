@@ -0,0 +1,254 @@
+import pytest
+import sys
+import threading
+import numpy
+import cv2
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from camera_worker import (
+    CameraWorker,
+    DetectingObjects,
+    FrameProcessing
+)
+from frame_buffer import (
+    LatestFrame,
+    DecodeSchedule
+)
+from detection_utils import (
+    Detections,
+    MotionDetector,
+    RegionOfInterest,
+    detections_from_tracks
+)
+from recording import SaveVideo
+from utils import Signal
+from settings import (
+    FPS,
+    GUI_FPS
+)
+
+camera_name = 'test_camera'
+
+
+def frame_handler_args(mocker):
+    return {'camera_name': camera_name,
+            'logger': mocker.Mock(),
+            'event_loop': mocker.Mock(),
+            'frame_queue': mocker.Mock(),
+            'stream_active': threading.Event(),
+            'gui_signal': Signal(),
+            'gui_visible': threading.Event(),
+            'resolution': (640, 480),
+            'record_source': None}
+
+
+@pytest.fixture
+def detecting_objects(mocker):
+    handler = DetectingObjects(model=mocker.Mock(names={0: 'car'}),
+                               **frame_handler_args(mocker))
+    handler.pre_event.enabled = False
+    return handler
+
+
+# -----------------------------------------------
+# ------------ Test Grab Frames -----------------
+# -----------------------------------------------
+
+@pytest.fixture
+def camera_worker(mocker):
+    worker = CameraWorker(camera_name=camera_name, camera_source=0)
+    worker.cap = mocker.Mock()
+    worker.cap.isOpened.return_value = True
+    worker.frame_slot = LatestFrame()
+    worker.decode_schedule = DecodeSchedule()
+    return worker
+
+
+def test_grab_frames_close_slot_on_error(camera_worker, mocker):
+    camera_worker._frame_handler = mocker.Mock()
+    camera_worker._frame_handler.required_fps.side_effect = RuntimeError
+    with pytest.raises(RuntimeError):
+        camera_worker.grab_frames()
+    assert camera_worker.frame_slot.is_closed()
+
+
+def test_grab_frames_until_capture_ends(camera_worker, mocker):
+    camera_worker._frame_handler = mocker.Mock()
+    camera_worker._frame_handler.required_fps.return_value = FPS
+    camera_worker.cap.grab.side_effect = [True, False]
+    camera_worker.cap.retrieve.return_value = (True, 'frame')
+    camera_worker.grab_frames()
+    assert camera_worker.frame_slot.get() == 'frame'
+    assert camera_worker.frame_slot.is_closed()
+
+
+def test_required_fps_while_clip_reset(detecting_objects, mocker):
+    detecting_objects.stride.stride = 2
+    detecting_objects._obj_detected = True
+    detecting_objects.save_thread = mocker.Mock()
+    detecting_objects.save_thread.records_detection_stream.return_value = True
+    assert detecting_objects.required_fps() == FPS
+    detecting_objects.save_thread = None
+    assert detecting_objects.required_fps() == FPS / 2
+
+
+
+def test_stride_follows_tracked_detections(detecting_objects, mocker):
+    detecting_objects.model.predict.return_value = ['noise boxes']
+    mocker.patch.object(detecting_objects, 'track_detections',
+                        return_value=detections_from_tracks([]))
+    mocker.patch.object(detecting_objects.stride, 'update')
+    detecting_objects.process_detections(frame())
+    detecting_objects.stride.update.assert_called_once_with(mocker.ANY,
+                                                            False)
+
+
+# -----------------------------------------------
+# ------------ Test Inference Gating ------------
+# -----------------------------------------------
+
+@pytest.fixture
+def gated_detection(detecting_objects, mocker):
+    mocker.patch('camera_worker.MOTION_KEEPALIVE', 3)
+    detecting_objects.motion_detector = MotionDetector(threshold=0.005)
+    detecting_objects.stride.enabled = False
+    detecting_objects.tracker = None
+    detecting_objects.model.predict.return_value = ['results']
+    mocker.patch.object(detecting_objects, 'frames_elapsed', return_value=1)
+    mocker.patch.object(detecting_objects, 'track_detections',
+                        return_value=detections_from_tracks([]))
+    return detecting_objects
+
+
+def moving_frame(x=0, y=0):
+    moving = frame()
+    moving[y:y + 100, x:x + 100] = 200
+    return moving
+
+
+def inference_calls(handler, frames):
+    calls = []
+    for current_frame in frames:
+        handler.process_detections(current_frame)
+        calls.append(handler.model.predict.call_count)
+    return calls
+
+
+def test_inference_skipped_on_static_frames(gated_detection):
+    assert inference_calls(gated_detection, [frame()] * 3) == [1, 1, 1]
+
+
+def test_inference_runs_on_motion(gated_detection):
+    assert inference_calls(gated_detection,
+                           [frame(), frame(), moving_frame(), frame()]) \
+        == [1, 1, 2, 2]
+
+
+def test_inference_runs_after_keepalive(gated_detection):
+    assert inference_calls(gated_detection, [frame()] * 6) \
+        == [1, 1, 1, 1, 2, 2]
+
+
+def test_motion_outside_roi_ignored(gated_detection, mocker):
+    gated_detection.roi = RegionOfInterest([[0, 0], [0.5, 0.5]])
+    mocker.patch.object(gated_detection.roi, 'restore')
+    assert inference_calls(gated_detection,
+                           [frame(),
+                            moving_frame(x=400, y=300),
+                            moving_frame(x=100, y=100)]) == [1, 1, 2]
+    cropped = gated_detection.model.predict.call_args.args[0]
+    assert cropped.shape == gated_detection.roi.crop(frame()).shape
+    assert cropped.shape[1] < frame().shape[1] / 2 + 2
+
+
+def test_pre_event_frames_flushed_to_clip(gated_detection, mocker):
+    gated_detection.pre_event.enabled = True
+    gated_detection.recording_pool = mocker.Mock()
+    for _ in range(3):
+        gated_detection.process_detections(frame())
+    assert len(gated_detection.pre_event) == 3
+    gated_detection.track_detections.return_value = Detections(
+        numpy.array([[10, 10, 50, 50]], numpy.float32),
+        numpy.array([0]),
+        numpy.array([0.9], numpy.float32),
+        numpy.array([1]))
+    gated_detection.process_detections(moving_frame())
+    job = gated_detection.save_thread
+    assert isinstance(job, SaveVideo)
+    gated_detection.recording_pool.submit.assert_called_once_with(job)
+    assert len(job.pre_event_frames) == 3
+    assert job.pre_event_length == 3
+    assert job.frame_index == 4
+    assert job.frame_queue.get_nowait()[0] == 3
+    assert len(gated_detection.pre_event) == 0
+
+
+def test_frame_without_detections_encoded_once(gated_detection, mocker):
+    gated_detection.pre_event.enabled = True
+    gated_detection.stream_active.set()
+    gated_detection.videostream_frame.qsize.return_value = 0
+    imencode = mocker.spy(cv2, 'imencode')
+    gated_detection.process_frame(frame())
+    assert len(gated_detection.pre_event) == 1
+    gated_detection._loop.call_soon_threadsafe.assert_called_once()
+    imencode.assert_called_once()
+
+
+# -----------------------------------------------
+# ------------ Test GUI Frames ------------------
+# -----------------------------------------------
+
+@pytest.fixture
+def frame_processing(mocker):
+    handler = FrameProcessing(**frame_handler_args(mocker))
+    handler.gui_visible.set()
+    handler.received = []
+    handler.gui_signal.connect(
+        lambda frame, name: handler.received.append((frame, name)))
+    return handler
+
+
+def frame(width=640, height=480):
+    return numpy.zeros((height, width, 3), dtype=numpy.uint8)
+
+
+def test_gui_frame_sent(frame_processing):
+    frame_processing.send_frame_to_GUI(frame())
+    assert len(frame_processing.received) == 1
+    assert frame_processing.received[0][1] == camera_name
+
+
+def test_gui_frame_not_sent_when_hidden(frame_processing):
+    frame_processing.gui_visible.clear()
+    frame_processing.send_frame_to_GUI(frame())
+    assert frame_processing.received == []
+
+
+def test_gui_frame_rate_limited(frame_processing, mocker):
+    mocker.patch('camera_worker.time.monotonic',
+                 side_effect=[10, 10 + 0.5 / GUI_FPS, 10 + 1.5 / GUI_FPS])
+    for _ in range(3):
+        frame_processing.send_frame_to_GUI(frame())
+    assert len(frame_processing.received) == 2
+
+
+def test_gui_frame_resized_for_display(mocker):
+    args = frame_handler_args(mocker)
+    args['resolution'] = (1280, 960)
+    handler = FrameProcessing(**args)
+    handler.gui_visible.set()
+    slot = mocker.Mock()
+    handler.gui_signal.connect(slot)
+    handler.send_frame_to_GUI(frame(1280, 960))
+    assert slot.call_args.args[0].shape == (480, 640, 3)
+
+
+def test_required_fps_for_gui_and_stream(frame_processing):
+    assert frame_processing.required_fps() == GUI_FPS
+    frame_processing.gui_visible.clear()
+    assert frame_processing.required_fps() == 0
+    frame_processing.stream_active.set()
+    assert frame_processing.required_fps() == FPS
+    frame_processing.gui_visible.set()
+    assert frame_processing.required_fps() == max(GUI_FPS, FPS)
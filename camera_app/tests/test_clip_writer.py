@@ -0,0 +1,48 @@
+import pytest
+import sys
+import av
+import numpy
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from clip_writer import ClipWriter
+
+
+# -----------------------------------------------
+# ------------ Test Clip Writer -----------------
+# -----------------------------------------------
+
+@pytest.fixture
+def frame():
+    return numpy.zeros((120, 160, 3), dtype=numpy.uint8)
+
+
+def test_write_clip(tmp_path, frame):
+    video_name = tmp_path / 'test_video.mp4'
+    with ClipWriter(video_name, (160, 120), 10) as writer:
+        for _ in range(15):
+            writer.write(frame)
+    assert writer.frames == 15
+    with av.open(str(video_name)) as container:
+        stream = container.streams.video[0]
+        assert (stream.width, stream.height) == (160, 120)
+        assert len(list(container.decode(stream))) == 15
+
+
+def test_close_twice(tmp_path, frame):
+    writer = ClipWriter(tmp_path / 'test_video.mp4', (160, 120), 10)
+    writer.write(frame)
+    writer.close()
+    writer.close()
+    assert (tmp_path / 'test_video.mp4').stat().st_size > 0
+
+
+def test_write_clip_with_dropped_frames(tmp_path, frame):
+    video_name = tmp_path / 'test_video.mp4'
+    with ClipWriter(video_name, (160, 120), 10) as writer:
+        for pts in (0, 1, 2, 4, 8):
+            writer.write(frame, pts)
+    with av.open(str(video_name)) as container:
+        stream = container.streams.video[0]
+        times = [float(frame.time) for frame in container.decode(stream)]
+    assert times == [0, 0.1, 0.2, 0.4, 0.8]
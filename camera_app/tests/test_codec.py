@@ -0,0 +1,103 @@
+import pytest
+import asyncio
+import sys
+import json
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+import codec
+from codec import (
+    CodecError,
+    MessageParser,
+    read_message
+)
+from request_builder import RequestBuilder
+
+pytest_plugins = ('pytest_asyncio', )
+
+
+@pytest.fixture
+def fields():
+    return {'request_type': 'stream_request',
+            'camera_name': 'test_camera',
+            'record_size': 1024}
+
+
+# -----------------------------------------------
+# ------------ Test Codec -----------------------
+# -----------------------------------------------
+
+def test_encode_decode(fields):
+    assert codec.decode(codec.encode(fields)) == fields
+    assert codec.decode(codec.encode(fields, codec.JSON)) == fields
+
+
+def test_msgpack_body(fields):
+    pytest.importorskip('msgpack')
+    message = codec.encode(fields, codec.MSGPACK)
+    assert message[2] == codec.MSGPACK
+    assert codec.decode(message) == fields
+
+
+def test_wrong_message(fields):
+    message = bytearray(codec.encode(fields))
+    message[1] = codec.VERSION + 1
+    with pytest.raises(CodecError):
+        codec.decode(message)
+    with pytest.raises(CodecError):
+        codec.decode(json.dumps(fields).encode())
+
+
+def test_wrong_message_body():
+    body = b'{x}'
+    message = codec.header.pack(codec.MAGIC, codec.VERSION,
+                                codec.JSON, len(body)) + body
+    with pytest.raises(CodecError):
+        codec.decode(message)
+    with pytest.raises(CodecError):
+        MessageParser().feed(message)
+    with pytest.raises(CodecError):
+        RequestBuilder().with_bytes(message)
+
+
+def test_wrong_msgpack_body():
+    pytest.importorskip('msgpack')
+    body = b'\xc1'
+    message = codec.header.pack(codec.MAGIC, codec.VERSION,
+                                codec.MSGPACK, len(body)) + body
+    with pytest.raises(CodecError):
+        codec.decode(message)
+
+
+def test_parser_split_messages(fields):
+    data = codec.encode(fields) * 3
+    parser = MessageParser()
+    messages = []
+    for byte in range(len(data)):
+        messages += parser.feed(data[byte:byte + 1])
+    assert messages == [fields] * 3
+
+
+def test_parser_joined_messages(fields):
+    data = codec.encode(fields) * 3 + codec.encode(fields)[:5]
+    parser = MessageParser()
+    assert parser.feed(data) == [fields] * 3
+    assert parser.feed(codec.encode(fields)[5:]) == [fields]
+
+
+@pytest.mark.asyncio
+async def test_read_message(fields):
+    message = codec.encode(fields)
+    reader = asyncio.StreamReader()
+    reader.feed_data(message[4:])
+    reader.feed_data(b'next request')
+    reader.feed_eof()
+    assert await read_message(reader, message[:4]) == message
+    assert await reader.read() == b'next request'
+
+
+def test_request_from_both_formats(fields):
+    request = RequestBuilder().with_args(**fields).build()
+    packed = RequestBuilder().with_bytes(request.pack()).build()
+    plain = RequestBuilder().with_bytes(request.serialize().encode()).build()
+    assert packed.__dict__ == plain.__dict__ == request.__dict__
@@ -1,12 +1,15 @@
 import pytest
+import asyncio
 import sys
 import json
 from pathlib import Path
 base_dir = Path(__file__).resolve().parent.parent
 sys.path.insert(1, str(base_dir))
 from connection_client import ConnectionClient
-from utils import CallableExhausted, ErrorAfter
+import utils
+from utils import CallableExhausted, ErrorAfter, SessionClient
 from request_builder import RequestBuilder
+import codec
 
 pytest_plugins = ('pytest_asyncio', )
 
@@ -16,6 +19,14 @@ class DummyHandler:
         return True
 
 
+class RecordingHandler:
+    requests = []
+
+    async def handle(self, request, loop):
+        self.requests.append(request)
+        return True
+
+
 @pytest.fixture
 def connection_client(mocker):
     client = ConnectionClient([])
@@ -25,6 +36,7 @@ def connection_client(mocker):
     client.connection_status = mocker.Mock()
     client.connect_to_server = mocker.AsyncMock()
     client.get_messages = mocker.AsyncMock()
+    client.signal_subscription = False
     return client
 
 
@@ -151,3 +163,102 @@ async def test_call_handler(connection_client, test_request, mocker):
         await connection_client.get_server_events()
     connection_client.connection_status.emit.assert_called_with(True)
     handler.handle.assert_called()
+
+
+# -----------------------------------------------
+# ------------ Test Signal Subscription ---------
+# -----------------------------------------------
+
+@pytest.fixture
+def subscribed_client(connection_client, mocker):
+    connection_client.signal_subscription = True
+    connection_client.handlers = [RecordingHandler]
+    RecordingHandler.requests = []
+    reader = mocker.AsyncMock()
+    writer = mocker.Mock()
+    connection_client.connect_to_server.return_value = (reader, writer)
+    return connection_client
+
+
+@pytest.mark.asyncio
+async def test_subscription_handles_pushed_signals(subscribed_client):
+    reader, writer = subscribed_client.connect_to_server.return_value
+    data = codec.encode({'request_type': 'heartbeat'}) \
+        + codec.encode({'request_type': 'stream_request',
+                        'camera_name': 'test_camera'})
+    reader.read.side_effect = [data[:5], data[5:30], data[30:], b'']
+    result = await subscribed_client.subscribe_server_events()
+    assert result is True
+    assert len(RecordingHandler.requests) == 1
+    assert RecordingHandler.requests[0].camera_name == 'test_camera'
+    subscribed_client.connection_status.emit.assert_called_with(True)
+    writer.close.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_subscription_to_server_without_codec(subscribed_client):
+    reader, writer = subscribed_client.connect_to_server.return_value
+    data = b''.join(
+        RequestBuilder().with_args(request_type='stream_request',
+                                   camera_name=name).build()
+        .serialize().encode()
+        for name in ('camera_1', 'camera_2'))
+    reader.read.side_effect = [data[:70], data[70:], b'']
+    assert await subscribed_client.subscribe_server_events() is True
+    assert [request.camera_name for request in RecordingHandler.requests] \
+        == ['camera_1', 'camera_2']
+
+
+@pytest.mark.asyncio
+async def test_subscription_heartbeat_timeout(subscribed_client, mocker):
+    mocker.patch('connection_client.HEARTBEAT_TIMEOUT', 0.01)
+    reader, writer = subscribed_client.connect_to_server.return_value
+
+    async def no_data(size):
+        await asyncio.sleep(1)
+
+    reader.read.side_effect = no_data
+    result = await subscribed_client.subscribe_server_events()
+    assert result is False
+    writer.close.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_timeout_drops_session(mocker):
+    mocker.patch('connection_client.HEARTBEAT_TIMEOUT', 0.05)
+    mocker.patch('utils.MULTIPLEXED_SESSION', True)
+    connections = []
+
+    async def silent_server(reader, writer):
+        connections.append(writer)
+
+    server = await asyncio.start_server(silent_server, '127.0.0.1', 0)
+    host, port = server.sockets[0].getsockname()
+    mocker.patch.object(SessionClient, 'host', host)
+    mocker.patch.object(SessionClient, 'port', port)
+    utils.Singleton._instances.pop(SessionClient, None)
+    client = ConnectionClient([])
+    client.connection_status = mocker.Mock()
+
+    assert await client.subscribe_server_events() is False
+    assert SessionClient().session.closed
+    request = RequestBuilder().with_args(request_type='test').build()
+    reader, writer = await client.connect_to_server(request)
+    await asyncio.sleep(0.05)
+    assert len(connections) == 2
+    assert not SessionClient().session.closed
+
+    SessionClient().session.abort()
+    utils.Singleton._instances.pop(SessionClient, None)
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_resubscribe_without_delay(subscribed_client, mocker):
+    sleep = mocker.patch('connection_client.asyncio.sleep')
+    subscribed_client.subscribe_server_events = mocker.AsyncMock(
+        side_effect=ErrorAfter(limit=2, return_value=True))
+    with pytest.raises(CallableExhausted):
+        await subscribed_client.get_server_events()
+    assert subscribed_client.subscribe_server_events.await_count == 3
+    sleep.assert_not_called()
@@ -6,14 +6,16 @@ import os
 from pathlib import Path
 base_dir = Path(__file__).resolve().parent.parent
 sys.path.insert(1, str(base_dir))
-from settings import SAVE_PATH
+from settings import SAVE_PATH, INFERENCE_BACKEND
 from streaming import VideoStreamManager
 from connection_handlers import (
     AproveUserHandler,
     VideoRequestHandler,
-    StreamHandler
+    StreamHandler,
+    ModelUpdateHandler
 )
 from request_builder import RequestBuilder
+import codec
 
 pytest_plugins = ('pytest_asyncio', )
 camera_name = 'test_camera'
@@ -270,6 +272,101 @@ async def test_failed_to_find_video(video_request_handler,
         .connect_to_server.assert_called_with(excpected_request)
 
 
+@pytest.fixture
+def video_file(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(bytes(range(256)) * 1000)
+    return path
+
+
+def offset_reply(offset, received):
+    reader = asyncio.StreamReader()
+    reader.feed_data(codec.encode({'offset': offset}))
+    reader.feed_data(codec.encode({'offset': received}))
+    return reader
+
+
+@pytest.mark.asyncio
+async def test_upload_chunks_from_offset(video_file, mocker):
+    handler = VideoRequestHandler()
+    handler.buff_size = 10000
+    writer = mocker.Mock(spec=['write', 'drain', 'close', 'wait_closed'])
+    writer.drain = mocker.AsyncMock()
+    writer.wait_closed = mocker.AsyncMock()
+    size = video_file.stat().st_size
+    handler.connect_to_server = mocker.AsyncMock(
+        return_value=(offset_reply(1000, size), writer))
+    result = await handler.upload('video|camera', video_file, size)
+    assert result is True
+    sent = b''.join(call.args[0] for call in writer.write.mock_calls)
+    assert sent == video_file.read_bytes()[1000:]
+    assert max(len(call.args[0]) for call in writer.write.mock_calls) \
+        <= 10000
+    writer.close.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_with_sendfile(video_file, mocker):
+    received = asyncio.Queue()
+
+    async def server(reader, writer):
+        writer.write(codec.encode({'offset': 500}))
+        await writer.drain()
+        data = await reader.readexactly(video_file.stat().st_size - 500)
+        writer.write(codec.encode({'offset': 500 + len(data)}))
+        await writer.drain()
+        await received.put(data)
+        writer.close()
+
+    tcp_server = await asyncio.start_server(server, '127.0.0.1', 0)
+    connection = await asyncio.open_connection(
+        *tcp_server.sockets[0].getsockname())
+    handler = VideoRequestHandler()
+    handler.connect_to_server = mocker.AsyncMock(return_value=connection)
+    size = video_file.stat().st_size
+    assert await handler.upload('video|camera', video_file, size)
+    data = await asyncio.wait_for(received.get(), 1)
+    assert data == video_file.read_bytes()[500:]
+    tcp_server.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_interrupted(video_file, mocker):
+    handler = VideoRequestHandler()
+    reader = asyncio.StreamReader()
+    reader.feed_eof()
+    writer = mocker.Mock()
+    handler.connect_to_server = mocker.AsyncMock(
+        return_value=(reader, writer))
+    result = await handler.upload('video|camera', video_file, 100)
+    assert result is False
+    writer.close.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_not_confirmed(video_file, mocker):
+    handler = VideoRequestHandler()
+    writer = mocker.Mock(spec=['write', 'drain', 'close', 'wait_closed'])
+    writer.drain = mocker.AsyncMock()
+    writer.wait_closed = mocker.AsyncMock()
+    size = video_file.stat().st_size
+    handler.connect_to_server = mocker.AsyncMock(
+        return_value=(offset_reply(0, size - 1), writer))
+    assert await handler.upload('video|camera', video_file, size) is False
+
+
+@pytest.mark.asyncio
+async def test_upload_retries(video_file, mocker):
+    mocker.patch('connection_handlers.asyncio.sleep')
+    handler = VideoRequestHandler()
+    handler.upload = mocker.AsyncMock(side_effect=[False, True])
+    assert await handler.send_video('video|camera', video_file)
+    assert handler.upload.await_count == 2
+    handler.upload.assert_awaited_with('video|camera',
+                                       video_file,
+                                       video_file.stat().st_size)
+
+
 # -----------------------------------------------
 # ------------ Test Stream Request Handler ------
 # -----------------------------------------------
@@ -320,3 +417,84 @@ async def test_put_request_to_queue(stream_request_handler,
                                     stream_manager):
     await stream_request_handler.process_request(proper_stream_request)
     stream_manager.requesters.put.assert_called_with(proper_stream_request)
+
+
+# -----------------------------------------------
+# ------------ Test Model Update Handler --------
+# -----------------------------------------------
+
+@pytest.fixture
+def model_update_request():
+    builder = RequestBuilder().with_args(request_type='model_update',
+                                         weights='weights/new.pt')
+    return builder.build()
+
+
+@pytest.fixture
+def camera_streams(mocker):
+    streams = {name: mocker.Mock() for name in ('camera_1', 'camera_2')}
+    for stream in streams.values():
+        stream.camera_worker.update_model.return_value = True
+    mocker.patch.dict(ModelUpdateHandler.manager.cameras,
+                      streams,
+                      clear=True)
+    return list(streams.values())
+
+
+@pytest.fixture
+def model_update_response(mocker):
+    return mocker.patch.object(
+        ModelUpdateHandler,
+        'connect_to_server',
+        mocker.AsyncMock(return_value=(None, mocker.Mock())))
+
+
+def sent_result(connect_to_server):
+    response = connect_to_server.call_args.args[0]
+    assert response.request_type == 'model_update_response'
+    assert response.weights == 'weights/new.pt'
+    return response.request_result
+
+
+@pytest.mark.asyncio
+async def test_model_update_handler_wrong_event(wrong_event):
+    loop = asyncio.get_running_loop()
+    result = await ModelUpdateHandler().handle(wrong_event, loop)
+    assert result is False
+
+
+@pytest.mark.asyncio
+async def test_shared_model_swapped_once(model_update_request,
+                                         camera_streams,
+                                         model_update_response):
+    await ModelUpdateHandler().process_request(model_update_request)
+    camera_streams[0].camera_worker.update_model.assert_called_once_with(
+        base_dir.parent / 'weights/new.pt',
+        INFERENCE_BACKEND)
+    camera_streams[1].camera_worker.update_model.assert_not_called()
+    assert sent_result(model_update_response) == 'success'
+
+
+@pytest.mark.asyncio
+async def test_model_update_in_every_process(model_update_request,
+                                             camera_streams,
+                                             model_update_response,
+                                             mocker):
+    mocker.patch('connection_handlers.PROCESS_PER_CAMERA', True)
+    camera_streams[1].camera_worker.update_model.return_value = False
+    await ModelUpdateHandler().process_request(model_update_request)
+    for stream in camera_streams:
+        stream.camera_worker.update_model.assert_called_once()
+    assert sent_result(model_update_response) == 'failure'
+
+
+@pytest.mark.asyncio
+async def test_model_update_without_ready_camera(model_update_request,
+                                                 camera_streams,
+                                                 model_update_response):
+    for stream in camera_streams:
+        stream.camera_worker.ready.is_set.return_value = False
+    await ModelUpdateHandler().process_request(model_update_request)
+    for stream in camera_streams:
+        stream.camera_worker.update_model.assert_not_called()
+    assert sent_result(model_update_response) == 'failure'
@@ -0,0 +1,191 @@
+import pytest
+import sys
+import numpy
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from detection_utils import (
+    DetectionStride,
+    MotionDetector,
+    RegionOfInterest,
+    Detections,
+    detections_from_tracks,
+    draw_detections
+)
+from tracker import Tracker
+
+
+# -----------------------------------------------
+# ------------ Test Detection Stride ------------
+# -----------------------------------------------
+
+@pytest.fixture
+def stride():
+    return DetectionStride(fps=10, max_stride=8, load=0.5, smoothing=1)
+
+
+def inference_frames(stride, frames):
+    return [n for n in range(frames) if stride.inference_due()]
+
+
+def test_inference_every_frame_by_default(stride):
+    assert inference_frames(stride, 5) == [0, 1, 2, 3, 4]
+
+
+def test_stride_grows_without_detections(stride):
+    stride.update(latency=0.2, detected=False)
+    assert stride.stride == 2
+    stride.update(latency=0.2, detected=False)
+    assert stride.stride == 4
+    assert inference_frames(stride, 9) == [3, 7]
+
+
+def test_stride_limited_by_latency_and_max(stride):
+    for _ in range(5):
+        stride.update(latency=0.1, detected=False)
+    assert stride.stride == 2
+    for _ in range(5):
+        stride.update(latency=10, detected=False)
+    assert stride.stride == 8
+
+
+def test_detection_resets_stride(stride):
+    for _ in range(5):
+        stride.update(latency=0.2, detected=False)
+    stride.update(latency=0.2, detected=True)
+    assert stride.stride == 1
+    assert inference_frames(stride, 3) == [0, 1, 2]
+
+
+def test_stride_counts_skipped_frames(stride):
+    stride.update(latency=0.2, detected=False)
+    stride.update(latency=0.2, detected=False)
+    assert stride.inference_due(frames=4)
+    assert not stride.inference_due(frames=2)
+    assert stride.inference_due(frames=2)
+
+
+def test_disabled_stride():
+    stride = DetectionStride(fps=10, max_stride=8, load=0.5, enabled=False)
+    stride.update(latency=1, detected=False)
+    assert inference_frames(stride, 3) == [0, 1, 2]
+
+
+# -----------------------------------------------
+# ------------ Test Motion Detector -------------
+# -----------------------------------------------
+
+@pytest.fixture
+def motion_detector():
+    return MotionDetector(threshold=0.01)
+
+
+@pytest.fixture
+def empty_frame():
+    return numpy.zeros((360, 640, 3), dtype=numpy.uint8)
+
+
+@pytest.fixture
+def moving_frame(empty_frame):
+    frame = empty_frame.copy()
+    frame[100:200, 200:300] = 255
+    return frame
+
+
+def test_motion_on_first_frame(motion_detector, empty_frame):
+    assert motion_detector.detect(empty_frame) is True
+
+
+def test_no_motion_on_static_scene(motion_detector, empty_frame):
+    motion_detector.detect(empty_frame)
+    assert not motion_detector.detect(empty_frame.copy())
+    assert motion_detector.motion == 0
+
+
+def test_motion_detected(motion_detector, empty_frame, moving_frame):
+    motion_detector.detect(empty_frame)
+    assert motion_detector.detect(moving_frame)
+    assert motion_detector.motion > 0.01
+
+
+def test_motion_below_threshold(empty_frame, moving_frame):
+    motion_detector = MotionDetector(threshold=0.5)
+    motion_detector.detect(empty_frame)
+    assert not motion_detector.detect(moving_frame)
+
+
+def test_disabled_motion_detector(empty_frame):
+    motion_detector = MotionDetector(threshold=0.01, enabled=False)
+    motion_detector.detect(empty_frame)
+    assert motion_detector.detect(empty_frame) is True
+
+
+def test_motion_outside_mask_ignored(motion_detector,
+                                     empty_frame,
+                                     moving_frame):
+    mask = numpy.zeros(empty_frame.shape[:2], dtype=numpy.uint8)
+    mask[250:, :] = 255
+    motion_detector.detect(empty_frame, mask)
+    assert not motion_detector.detect(moving_frame, mask)
+
+
+# -----------------------------------------------
+# ------------ Test Region Of Interest ----------
+# -----------------------------------------------
+
+@pytest.fixture
+def triangle():
+    return RegionOfInterest([(0.5, 0), (1, 0), (1, 0.5)])
+
+
+def test_rectangle_crop(empty_frame):
+    roi = RegionOfInterest([(0.25, 0.5), (0.75, 1)])
+    cropped = roi.crop(empty_frame)
+    assert roi.bbox == (160, 180, 481, 360)
+    assert cropped.shape == (180, 321, 3)
+    assert roi.crop_mask().all()
+
+
+def test_polygon_crop(triangle, empty_frame):
+    cropped = triangle.crop(empty_frame)
+    assert cropped.shape == (181, 320, 3)
+    assert not triangle.crop_mask().all()
+
+
+def test_boxes_inside_polygon(triangle, empty_frame):
+    triangle.prepare(empty_frame.shape)
+    boxes = numpy.array([[600, 0, 640, 40],
+                         [320, 300, 360, 340],
+                         [330, 100, 370, 140]], dtype=numpy.float32)
+    assert triangle.inside(boxes).tolist() == [True, False, False]
+
+
+# -----------------------------------------------
+# ------------ Test Draw Detections -------------
+# -----------------------------------------------
+
+def test_draw_detections_on_copy():
+    frame = numpy.zeros((120, 160, 3), dtype=numpy.uint8)
+    detections = Detections(numpy.array([[10., 20., 60., 80.]]),
+                            numpy.array([1]),
+                            numpy.array([0.8]),
+                            numpy.array([-1]))
+    annotated = draw_detections(frame, detections, {1: 'cat_det'})
+    assert not frame.any()
+    assert annotated[20, 10:60].any()
+    assert not annotated[100:, 100:].any()
+
+
+def test_draw_no_detections_on_same_frame():
+    frame = numpy.zeros((120, 160, 3), dtype=numpy.uint8)
+    assert draw_detections(frame, detections_from_tracks([]), {}) is frame
+
+
+def test_detections_from_tracks():
+    assert len(detections_from_tracks([]).cls) == 0
+    tracker = Tracker(min_hits=1)
+    tracks = tracker.update([[0, 0, 10, 10]], [2], [0.9])
+    detections = detections_from_tracks(tracks)
+    assert detections.boxes.shape == (1, 4)
+    assert detections.cls.tolist() == [2]
+    assert detections.track_id.tolist() == [1]
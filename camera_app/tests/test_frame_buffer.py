@@ -0,0 +1,142 @@
+import pytest
+import sys
+import threading
+import numpy
+import cv2
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from frame_buffer import (
+    LatestFrame,
+    DecodeSchedule,
+    PreEventBuffer
+)
+
+
+# -----------------------------------------------
+# ------------ Test Latest Frame ----------------
+# -----------------------------------------------
+
+@pytest.fixture
+def frame_slot():
+    return LatestFrame()
+
+
+def test_get_newest_frame(frame_slot):
+    frame_slot.put('frame_1')
+    frame_slot.put('frame_2')
+    assert frame_slot.get() == 'frame_2'
+    assert frame_slot.stats() == {'captured': 2,
+                                  'processed': 1,
+                                  'dropped': 1}
+
+
+def test_get_timeout(frame_slot):
+    assert frame_slot.get(timeout=0.01) is None
+
+
+def test_frame_left_after_close(frame_slot):
+    frame_slot.put('frame')
+    frame_slot.close()
+    assert not frame_slot.is_closed()
+    assert frame_slot.get() == 'frame'
+    assert frame_slot.is_closed()
+    assert frame_slot.get() is None
+
+
+def test_close_wakes_consumer(frame_slot):
+    result = []
+    consumer = threading.Thread(
+        target=lambda: result.append(frame_slot.get()))
+    consumer.start()
+    frame_slot.close()
+    consumer.join(timeout=1)
+    assert not consumer.is_alive()
+    assert result == [None]
+
+
+def test_slot_empty(frame_slot):
+    assert frame_slot.is_empty()
+    frame_slot.put('frame')
+    assert not frame_slot.is_empty()
+    frame_slot.get()
+    assert frame_slot.is_empty()
+
+
+# -----------------------------------------------
+# ------------ Test Decode Schedule -------------
+# -----------------------------------------------
+
+def decoded_frames(schedule, fps, camera_fps, frames):
+    return [n for n in range(frames)
+            if schedule.decode_due(fps, now=n / camera_fps)]
+
+
+def test_decode_at_requested_fps():
+    schedule = DecodeSchedule()
+    assert decoded_frames(schedule, 10, 30, 12) == [0, 3, 6, 9]
+    assert schedule.stats() == {'grabbed': 12, 'decoded': 4}
+
+
+def test_decode_every_frame_when_rate_matches():
+    schedule = DecodeSchedule()
+    assert decoded_frames(schedule, 10, 10, 5) == [0, 1, 2, 3, 4]
+
+
+def test_skip_decode_when_frame_not_taken():
+    schedule = DecodeSchedule()
+    assert schedule.decode_due(10, slot_empty=True, now=0)
+    assert not schedule.decode_due(10, slot_empty=False, now=1)
+    assert schedule.decode_due(10, slot_empty=True, now=2)
+
+
+def test_skip_decode_when_frames_not_needed():
+    schedule = DecodeSchedule()
+    assert decoded_frames(schedule, 0, 10, 5) == []
+    assert schedule.stats() == {'grabbed': 5, 'decoded': 0}
+
+
+def test_disabled_schedule_decodes_every_frame():
+    schedule = DecodeSchedule(enabled=False)
+    assert decoded_frames(schedule, 1, 30, 5) == [0, 1, 2, 3, 4]
+    assert schedule.decode_due(0, slot_empty=False)
+
+
+# -----------------------------------------------
+# ------------ Test Pre Event Buffer ------------
+# -----------------------------------------------
+
+@pytest.fixture
+def frame():
+    frame = numpy.zeros((120, 160, 3), dtype=numpy.uint8)
+    frame[:, 80:] = 255
+    return frame
+
+
+@pytest.fixture
+def jpeg(frame):
+    ret, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 100])
+    return jpeg.tobytes()
+
+
+def test_buffer_keeps_last_frames(jpeg):
+    pre_event = PreEventBuffer(size=3)
+    for number in range(5):
+        pre_event.add(jpeg + bytes([number]))
+    assert len(pre_event) == 3
+    frames = pre_event.flush()
+    assert [frame[-1] for frame in frames] == [2, 3, 4]
+    assert len(pre_event) == 0
+
+
+def test_decode_frame(frame, jpeg):
+    decoded = PreEventBuffer.decode(jpeg)
+    assert decoded.shape == frame.shape
+    assert numpy.abs(decoded.astype(int) - frame).mean() < 2
+
+
+def test_disabled_buffer(jpeg):
+    pre_event = PreEventBuffer(size=0)
+    assert pre_event.enabled is False
+    pre_event.add(jpeg)
+    assert pre_event.flush() == []
@@ -0,0 +1,52 @@
+import pytest
+import sys
+import numpy
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from frame_bus import FrameRing
+
+
+# -----------------------------------------------
+# ------------ Test Frame Ring ------------------
+# -----------------------------------------------
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=2, slot_size=120 * 160 * 3)
+    yield ring
+    ring.close()
+
+
+@pytest.fixture
+def reader(ring):
+    reader = FrameRing(ring.slots, ring.slot_size, name=ring.name)
+    yield reader
+    reader.close()
+
+
+def test_read_frame(ring, reader):
+    frame = numpy.random.randint(0, 255, (120, 160, 3), dtype=numpy.uint8)
+    seq = ring.write(frame, frame.shape[:2])
+    result = reader.read(seq)
+    assert numpy.array_equal(result, frame)
+    frame[:] = 0
+    assert not numpy.array_equal(result, frame)
+
+
+def test_read_bytes(ring, reader):
+    seq = ring.write(b'encoded frame')
+    assert reader.read(seq) == b'encoded frame'
+
+
+def test_overwritten_slot(ring, reader):
+    first = ring.write(b'frame_1')
+    ring.write(b'frame_2')
+    third = ring.write(b'frame_3')
+    assert reader.read(first) is None
+    assert reader.read(third) == b'frame_3'
+
+
+def test_frame_too_big(ring):
+    assert ring.write(bytes(ring.slot_size + 1)) is None
+    assert ring.seq == 0
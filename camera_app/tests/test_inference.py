@@ -0,0 +1,163 @@
+import pytest
+import sys
+import time
+import threading
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+import inference
+from inference import (
+    InferenceEngine,
+    InferenceRequest,
+    get_model_path,
+    load_model
+)
+
+
+def fake_model(frames, conf, verbose):
+    return [f'result {frame}' for frame in frames]
+
+
+@pytest.fixture
+def engine(mocker):
+    mocker.patch('inference.BATCH_SIZE', 4)
+    mocker.patch('inference.BATCH_MAX_WAIT', 20)
+    inference.Singleton._instances.pop(InferenceEngine, None)
+    engine = InferenceEngine()
+    engine.model = fake_model
+    engine.cameras = 4
+    yield engine
+    inference.Singleton._instances.pop(InferenceEngine, None)
+
+
+def start_engine(engine):
+    engine._thread = threading.Thread(target=engine.run_engine, daemon=True)
+    engine._thread.start()
+
+
+def predict_in_threads(engine, frames):
+    results = {}
+
+    def predict(frame):
+        try:
+            results[frame] = engine.predict(frame)
+        except Exception as error:
+            results[frame] = error
+
+    threads = [threading.Thread(target=predict, args=(frame, ))
+               for frame in frames]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=1)
+    return results
+
+
+# -----------------------------------------------
+# ------------ Test Inference Engine ------------
+# -----------------------------------------------
+
+def test_batch_limited_by_cameras(engine):
+    engine.cameras = 2
+    for frame in range(3):
+        engine._requests.put(InferenceRequest(frame))
+    batch = engine.collect_batch()
+    assert [request.frame for request in batch] == [0, 1]
+    assert engine._requests.qsize() == 1
+
+
+def test_batch_limited_by_batch_size(engine):
+    engine.cameras = 10
+    for frame in range(6):
+        engine._requests.put(InferenceRequest(frame))
+    assert len(engine.collect_batch()) == 4
+
+
+def test_batch_waits_until_deadline(engine):
+    engine._requests.put(InferenceRequest(0))
+    start = time.monotonic()
+    batch = engine.collect_batch()
+    elapsed = time.monotonic() - start
+    assert len(batch) == 1
+    assert 0.015 < elapsed < 0.5
+
+
+def test_results_returned_to_callers(engine):
+    start_engine(engine)
+    results = predict_in_threads(engine, range(8))
+    assert results == {frame: [f'result {frame}'] for frame in range(8)}
+    assert engine.frames == 8
+    assert engine.batches <= 8
+
+
+def test_model_error_raised_in_callers(engine, mocker):
+    engine.model = mocker.Mock(side_effect=RuntimeError('model failed'))
+    start_engine(engine)
+    results = predict_in_threads(engine, range(3))
+    assert len(results) == 3
+    for error in results.values():
+        assert isinstance(error, RuntimeError)
+    assert engine.frames == 0
+
+
+# -----------------------------------------------
+# ------------ Test Inference Backends ----------
+# -----------------------------------------------
+
+@pytest.fixture
+def weights(tmp_path):
+    weights = tmp_path / 'weights.pt'
+    weights.write_bytes(b'weights')
+    return weights
+
+
+@pytest.fixture
+def yolo(mocker):
+    ultralytics = mocker.Mock()
+    mocker.patch.dict(sys.modules, {'ultralytics': ultralytics})
+    return ultralytics.YOLO
+
+
+def test_model_path_for_backend(weights):
+    assert get_model_path('torch', weights) == weights
+    assert get_model_path('onnx', weights) == weights.with_suffix('.onnx')
+    assert get_model_path('openvino', weights) == \
+        weights.parent / 'weights_openvino_model'
+    with pytest.raises(ValueError):
+        get_model_path('tensorrt', weights)
+
+
+def test_export_on_first_use(weights, yolo):
+    load_model('onnx', weights)
+    yolo.assert_any_call(weights)
+    yolo.return_value.export.assert_called_once_with(format='onnx',
+                                                     dynamic=True)
+    yolo.assert_called_with(weights.with_suffix('.onnx'), task='detect')
+
+
+def test_exported_model_reused(weights, yolo):
+    (weights.parent / 'weights_openvino_model').mkdir()
+    load_model('openvino', weights)
+    yolo.return_value.export.assert_not_called()
+    yolo.assert_called_once_with(weights.parent / 'weights_openvino_model',
+                                 task='detect')
+
+
+def test_fallback_to_torch(engine, weights, yolo):
+    engine.model = None
+    engine.weights = weights
+    engine.backend = 'onnx'
+    yolo.return_value.export.side_effect = RuntimeError('export failed')
+    engine.load_model()
+    assert engine.backend == 'torch'
+    yolo.assert_called_with(weights, task='detect')
+    assert engine.model is yolo.return_value
+
+
+def test_no_fallback_for_torch(engine, weights, yolo):
+    engine.model = None
+    engine.weights = weights
+    engine.backend = 'torch'
+    yolo.side_effect = OSError('no weights')
+    with pytest.raises(OSError):
+        engine.load_model()
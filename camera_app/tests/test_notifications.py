@@ -0,0 +1,151 @@
+import pytest
+import sys
+import time
+import threading
+import socketserver
+from email.mime.text import MIMEText
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+import notifications
+from notifications import EmailSender
+
+
+class SMTPStandIn(socketserver.StreamRequestHandler):
+    '''
+    Minimal SMTP server, accepts any login. First `server.failures`
+    emails are rejected with temporary error, connection is closed
+    after each email if `server.single_email` is set
+    '''
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 localhost')
+        while line := self.rfile.readline():
+            command = line.decode().upper()
+            if command.startswith('EHLO'):
+                self.reply('250-localhost')
+                self.reply('250 AUTH PLAIN')
+            elif command.startswith('AUTH'):
+                server.logins += 1
+                self.reply('235 Authenticated')
+            elif command.startswith('DATA'):
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = b''.join(iter(self.rfile.readline, b'.\r\n'))
+                if server.failures:
+                    server.failures -= 1
+                    self.reply('451 Try again later')
+                else:
+                    server.messages.append(data)
+                    self.reply('250 OK')
+                    if server.single_email:
+                        return
+            elif command.startswith('QUIT'):
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStandIn)
+    server.daemon_threads = True
+    server.connections = 0
+    server.logins = 0
+    server.failures = 0
+    server.single_email = False
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def email_sender(smtp_server, mocker):
+    mocker.patch('notifications.EMAIL_BACKEND', '127.0.0.1')
+    mocker.patch('notifications.EMAIL_PORT', smtp_server.server_address[1])
+    mocker.patch('notifications.EMAIL_TLS', False)
+    mocker.patch('notifications.EMAIL_RETRY_TIMEOUT', 0)
+    notifications.Singleton._instances.pop(EmailSender, None)
+    yield EmailSender()
+    notifications.Singleton._instances.pop(EmailSender, None)
+
+
+def email(number):
+    message = MIMEText(f'email {number}')
+    message['From'] = 'camera@example.com'
+    message['To'] = f'user{number}@example.com'
+    message['Subject'] = 'Account approved'
+    return message
+
+
+# -----------------------------------------------
+# ------------ Test Email Sender ----------------
+# -----------------------------------------------
+
+def test_emails_share_connection(email_sender, smtp_server):
+    for number in range(3):
+        email_sender.submit(email(number))
+    email_sender.messages.join()
+    assert len(smtp_server.messages) == 3
+    assert b'email 2' in smtp_server.messages[2]
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+    assert email_sender.stats()['sent'] == 3
+
+
+def test_retry_failed_email(email_sender, smtp_server):
+    smtp_server.failures = 1
+    email_sender.submit(email(0))
+    email_sender.messages.join()
+    assert len(smtp_server.messages) == 1
+    assert smtp_server.connections == 2
+    assert email_sender.stats()['failed'] == 0
+
+
+def test_give_up_after_retries(email_sender, smtp_server):
+    smtp_server.failures = email_sender.retries
+    email_sender.submit(email(0))
+    email_sender.submit(email(1))
+    email_sender.messages.join()
+    assert len(smtp_server.messages) == 1
+    assert b'email 1' in smtp_server.messages[0]
+    assert email_sender.stats()['failed'] == 1
+
+
+def test_server_unavailable(email_sender, smtp_server):
+    smtp_server.shutdown()
+    smtp_server.server_close()
+    assert email_sender.send(email(0)) is False
+    assert email_sender.connection is None
+
+
+def test_disconnect_when_idle(email_sender, smtp_server):
+    email_sender.idle_timeout = 0.05
+    email_sender.submit(email(0))
+    email_sender.messages.join()
+    time.sleep(0.2)
+    assert email_sender.connection is None
+    email_sender.submit(email(1))
+    email_sender.messages.join()
+    assert smtp_server.connections == 2
+
+
+def test_reconnect_when_server_closed_connection(email_sender, smtp_server):
+    smtp_server.single_email = True
+    email_sender.retries = 1
+    email_sender.retry_timeout = 10
+    for number in range(2):
+        email_sender.submit(email(number))
+    start = time.monotonic()
+    email_sender.messages.join()
+    assert time.monotonic() - start < 5
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.connections == 2
+    assert email_sender.stats()['failed'] == 0
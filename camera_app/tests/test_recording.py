@@ -0,0 +1,236 @@
+import pytest
+import sys
+import numpy
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+import recording
+from recording import (
+    RecordingPool,
+    SaveVideo,
+    ClipDetections
+)
+from clip_writer import ClipWriter
+
+
+# -----------------------------------------------
+# ------------ Test Save Video ------------------
+# -----------------------------------------------
+
+@pytest.fixture
+def frame():
+    return numpy.zeros((120, 160, 3), dtype=numpy.uint8)
+
+
+@pytest.fixture
+def save_video(tmp_path, mocker):
+    mocker.patch('recording.SAVE_PATH', tmp_path)
+    return SaveVideo((160, 120), 'test_camera', mocker.Mock())
+
+
+def test_keep_all_frames(save_video, frame):
+    for _ in range(10):
+        save_video.put_frame(frame)
+    assert save_video.frame_queue.qsize() == 10
+    assert save_video.frames_dropped == 0
+
+
+def test_degrade_fps_when_queue_fills(save_video, frame, mocker):
+    save_video.frame_queue.maxsize = 8
+    for _ in range(16):
+        save_video.put_frame(frame)
+    indexes = [save_video.frame_queue.get()[0]
+               for _ in range(save_video.frame_queue.qsize())]
+    assert indexes == [0, 1, 2, 3, 4, 6, 8, 12]
+    assert save_video.frames_dropped == 8
+
+
+def test_rejected_job_drops_frames(save_video, frame):
+    save_video.active = False
+    save_video.put_frame(frame)
+    assert save_video.frame_queue.qsize() == 0
+    assert save_video.frames_dropped == 1
+
+
+def test_save_video(save_video, frame, tmp_path):
+    for _ in range(5):
+        save_video.put_frame(frame)
+    save_video.update_record({'camera_id': 'test_camera'})
+    save_video.end_of_file()
+    save_video.run()
+    assert save_video.frames_written == 5
+    assert len(list(tmp_path.glob('test_camera/*/*.mp4'))) == 1
+    save_video.loop.call_soon_threadsafe.assert_called_once()
+
+
+@pytest.fixture
+def detections():
+    return (numpy.array([[0.1, 0.1, 0.5, 0.5], [0.2, 0.2, 0.3, 0.3]]),
+            numpy.array([0., 3.]),
+            numpy.array([0.9, 0.6]),
+            numpy.array([1, 2]))
+
+
+def test_save_detections_next_to_video(save_video, frame, detections,
+                                       tmp_path):
+    save_video.detections.class_names = {0: 'car_det', 3: 'human_det'}
+    save_video.put_frame(frame, detections)
+    save_video.put_frame(frame)
+    save_video.put_frame(frame, detections)
+    save_video.end_of_file()
+    save_video.run()
+    video = next(tmp_path.glob('test_camera/*/*.mp4'))
+    sidecar = numpy.load(video.with_suffix('.npz'))
+    assert sidecar['frame'].tolist() == [0, 0, 2, 2]
+    assert sidecar['boxes'].shape == (4, 4)
+    assert sidecar['cls'].tolist() == [0, 3, 0, 3]
+    assert sidecar['track_id'].tolist() == [1, 2, 1, 2]
+    assert sidecar['names'].tolist() == ['car_det', '1', '2', 'human_det']
+    assert sidecar['names'][sidecar['cls']].tolist() == [
+        'car_det', 'human_det', 'car_det', 'human_det']
+
+
+def test_no_detections_saved_for_rejected_job(save_video, frame, detections):
+    save_video.active = False
+    save_video.put_frame(frame, detections)
+    assert len(save_video.detections) == 0
+
+
+def test_clip_detections_without_tracks(tmp_path):
+    detections = ClipDetections()
+    detections.add(0, numpy.empty((0, 4)), [], [])
+    detections.add(1, [[0, 0, 1, 1]], [0], [0.5])
+    detections.save(tmp_path / 'clip.npz')
+    sidecar = numpy.load(tmp_path / 'clip.npz')
+    assert sidecar['frame'].tolist() == [1]
+    assert sidecar['track_id'].tolist() == [-1]
+    assert sidecar['names'].tolist() == ['0']
+
+
+@pytest.fixture
+def record_source(tmp_path, frame):
+    source = tmp_path / 'main_stream.mp4'
+    with ClipWriter(source, (320, 240), 10) as writer:
+        for _ in range(5):
+            writer.write(numpy.zeros((240, 320, 3), dtype=numpy.uint8))
+    return str(source)
+
+
+def test_record_from_record_source(save_video, frame, record_source):
+    save_video.record_source = record_source
+    save_video.use_record_source = True
+    save_video.put_frame(frame)
+    assert save_video.frame_queue.qsize() == 1
+    save_video.update_record({'camera_id': 'test_camera'})
+    save_video.run()
+    assert save_video.resolution == (320, 240)
+    assert save_video.frame_queue.qsize() == 0
+    assert save_video.frames_written > 1
+    save_video.put_frame(frame)
+    assert save_video.frame_queue.qsize() == 0
+
+
+def test_decode_only_written_record_frames(save_video, frame, mocker):
+    cap = mocker.Mock()
+    cap.grab.side_effect = [True, True, True, True, False]
+    cap.retrieve.return_value = (True, frame)
+    save_video._last_update = 0
+    mocker.patch('recording.time.monotonic',
+                 side_effect=[0,
+                              0, 0,
+                              0, 0,
+                              0, 1 / recording.FPS,
+                              0, 1 / recording.FPS,
+                              0])
+    writer = mocker.Mock()
+    save_video.record_frames(writer, cap, 3)
+    assert cap.retrieve.call_count == 2
+    assert [call.args[1] for call in writer.write.call_args_list] == [3, 4]
+    assert save_video.frames_dropped == 2
+
+
+def test_record_stops_without_detection_frames(save_video, mocker):
+    cap = mocker.Mock()
+    save_video._last_update -= recording.SAVE_FRAME_TIMEOUT + 1
+    save_video.record_frames(mocker.Mock(), cap, 0)
+    cap.grab.assert_not_called()
+
+
+def test_record_stops_at_clip_length_limit(save_video, mocker):
+    mocker.patch('recording.RECORDING_MAX_CLIP_SECONDS', 10)
+    mocker.patch('recording.time.monotonic', side_effect=[0, 11])
+    save_video._last_update = 11
+    cap = mocker.Mock()
+    save_video.record_frames(mocker.Mock(), cap, 0)
+    cap.grab.assert_not_called()
+
+
+def test_fallback_when_record_source_fails(save_video, frame):
+    save_video.record_source = 'wrong_source.mp4'
+    save_video.use_record_source = True
+    assert save_video.open_record_source() is None
+    save_video.put_frame(frame)
+    assert save_video.frame_queue.qsize() == 1
+
+
+# -----------------------------------------------
+# ------------ Test Recording Pool --------------
+# -----------------------------------------------
+
+@pytest.fixture
+def recording_pool(mocker):
+    mocker.patch('recording.RECORDING_QUEUE_SIZE', 1)
+    mocker.patch.object(RecordingPool, 'start')
+    recording.Singleton._instances.pop(RecordingPool, None)
+    yield RecordingPool()
+    recording.Singleton._instances.pop(RecordingPool, None)
+
+
+def test_reject_job_when_queue_full(recording_pool, mocker):
+    assert recording_pool.submit(mocker.Mock()) is True
+    assert recording_pool.submit(mocker.Mock()) is False
+    assert recording_pool.stats()['submitted'] == 1
+    assert recording_pool.stats()['rejected'] == 1
+
+
+# -----------------------------------------------
+# ------------ Test Clip Stats ------------------
+# -----------------------------------------------
+
+@pytest.fixture
+def clip_detections():
+    detections = ClipDetections({0: 'car_det', 1: 'cat_det', 3: 'human_det'})
+    box = [0, 0, 1, 1]
+    detections.add(5, [box, box, box], [3, 3, 0], [0.5, 0.7, 0.9], [1, 2, 3])
+    detections.add(6, [box], [3], [0.8], [1])
+    detections.add(8, [box, box], [3, 3], [0.6, 0.4], [1, 4])
+    return detections
+
+
+def test_clip_stats(clip_detections):
+    assert clip_detections.stats() == {
+        'car_det': {'frames': 1, 'max_conf': 0.9, 'peak': 1, 'objects': 1},
+        'human_det': {'frames': 3, 'max_conf': 0.8, 'peak': 2, 'objects': 3}
+    }
+
+
+def test_untracked_clip_stats():
+    detections = ClipDetections()
+    detections.add(0, [[0, 0, 1, 1]], [2], [0.5])
+    assert detections.stats() == {
+        '2': {'frames': 1, 'max_conf': 0.5, 'peak': 1, 'objects': 0}
+    }
+    assert ClipDetections().stats() == {}
+
+
+def test_stats_in_record(save_video, clip_detections):
+    save_video.detections = clip_detections
+    save_video.update_record({'car_det': False,
+                              'cat_det': False,
+                              'human_det': False,
+                              'camera_id': 'test_camera'})
+    save_video.update_record_stats()
+    assert save_video.record['car_det'] is True
+    assert save_video.record['cat_det'] is False
+    assert save_video.record['human_det'] is True
+    assert save_video.record['detection_stats'] == clip_detections.stats()
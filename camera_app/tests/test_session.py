@@ -0,0 +1,155 @@
+import pytest
+import asyncio
+import sys
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from session import Session
+
+pytest_plugins = ('pytest_asyncio', )
+
+
+async def echo(channel, request):
+    channel.write(request)
+    await channel.drain()
+    while data := await channel.read(1024):
+        channel.write(data)
+        await channel.drain()
+    channel.close()
+    await channel.wait_closed()
+
+
+async def open_sessions(on_open, window=1 << 20):
+    server_sessions = []
+
+    async def accept(reader, writer):
+        session = Session(reader,
+                          writer,
+                          initiator=False,
+                          on_open=on_open,
+                          window=window)
+        server_sessions.append(session)
+        await session.run()
+
+    server = await asyncio.start_server(accept, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    client = Session(reader, writer, window=window)
+    task = asyncio.get_running_loop().create_task(client.run())
+    while not server_sessions:
+        await asyncio.sleep(0)
+    return server, client, server_sessions[0], task
+
+
+async def read_exactly(channel, size):
+    data = b''
+    while len(data) < size:
+        chunk = await asyncio.wait_for(channel.read(size - len(data)), 1)
+        assert chunk
+        data += chunk
+    return data
+
+
+# -----------------------------------------------
+# ------------ Test Session ---------------------
+# -----------------------------------------------
+
+@pytest.mark.asyncio
+async def test_channel_request_and_data():
+    server, client, _, task = await open_sessions(echo)
+    channel = client.open_channel(b'request\n')
+    channel.write(b'data')
+    await channel.drain()
+    assert await read_exactly(channel, 12) == b'request\ndata'
+    channel.close()
+    await channel.wait_closed()
+    assert channel.channel_id not in client.channels
+    client.abort()
+    await task
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_channels_are_not_mixed():
+    server, client, _, task = await open_sessions(echo)
+    first = client.open_channel(b'1')
+    second = client.open_channel(b'2')
+    assert first.channel_id != second.channel_id
+    first.write(b'a' * 200000)
+    second.write(b'b' * 100)
+    await asyncio.gather(first.drain(), second.drain())
+    assert await read_exactly(second, 101) == b'2' + b'b' * 100
+    assert await read_exactly(first, 200001) == b'1' + b'a' * 200000
+    client.abort()
+    await task
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_channel_flow_control():
+    received = asyncio.Queue()
+
+    async def on_open(channel, request):
+        await received.put(channel)
+
+    server, client, _, task = await open_sessions(on_open, window=1024)
+    channel = client.open_channel(b'request')
+    channel.write(b'x' * 4096)
+    drain = asyncio.ensure_future(channel.drain())
+    await asyncio.sleep(0.2)
+    assert not drain.done()
+    assert channel.send_window == 0
+
+    server_channel = await received.get()
+    assert len(server_channel._buffer) == 1024
+    assert await read_exactly(server_channel, 4096) == b'x' * 4096
+    await asyncio.wait_for(drain, 1)
+    client.abort()
+    await task
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_peer_closed_channel():
+    async def on_open(channel, request):
+        channel.close()
+        await channel.wait_closed()
+
+    server, client, _, task = await open_sessions(on_open)
+    channel = client.open_channel(b'request')
+    assert await asyncio.wait_for(channel.read(), 1) == b''
+    channel.write(b'data')
+    with pytest.raises(ConnectionResetError):
+        await channel.drain()
+    client.abort()
+    await task
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_lost_connection_closes_channels():
+    server, client, server_session, task = await open_sessions(echo)
+    channel = client.open_channel(b'request')
+    assert await read_exactly(channel, 7) == b'request'
+    server_session.abort()
+    assert await asyncio.wait_for(channel.read(), 1) == b''
+    await asyncio.wait_for(task, 1)
+    assert client.closed
+    server.close()
+
+
+# -----------------------------------------------
+# ------------ Test Shared Modules --------------
+# -----------------------------------------------
+
+server_dir = base_dir.parent / 'server' / 'camera_conn'
+
+
+@pytest.mark.skipif(not server_dir.is_dir(), reason='No server sources')
+@pytest.mark.parametrize('module', ['session.py',
+                                    'codec.py',
+                                    'request_builder.py'])
+def test_server_copy_identical(module):
+    assert (base_dir / module).read_bytes() == \
+        (server_dir / module).read_bytes(), \
+        f'{module} differs from server copy, update both'
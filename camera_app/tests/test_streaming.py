@@ -54,6 +54,7 @@ def videostream_channel(mocker):
     test_frame = 'test_frame'
     worker = make_worker
     worker.videostream_frame = mocker.AsyncMock()
+    worker.stream_active = mocker.Mock()
     worker.videostream_frame.get.side_effect = ErrorAfter(
         limit=1,
         return_value=test_frame.encode())
@@ -127,3 +128,12 @@ async def test_stream_video(videostream_channel, mocker):
         await videostream_channel.stream_video()
     expected_msg = 'test_frame'.encode()
     writer.write.assert_called_with(expected_msg)
+    videostream_channel.camera_worker.stream_active.set.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_stream_not_active_without_connection(videostream_channel):
+    videostream_channel.connect_to_server.return_value = (None, None)
+    await videostream_channel.stream_video()
+    videostream_channel.camera_worker.stream_active.set.assert_not_called()
+    videostream_channel.camera_worker.stream_active.clear.assert_called()
@@ -0,0 +1,104 @@
+import pytest
+import sys
+import numpy
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from tracker import (
+    Tracker,
+    box_iou,
+    greedy_match
+)
+
+
+# -----------------------------------------------
+# ------------ Test Matching --------------------
+# -----------------------------------------------
+
+def test_box_iou():
+    boxes_a = numpy.array([[0, 0, 10, 10], [20, 20, 30, 30]], numpy.float32)
+    boxes_b = numpy.array([[0, 0, 10, 10], [5, 0, 15, 10]], numpy.float32)
+    iou = box_iou(boxes_a, boxes_b)
+    assert iou.shape == (2, 2)
+    assert iou[0].tolist() == pytest.approx([1, 1 / 3])
+    assert iou[1].tolist() == [0, 0]
+
+
+def test_greedy_match_takes_best_pairs():
+    iou = numpy.array([[0.5, 0.9],
+                       [0.4, 0.8]])
+    assert greedy_match(iou, 0.3) == [(0, 1), (1, 0)]
+    assert greedy_match(iou, 0.6) == [(0, 1)]
+    assert greedy_match(numpy.empty((0, 2)), 0.3) == []
+
+
+# -----------------------------------------------
+# ------------ Test Tracker ---------------------
+# -----------------------------------------------
+
+@pytest.fixture
+def tracker():
+    return Tracker(confidence=0.5, iou_threshold=0.3, max_age=5, min_hits=2)
+
+
+def box(x, y=0):
+    return [x, y, x + 20, y + 20]
+
+
+def test_keep_track_id(tracker):
+    tracks = tracker.update([box(0)], [0], [0.9])
+    assert [track.track_id for track in tracks] == [1]
+    tracks = tracker.update([box(2)], [0], [0.9])
+    assert [track.track_id for track in tracks] == [1]
+    assert tracks[0].hits == 2
+
+
+def test_propagate_track_between_inference(tracker):
+    for step in range(4):
+        tracker.update([box(step * 4)], [0], [0.9])
+    x = tracker.tracks[0].box[0]
+    tracks = tracker.predict(frames=2)
+    assert len(tracks) == 1
+    assert tracks[0].box[0] > x
+    tracks = tracker.update([box(20)], [0], [0.9], frames=2)
+    assert [track.track_id for track in tracks] == [1]
+
+
+def test_remove_old_tracks(tracker):
+    tracker.update([box(0)], [0], [0.9])
+    tracker.update([box(0)], [0], [0.9])
+    assert tracker.predict(frames=5)
+    assert tracker.predict(frames=1) == []
+
+
+def test_drop_unconfirmed_track(tracker):
+    tracker.update([box(0)], [0], [0.9])
+    assert tracker.update([], [], []) == []
+    assert tracker.tracks == []
+
+
+def test_weak_detection_continues_track_only(tracker):
+    assert tracker.update([box(0)], [0], [0.3]) == []
+    tracker.update([box(0)], [0], [0.9])
+    tracks = tracker.update([box(1)], [0], [0.3])
+    assert [track.track_id for track in tracks] == [1]
+
+
+def test_classes_not_mixed(tracker):
+    tracker.update([box(0)], [0], [0.9])
+    tracks = tracker.update([box(0)], [1], [0.9])
+    assert [(track.track_id, track.cls) for track in tracks] == [(2, 1)]
+
+
+def test_unique_object_counts(tracker):
+    tracker.update([box(0), box(100)], [0, 3], [0.9, 0.9])
+    tracker.update([box(0), box(100)], [0, 3], [0.9, 0.9])
+    tracker.update([box(0), box(100), box(0, 100)],
+                   [0, 3, 0],
+                   [0.9, 0.9, 0.9])
+    tracker.update([box(0), box(100), box(0, 100)],
+                   [0, 3, 0],
+                   [0.9, 0.9, 0.9])
+    assert tracker.counts() == {0: 2, 3: 1}
+    tracker.reset_counts()
+    assert tracker.counts() == {}
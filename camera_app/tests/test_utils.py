@@ -0,0 +1,45 @@
+import sys
+import logging
+from pathlib import Path
+base_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(1, str(base_dir))
+from utils import (
+    Signal,
+    log_duration
+)
+
+
+# -----------------------------------------------
+# ------------ Test Signal ----------------------
+# -----------------------------------------------
+
+def test_signal_calls_connected_slots(mocker):
+    signal = Signal()
+    slot_1 = mocker.Mock()
+    slot_2 = mocker.Mock()
+    signal.connect(slot_1)
+    signal.connect(slot_2)
+    signal.emit('frame', 'test_camera')
+    slot_1.assert_called_once_with('frame', 'test_camera')
+    slot_2.assert_called_once_with('frame', 'test_camera')
+
+
+def test_signal_disconnect(mocker):
+    signal = Signal()
+    slot = mocker.Mock()
+    signal.connect(slot)
+    signal.disconnect(slot)
+    signal.emit()
+    slot.assert_not_called()
+
+
+# -----------------------------------------------
+# ------------ Test Log Duration ----------------
+# -----------------------------------------------
+
+def test_log_duration(caplog):
+    log = logging.getLogger('test')
+    with caplog.at_level(logging.INFO, logger='test'):
+        with log_duration(log, 'model loaded'):
+            pass
+    assert 'Startup: model loaded in 0.00s' in caplog.text
@@ -0,0 +1,140 @@
+import numpy
+
+
+def box_iou(boxes_a, boxes_b):
+    '''
+    Pairwise IoU of two sets of xyxy boxes
+    '''
+    top_left = numpy.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = numpy.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = numpy.prod(numpy.clip(bottom_right - top_left, 0, None),
+                              axis=2)
+    area_a = numpy.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = numpy.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / numpy.maximum(union, 1e-9)
+
+
+def greedy_match(iou, threshold):
+    '''
+    Pairs rows and columns with the highest IoU first
+    '''
+    matches = []
+    if not iou.size:
+        return matches
+    iou = iou.copy()
+    while True:
+        row, column = numpy.unravel_index(numpy.argmax(iou), iou.shape)
+        if iou[row, column] < threshold:
+            break
+        matches.append((row, column))
+        iou[row, :] = -1
+        iou[:, column] = -1
+    return matches
+
+
+class Track:
+    '''
+    Box with constant velocity model, corrected by alpha-beta filter
+    on every matched detection
+    '''
+    def __init__(self, track_id, box, cls, conf):
+        self.track_id = track_id
+        self.box = numpy.asarray(box, numpy.float32)
+        self.velocity = numpy.zeros(4, numpy.float32)
+        self.cls = int(cls)
+        self.conf = float(conf)
+        self.hits = 1
+        self.age = 0
+
+    def predict(self, frames):
+        self.box = self.box + self.velocity * frames
+        self.age += frames
+
+    def update(self, box, conf, alpha=0.6, beta=0.2):
+        residual = numpy.asarray(box, numpy.float32) - self.box
+        self.box = self.box + alpha * residual
+        self.velocity = self.velocity + beta * residual / max(self.age, 1)
+        self.conf = float(conf)
+        self.hits += 1
+        self.age = 0
+
+
+class Tracker:
+    '''
+    ByteTrack style tracker: confident detections are matched to
+    predicted tracks first, weak ones only continue remaining tracks.
+    Only confident unmatched detections start new tracks
+    '''
+    def __init__(self, confidence=0.25, iou_threshold=0.3,
+                 max_age=30, min_hits=2):
+        self.confidence = confidence
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.tracks = []
+        self._next_id = 1
+        self._counted = {}
+
+    def predict(self, frames=1):
+        for track in self.tracks:
+            track.predict(frames)
+        self.tracks = [track for track in self.tracks
+                       if track.age <= self.max_age]
+        return self.active_tracks()
+
+    def update(self, boxes, cls, conf, frames=1):
+        self.predict(frames)
+        boxes = numpy.asarray(boxes, numpy.float32).reshape(-1, 4)
+        cls = numpy.asarray(cls).astype(int)
+        conf = numpy.asarray(conf, numpy.float32)
+        confident = numpy.flatnonzero(conf >= self.confidence)
+        weak = numpy.flatnonzero(conf < self.confidence)
+
+        remaining = list(range(len(self.tracks)))
+        remaining, new_detections = self.associate(
+            remaining, confident, boxes, cls, conf)
+        remaining, _ = self.associate(remaining, weak, boxes, cls, conf)
+        lost = {index for index in remaining
+                if self.tracks[index].hits < self.min_hits}
+        self.tracks = [track for index, track in enumerate(self.tracks)
+                       if index not in lost]
+        for index in new_detections:
+            self.tracks.append(Track(self._next_id,
+                                     boxes[index],
+                                     cls[index],
+                                     conf[index]))
+            self._next_id += 1
+        return self.active_tracks()
+
+    def associate(self, track_indices, detections, boxes, cls, conf):
+        if not len(track_indices) or not len(detections):
+            return track_indices, list(detections)
+        track_boxes = numpy.stack([self.tracks[i].box for i in track_indices])
+        track_cls = numpy.array([self.tracks[i].cls for i in track_indices])
+        iou = box_iou(track_boxes, boxes[detections])
+        iou[track_cls[:, None] != cls[detections][None, :]] = 0
+        matches = greedy_match(iou, self.iou_threshold)
+        for row, column in matches:
+            self.tracks[track_indices[row]].update(
+                boxes[detections[column]], conf[detections[column]])
+        matched_rows = {row for row, _ in matches}
+        matched_columns = {column for _, column in matches}
+        return ([index for row, index in enumerate(track_indices)
+                 if row not in matched_rows],
+                [index for column, index in enumerate(detections)
+                 if column not in matched_columns])
+
+    def active_tracks(self):
+        tracks = [track for track in self.tracks
+                  if track.hits >= self.min_hits or track.age == 0]
+        for track in tracks:
+            if track.hits >= self.min_hits:
+                self._counted.setdefault(track.cls, set()).add(track.track_id)
+        return tracks
+
+    def counts(self):
+        return {cls: len(ids) for cls, ids in self._counted.items()}
+
+    def reset_counts(self):
+        self._counted = {}
@@ -1,10 +1,20 @@
 import asyncio
+import contextlib
+import logging
+import threading
+import time
 from request_builder import RequestBuilder
+from session import (
+    PREFACE,
+    Channel,
+    Session
+)
 from settings import (
     SOCKET_BUFF_SIZE,
     SERVER_HOST,
     SERVER_PORT,
     GET_SERVER_EVENTS_TIMEOUT,
+    MULTIPLEXED_SESSION,
 )
 
 
@@ -19,6 +29,37 @@ class Singleton(type):
         return cls._instances[cls]
 
 
+class Signal:
+    '''
+    Plain replacement of Qt signal, slots are called
+    directly in the thread that emits the signal
+    '''
+    def __init__(self):
+        self._slots = []
+        self._lock = threading.Lock()
+
+    def connect(self, slot):
+        with self._lock:
+            self._slots.append(slot)
+
+    def disconnect(self, slot):
+        with self._lock:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            slot(*args)
+
+
+@contextlib.contextmanager
+def log_duration(log, stage):
+    start = time.monotonic()
+    yield
+    log.info('Startup: %s in %.2fs', stage, time.monotonic() - start)
+
+
 class ConnectionMixin:
 
     buff_size = SOCKET_BUFF_SIZE
@@ -28,6 +69,9 @@ class ConnectionMixin:
     background_tasks = set()
 
     async def connect_to_server(self, request):
+        if MULTIPLEXED_SESSION:
+            channel = await SessionClient().open_channel(request)
+            return channel, channel
         try:
             reader, writer = await asyncio.open_connection(
                 self.host, self.port)
@@ -40,11 +84,25 @@ class ConnectionMixin:
         except (ConnectionResetError, BrokenPipeError):
             return None, None
 
-        reply = await reader.read(self.buff_size)
-        if reply.decode() == 'accepted':
+        # Exact size, so data sent by handler right after
+        # the reply is not read with it
+        try:
+            reply = await reader.readexactly(len(b'accepted'))
+        except asyncio.IncompleteReadError:
+            return None, None
+        if reply == b'accepted':
             return reader, writer
         return None, None
 
+    def abort_connection(self, writer):
+        '''
+        Drops connection that stopped responding. For a channel the
+        whole session is dropped, next request opens a new one
+        '''
+        if isinstance(writer, Channel):
+            writer.session.abort()
+        writer.close()
+
     async def send_records(self, request, records):
         reader, writer = await self.connect_to_server(request)
         if writer:
@@ -65,6 +123,44 @@ class ConnectionMixin:
         return False
 
 
+class SessionClient(metaclass=Singleton):
+    '''
+    Keeps one session to the server, every request of the app
+    is sent as a channel of it. After connection is lost
+    session is opened again on the next request
+    '''
+    host = SERVER_HOST
+    port = SERVER_PORT
+    log = logging.getLogger('Session client')
+
+    def __init__(self):
+        self.session = None
+        self._lock = asyncio.Lock()
+
+    async def get_session(self):
+        async with self._lock:
+            if self.session is None or self.session.closed:
+                reader, writer = await asyncio.open_connection(self.host,
+                                                               self.port)
+                writer.write(PREFACE)
+                self.session = Session(reader, writer)
+                task = asyncio.get_running_loop().create_task(
+                    self.session.run())
+                tasks = ConnectionMixin.background_tasks
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                self.log.info('Session opened')
+        return self.session
+
+    async def open_channel(self, request):
+        try:
+            session = await self.get_session()
+        except OSError as error:
+            self.log.debug('Failed to open session: %s', error)
+            return None
+        return session.open_channel(request.pack())
+
+
 class ErrorAfter(object):
     '''
     Callable that will raise `CallableExhausted`
@@ -1,6 +1,15 @@
 import asyncio
+import json
 import logging
+from codec import (
+    is_message,
+    read_message
+)
 from request_builder import RequestBuilder
+from session import (
+    PREFACE,
+    Session
+)
 from settings import SOCKET_BUFF_SIZE
 
 
@@ -25,10 +34,24 @@ class AsyncServer:
             await self.server.serve_forever()
 
     async def router(self, reader, writer):
-        data = await reader.read(SOCKET_BUFF_SIZE)
-        builder = RequestBuilder().with_args(writer=writer,
-                                             reader=reader) \
-                                  .with_bytes(data)
+        try:
+            data = await reader.readexactly(len(PREFACE))
+        except asyncio.IncompleteReadError as error:
+            data = error.partial
+        if data == PREFACE:
+            await self.run_session(reader, writer)
+            return
+        try:
+            data = await self.read_request(reader, data)
+            builder = RequestBuilder().with_args(writer=writer,
+                                                 reader=reader) \
+                                      .with_bytes(data)
+        except (asyncio.IncompleteReadError, ValueError) as error:
+            self.log.warning('Failed to read request: %s', error)
+            writer.close()
+            await writer.wait_closed()
+            return
+
         request = builder.build()
         self.log.debug('Request received. Sending reply')
         reply = 'accepted'
@@ -40,12 +63,59 @@ class AsyncServer:
             request.writer.close()
             await request.writer.wait_closed()
         else:
-            self.log.debug('Start handler %s', request.request_type)
-            for handler in self.handlers:
-                result = await handler.handle(request)
-                if result:
-                    break
-            else:
-                self.log.warning('Wrong request type. Closing connection')
-                request.writer.close()
-                await request.writer.wait_closed()
+            await self.dispatch(request)
+
+    async def read_request(self, reader, data):
+        '''
+        Reads request until it is complete: codec messages by their
+        length, plain JSON requests (Django, older camera apps)
+        until they can be decoded
+        '''
+        if is_message(data):
+            return await read_message(reader, data)
+        decoder = json.JSONDecoder()
+        while True:
+            try:
+                decoder.raw_decode(data.decode().lstrip())
+                return data
+            except ValueError:
+                if len(data) > SOCKET_BUFF_SIZE:
+                    raise
+            chunk = await reader.read(SOCKET_BUFF_SIZE)
+            if not chunk:
+                raise ValueError(f'Incomplete request: {data[:100]}')
+            data += chunk
+
+    async def run_session(self, reader, writer):
+        self.log.info('Session started %s', writer.get_extra_info('peername'))
+        session = Session(reader,
+                          writer,
+                          initiator=False,
+                          on_open=self.open_channel)
+        await session.run()
+        self.log.info('Session ended %s', writer.get_extra_info('peername'))
+
+    async def open_channel(self, channel, data):
+        # Channel request has no 'accepted' reply, client starts
+        # sending data right after the request
+        try:
+            builder = RequestBuilder().with_args(writer=channel,
+                                                 reader=channel) \
+                                      .with_bytes(data)
+        except ValueError as error:
+            self.log.warning('Failed to read request: %s', error)
+            channel.close()
+            await channel.wait_closed()
+            return
+        await self.dispatch(builder.build())
+
+    async def dispatch(self, request):
+        self.log.debug('Start handler %s', request.request_type)
+        for handler in self.handlers:
+            result = await handler.handle(request)
+            if result:
+                break
+        else:
+            self.log.warning('Wrong request type. Closing connection')
+            request.writer.close()
+            await request.writer.wait_closed()
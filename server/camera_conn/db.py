@@ -2,6 +2,7 @@ import asyncio
 import psycopg
 import logging
 from psycopg import sql
+from psycopg.types.json import Jsonb
 from request_builder import RequestBuilder
 from settings import (DB_HOST,
                       DB_NAME,
@@ -68,7 +69,8 @@ class NewVideoRecord(BaseRecordHandler):
 
     async def save_record(self, record):
         columns = record.keys()
-        values = sql.SQL(',').join([record[column] for column in columns])
+        values = sql.SQL(',').join([self.adapt(record[column])
+                                    for column in columns])
         fields = sql.SQL(',').join([sql.Identifier(column)
                                     for column in columns])
         ret = sql.SQL('INSERT INTO main_archivevideo({fields}) \
@@ -76,6 +78,12 @@ class NewVideoRecord(BaseRecordHandler):
                                                    values=values,)
         await self.cur.execute(ret)
 
+    @staticmethod
+    def adapt(value):
+        if isinstance(value, (dict, list)):
+            return sql.Literal(Jsonb(value))
+        return value
+
 
 class CameraRecord(BaseRecordHandler):
 
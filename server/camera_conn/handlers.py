@@ -1,10 +1,14 @@
 import asyncio
 import aiofiles
+import codec
 import logging
 import json
 import os
+import time
 from settings import (SOCKET_BUFF_SIZE,
-                      GLOBAL_TEST)
+                      GLOBAL_TEST,
+                      PART_FILE_TIMEOUT,
+                      MODEL_UPDATE_TIMEOUT)
 from db import (NewVideoRecord,
                 CameraRecord,
                 UserRecord)
@@ -138,11 +142,70 @@ class VideoResponseHandler(BaseHandler):
     video_save_path = '/home/app/web/mediafiles/'
 
     @classmethod
-    async def save_file(self, name, data):
-        if GLOBAL_TEST:
+    def resume_offset(self, request, part_name):
+        if GLOBAL_TEST or not getattr(request, 'resumable', False):
+            return 0
+        try:
+            offset = os.path.getsize(part_name)
+        except OSError:
+            return 0
+        return offset if offset <= request.video_size else 0
+
+    @classmethod
+    async def receive_file(self, request, part_name, offset):
+        '''
+        Writes received chunks straight to the part file,
+        returns number of bytes in it
+        '''
+        received = offset
+        video = None
+        if not GLOBAL_TEST:
+            video = await aiofiles.open(part_name,
+                                        mode='ab' if offset else 'wb')
+        try:
+            while received < request.video_size:
+                data = await request.reader.read(
+                    min(SOCKET_BUFF_SIZE, request.video_size - received))
+                if data == b"":
+                    break
+                if video:
+                    await video.write(data)
+                received += len(data)
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            if video:
+                await video.close()
+        return received
+
+    @classmethod
+    def remove_stale_parts(self):
+        '''
+        Part files of uploads that were not resumed
+        for PART_FILE_TIMEOUT seconds are deleted
+        '''
+        deadline = time.time() - PART_FILE_TIMEOUT
+        try:
+            entries = list(os.scandir(self.video_save_path))
+        except OSError:
             return
-        async with aiofiles.open(name, mode="wb") as video:
-            await video.write(data)
+        for entry in entries:
+            try:
+                if entry.name.endswith('.mp4.part') and \
+                   entry.stat().st_mtime < deadline:
+                    os.remove(entry.path)
+                    self.log.info('Stale part file removed %s', entry.name)
+            except OSError:
+                pass
+
+    @classmethod
+    async def send_response(self, request, result):
+        builder = RequestBuilder().with_args(
+            request_type='video_reponse',
+            request_result=result,
+            video_name=request.video_name)
+        response = builder.build()
+        await self.manager.responses.put(response)
 
     @classmethod
     async def handle(self, request):
@@ -150,54 +213,50 @@ class VideoResponseHandler(BaseHandler):
             return
 
         self.log.info('Courutine started')
-        video_data = b""
-        data = b""
-
         if request.video_size == 0:
-            builder = RequestBuilder().with_args(
-                request_type='video_reponse',
-                request_result='failure',
-                video_name=request.video_name)
-            response = builder.build()
-            await self.manager.responses.put(response)
+            await self.send_response(request, 'failure')
             self.log.error('No such video')
             return True
 
+        self.log.info('%s', self.video_save_path)
+        video_name_save = os.path.join(str(self.video_save_path)
+                                       + request.video_name.split('|')[0]
+                                       + '.mp4')
+        part_name = video_name_save + '.part'
+        offset = self.resume_offset(request, part_name)
         try:
-            while len(video_data) < request.video_size:
-                data = await request.reader.read(SOCKET_BUFF_SIZE)
-                video_data += data
-                if data == b"":
-                    break
-        except asyncio.CancelledError:
-            pass
+            if getattr(request, 'resumable', False):
+                request.writer.write(codec.encode({'offset': offset}))
+                await request.writer.drain()
+            received = await self.receive_file(request, part_name, offset)
+            if getattr(request, 'resumable', False):
+                request.writer.write(codec.encode({'offset': received}))
+                await request.writer.drain()
+        except ConnectionError:
+            received = offset
         finally:
             request.writer.close()
             await request.writer.wait_closed()
 
-        if len(video_data) != request.video_size:
-            builder = RequestBuilder().with_args(
-                request_type='video_reponse',
-                request_result='failure',
-                video_name=request.video_name)
-            response = builder.build()
-            await self.manager.responses.put(response)
-            self.log.warning('Failed to receive video file')
+        if not GLOBAL_TEST:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.remove_stale_parts)
+
+        if received != request.video_size:
+            self.log.warning('Failed to receive video file, '
+                             '%s of %s bytes received',
+                             received,
+                             request.video_size)
+            # Client retries resumable upload, request fails
+            # by timeout if it does not
+            if not getattr(request, 'resumable', False):
+                await self.send_response(request, 'failure')
             return True
 
-        self.log.info('%s', self.video_save_path)
-        video_name_save = os.path.join(str(self.video_save_path)
-                                       + request.video_name.split('|')[0]
-                                       + '.mp4')
-
         self.log.info('Saving file %s', video_name_save)
-        await self.save_file(video_name_save, video_data)
-        builder = RequestBuilder().with_args(
-            request_type='video_reponse',
-            request_result='success',
-            video_name=request.video_name)
-        response = builder.build()
-        await self.manager.responses.put(response)
+        if not GLOBAL_TEST:
+            os.replace(part_name, video_name_save)
+        await self.send_response(request, 'success')
         self.log.info('File received')
         return True
 
@@ -216,3 +275,66 @@ class AproveUserRequestHandler(BaseHandler):
         request.writer.close()
         await request.writer.wait_closed()
         return True
+
+
+class ModelUpdateRequestHandler(BaseHandler):
+    '''
+    Requester gets result of the update reported by camera app:
+    success, failure or timeout_error
+    '''
+    log = logging.getLogger('Model Update Request Handler')
+    signal = SignalCollector()
+    waiters = {}
+
+    @classmethod
+    async def handle(self, request):
+        if request.request_type != 'model_update':
+            return
+        self.log.debug('Model update request processing %s', request)
+        await self.signal.signal_queue.put(request)
+        result = await self.wait_result(request.weights)
+        try:
+            request.writer.write(result.encode())
+            await request.writer.drain()
+        except ConnectionError:
+            self.log.error('Failed to send model update result')
+        request.writer.close()
+        await request.writer.wait_closed()
+        return True
+
+    @classmethod
+    async def wait_result(self, weights):
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(weights, []).append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, MODEL_UPDATE_TIMEOUT)
+        except TimeoutError:
+            return 'timeout_error'
+        finally:
+            self.waiters[weights].remove(waiter)
+            if not self.waiters[weights]:
+                del self.waiters[weights]
+
+    @classmethod
+    def set_result(self, weights, result):
+        for waiter in self.waiters.get(weights, []):
+            if not waiter.done():
+                waiter.set_result(result)
+
+
+class ModelUpdateResponseHandler(BaseHandler):
+
+    log = logging.getLogger('Model Update Response Handler')
+
+    @classmethod
+    async def handle(self, request):
+        if request.request_type != 'model_update_response':
+            return
+        self.log.info('Model update %s: %s',
+                      request.request_result,
+                      request.weights)
+        ModelUpdateRequestHandler.set_result(request.weights,
+                                             request.request_result)
+        request.writer.close()
+        await request.writer.wait_closed()
+        return True
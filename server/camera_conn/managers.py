@@ -5,7 +5,8 @@ from request_builder import RequestBuilder
 from settings import (SOCKET_BUFF_SIZE,
                       STREAM_SOURCE_TIMEOUT,
                       VIDEO_REQUEST_TIMEOUT,
-                      GARB_COLLECTOR_TIMEOUT)
+                      GARB_COLLECTOR_TIMEOUT,
+                      HEARTBEAT_INTERVAL)
 
 
 class BaseManager:
@@ -327,7 +328,10 @@ class SignalCollector(BaseManager, metaclass=SingletonMeta):
                 self.log.debug('Client does not exist: %s', client.client_id)
                 continue
             else:
-                self.clients[client.client_id].update_connection(client)
+                current_client = self.clients[client.client_id]
+                if current_client.subscribed and current_client.task:
+                    current_client.task.cancel()
+                current_client.update_connection(client)
                 self.log.debug('Client exists')
             self.clients[client.client_id].task = self.loop.create_task(
                 self.clients[client.client_id].handle_signals())
@@ -356,6 +360,7 @@ class Client:
         self.log = logging.getLogger(self.client_id)
         self.signal_queue = asyncio.Queue()
         self.dead = False
+        self.subscribed = False
         self.task = None
 
     def __eq__(self, other):
@@ -369,8 +374,12 @@ class Client:
     def update_connection(self, client):
         self.writer = client.writer
         self.reader = client.reader
+        self.subscribed = getattr(client, 'subscribe', False)
 
     async def handle_signals(self):
+        if self.subscribed:
+            await self.push_signals()
+            return
         while self.signal_queue.qsize() > 0:
             self.log.info('Gets signal from queue')
             try:
@@ -392,3 +401,48 @@ class Client:
         await self.writer.wait_closed()
         self.log.debug('Session ended')
         self.task = None
+
+    async def push_signals(self):
+        '''
+        Keeps subscription open and sends signals as soon as they are
+        queued, heartbeat is sent after `HEARTBEAT_INTERVAL` seconds
+        without signals. Signal is queued again if it was not sent
+        '''
+        self.log.info('Subscription started')
+        writer = self.writer
+        builder = RequestBuilder().with_args(request_type='heartbeat')
+        heartbeat = builder.build().pack()
+        while True:
+            signal = None
+            try:
+                signal = await asyncio.wait_for(self.signal_queue.get(),
+                                                HEARTBEAT_INTERVAL)
+            except TimeoutError:
+                data = heartbeat
+            except asyncio.CancelledError:
+                break
+            else:
+                self.signal_queue.task_done()
+                data = signal.pack()
+            try:
+                writer.write(data)
+                await writer.drain()
+            except asyncio.CancelledError:
+                self.requeue(signal)
+                break
+            except Exception as error:
+                self.log.error('Connection to client lost, %s', error)
+                self.requeue(signal)
+                break
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+        self.log.debug('Subscription ended')
+        if self.task is asyncio.current_task():
+            self.task = None
+
+    def requeue(self, signal):
+        if signal is not None:
+            self.signal_queue.put_nowait(signal)
@@ -1,4 +1,5 @@
 import json
+import codec
 
 
 class ServerRequest:
@@ -37,6 +38,12 @@ class ServerRequest:
         serialized = json.dumps(fields) + '\n'
         return serialized
 
+    def pack(self):
+        fields = self.__dict__.copy()
+        fields.pop('writer', None)
+        fields.pop('reader', None)
+        return codec.encode(fields)
+
 
 class RequestBuilder:
     args = {}
@@ -55,7 +62,10 @@ class RequestBuilder:
 
     def with_bytes(self, byte_line):
         if byte_line:
-            args = json.loads(byte_line.decode())
+            if codec.is_message(byte_line):
+                args = codec.decode(byte_line)
+            else:
+                args = json.loads(byte_line.decode())
             self.args.update(args)
         return self
 
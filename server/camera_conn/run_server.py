@@ -19,7 +19,9 @@ from handlers import (VideoStreamRequestHandler,
                       NewRecordHandler,
                       VideoRequestHandler,
                       VideoResponseHandler,
-                      AproveUserRequestHandler)
+                      AproveUserRequestHandler,
+                      ModelUpdateRequestHandler,
+                      ModelUpdateResponseHandler)
 
 
 class Server:
@@ -46,11 +48,13 @@ class Server:
         self.external_server = AsyncServer(self.external_sock)
         self.internal_server.add_handler(VideoStreamRequestHandler,
                                          VideoRequestHandler,
-                                         AproveUserRequestHandler)
+                                         AproveUserRequestHandler,
+                                         ModelUpdateRequestHandler)
         self.external_server.add_handler(VideoStreamResponseHandler,
                                          VideoResponseHandler,
                                          SignalHandler,
-                                         NewRecordHandler)
+                                         NewRecordHandler,
+                                         ModelUpdateResponseHandler)
         self.signal_collector = SignalCollector()
         self.stream_manager = VideoStreamManager()
         self.stream_manager.set_signal_handler(self.signal_collector)
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import struct
+
+# Same module is used by camera_app and server/camera_conn
+
+PREFACE = b'CAMSESSION/1\n'
+WINDOW_SIZE = 1 << 20
+MAX_FRAME = 1 << 16
+
+OPEN = 0
+DATA = 1
+WINDOW = 2
+CLOSE = 3
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Channel:
+    '''
+    Logical connection inside a session. Implements the part of
+    StreamReader and StreamWriter interfaces used by handlers, so
+    the same object is passed as reader and writer of a request.
+    Peer may send only `window` bytes that were not read yet
+    '''
+    def __init__(self, session, channel_id, window=WINDOW_SIZE):
+        self.session = session
+        self.channel_id = channel_id
+        self.window = window
+        self.send_window = window
+        self._buffer = bytearray()
+        self._pending = bytearray()
+        self._consumed = 0
+        self._data_ready = asyncio.Event()
+        self._window_open = asyncio.Event()
+        self._eof = False
+        self._reset = False
+        self._closing = None
+
+    def feed_data(self, data):
+        if len(self._buffer) + len(data) > self.window:
+            raise ProtocolError(f'Channel {self.channel_id} window exceeded')
+        self._buffer += data
+        self._data_ready.set()
+
+    def update_window(self, increment):
+        self.send_window += increment
+        self._window_open.set()
+
+    def peer_closed(self):
+        self._eof = True
+        self._reset = True
+        self._data_ready.set()
+        self._window_open.set()
+
+    async def read(self, n=-1):
+        while not self._buffer and not self._eof:
+            self._data_ready.clear()
+            await self._data_ready.wait()
+        if n < 0 or n > len(self._buffer):
+            n = len(self._buffer)
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        self._consumed += n
+        if self._consumed >= self.window // 2 and not self._eof:
+            self.session.send_frame(WINDOW,
+                                    self.channel_id,
+                                    struct.pack('!I', self._consumed))
+            self._consumed = 0
+        return data
+
+    async def readexactly(self, n):
+        data = b''
+        while len(data) < n:
+            chunk = await self.read(n - len(data))
+            if not chunk:
+                raise asyncio.IncompleteReadError(data, n)
+            data += chunk
+        return data
+
+    def at_eof(self):
+        return self._eof and not self._buffer
+
+    def write(self, data):
+        self._pending += data
+
+    async def drain(self):
+        while self._pending:
+            if self._reset:
+                raise ConnectionResetError('Channel closed')
+            if self.send_window <= 0:
+                self._window_open.clear()
+                await self._window_open.wait()
+                continue
+            size = min(len(self._pending),
+                       self.send_window,
+                       self.session.max_frame)
+            chunk = bytes(self._pending[:size])
+            del self._pending[:size]
+            self.send_window -= size
+            self.session.send_frame(DATA, self.channel_id, chunk)
+            await self.session.drain()
+        if self._reset:
+            raise ConnectionResetError('Channel closed')
+
+    def close(self):
+        if self._closing is None:
+            self._closing = asyncio.ensure_future(self._close())
+
+    async def _close(self):
+        try:
+            await self.drain()
+        except ConnectionResetError:
+            pass
+        if not self._reset:
+            self.session.send_frame(CLOSE, self.channel_id)
+        self.peer_closed()
+        self.session.channels.pop(self.channel_id, None)
+
+    async def wait_closed(self):
+        if self._closing:
+            await self._closing
+
+    def is_closing(self):
+        return self._closing is not None or self._reset
+
+    def get_extra_info(self, name, default=None):
+        return self.session.writer.get_extra_info(name, default)
+
+
+class Session:
+    '''
+    One TCP connection carrying many channels. Every frame is
+    channel id, frame type and payload length followed by payload.
+    Data frames are limited to `max_frame` bytes, so one busy channel
+    does not hold the others for long. Initiator uses odd channel ids
+    '''
+    header = struct.Struct('!IBI')
+    log = logging.getLogger('Session')
+
+    def __init__(self, reader, writer, buffered=b'', initiator=True,
+                 on_open=None, window=WINDOW_SIZE, max_frame=MAX_FRAME):
+        self.reader = reader
+        self.writer = writer
+        self.on_open = on_open
+        self.window = window
+        self.max_frame = max_frame
+        self.channels = {}
+        self.closed = False
+        self._buffer = bytearray(buffered)
+        self._next_id = 1 if initiator else 2
+        self._tasks = set()
+
+    def open_channel(self, data):
+        channel = self.add_channel(self._next_id)
+        self._next_id += 2
+        self.send_frame(OPEN, channel.channel_id, data)
+        return channel
+
+    def add_channel(self, channel_id):
+        channel = Channel(self, channel_id, self.window)
+        self.channels[channel_id] = channel
+        return channel
+
+    def send_frame(self, frame_type, channel_id, payload=b''):
+        if self.closed:
+            return
+        self.writer.writelines(
+            [self.header.pack(channel_id, frame_type, len(payload)),
+             payload])
+
+    async def drain(self):
+        if self.closed:
+            raise ConnectionResetError('Session closed')
+        try:
+            await self.writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            self.abort()
+            raise ConnectionResetError('Session closed')
+
+    async def read_exactly(self, size):
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        if len(data) < size:
+            data += await self.reader.readexactly(size - len(data))
+        return data
+
+    async def run(self):
+        try:
+            while True:
+                channel_id, frame_type, length = self.header.unpack(
+                    await self.read_exactly(self.header.size))
+                if length > max(self.max_frame, self.window):
+                    raise ProtocolError(f'Frame too large: {length}')
+                payload = await self.read_exactly(length)
+                self.handle_frame(frame_type, channel_id, payload)
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            self.log.debug('Connection lost: %s', error)
+        except ProtocolError as error:
+            self.log.error('%s', error)
+        finally:
+            self.abort()
+
+    def handle_frame(self, frame_type, channel_id, payload):
+        if frame_type == OPEN:
+            if self.on_open is None or channel_id in self.channels:
+                self.send_frame(CLOSE, channel_id)
+                return
+            channel = self.add_channel(channel_id)
+            task = asyncio.ensure_future(self.on_open(channel, payload))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            return
+        if frame_type == DATA:
+            channel.feed_data(payload)
+        elif frame_type == WINDOW:
+            channel.update_window(struct.unpack('!I', payload)[0])
+        elif frame_type == CLOSE:
+            channel.peer_closed()
+            del self.channels[channel_id]
+        else:
+            raise ProtocolError(f'Unknown frame type: {frame_type}')
+
+    def abort(self):
+        if self.closed:
+            return
+        self.closed = True
+        for channel in self.channels.values():
+            channel.peer_closed()
+        self.channels.clear()
+        self.writer.close()
@@ -12,6 +12,9 @@ GLOBAL_TEST = bool(int(os.environ.get('GLOBAL_TEST', 1)))
 STREAM_SOURCE_TIMEOUT = int(os.environ.get('STREAM_SOURCE_TIMEOUT', '5'))
 VIDEO_REQUEST_TIMEOUT = int(os.environ.get('VIDEO_REQUEST_TIMEOUT', '5'))
 GARB_COLLECTOR_TIMEOUT = int(os.environ.get('GARB_COLLECTOR_TIMEOUT', '10'))
+HEARTBEAT_INTERVAL = int(os.environ.get('HEARTBEAT_INTERVAL', '5'))
+PART_FILE_TIMEOUT = int(os.environ.get('PART_FILE_TIMEOUT', '86400'))
+MODEL_UPDATE_TIMEOUT = int(os.environ.get('MODEL_UPDATE_TIMEOUT', '180'))
 TEST_CAMERA_NUM = 2
 
 # POSTGRES
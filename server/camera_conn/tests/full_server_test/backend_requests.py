@@ -1,7 +1,6 @@
 import asyncio
 import sys
 import logging
-import base64
 import struct
 from pathlib import Path
 base_dir = Path(__file__).resolve().parent.parent.parent
@@ -25,7 +24,7 @@ class BaseBackendRequest:
 
         writer.write(request.serialize().encode())
         await writer.drain()
-        await reader.read(self.buff_size)
+        await reader.readexactly(len(b'accepted'))
         return reader, writer
 
     async def run(self):
@@ -36,6 +35,7 @@ class StreamRequest(BaseBackendRequest):
 
     corrupted_frames = 0
     good_frames = 0
+    max_frame_size = 10485760
 
     def __init__(self):
         builder = RequestBuilder().with_args(request_type='stream_request',
@@ -43,39 +43,33 @@ class StreamRequest(BaseBackendRequest):
         self.request = builder.build()
 
     async def run(self):
-        self.reader, self.writer = await self.get_connection(self.request)
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port)
+        self.writer.write(self.request.serialize().encode())
+        await self.writer.drain()
         path = Path(__file__).resolve().parent
         with open(f"{path}/test.jpg", "rb") as image_file:
-            encoded_image = base64.b64encode(image_file.read())
-        data = b''
+            jpeg = image_file.read()
+        reply = await self.reader.readexactly(len(b'accepted'))
+        if reply != b'accepted':
+            return {'good_frames': 0,
+                    'corrupted_frames': 1}
         for i in range(1000):
-            frame, data = await self.recv_packet(data)
-            if frame == encoded_image:
+            frame = await self.recv_packet()
+            if frame == jpeg:
                 self.good_frames += 1
             else:
                 self.corrupted_frames += 1
         return {'good_frames': self.good_frames,
                 'corrupted_frames': self.corrupted_frames}
 
-    async def recv_packet(self, data):
+    async def recv_packet(self):
         payload_size = struct.calcsize("Q")
-        packet = await self.reader.read(self.buff_size)
-        msg_size = 0
-        if packet:
-            data += packet
-            packed_msg_size = data[:payload_size]
-            data = data[payload_size:]
-            msg_size = struct.unpack("Q", packed_msg_size)[0]
-
-        while len(data) < msg_size:
-            packet = await self.reader.read(self.buff_size)
-            if msg_size > 100000:
-                return packet, b""
-            data += packet
-
-        frame_data = data[:msg_size]
-        data = data[msg_size:]
-        return frame_data, data
+        packed_msg_size = await self.reader.readexactly(payload_size)
+        msg_size = struct.unpack("Q", packed_msg_size)[0]
+        if msg_size > self.max_frame_size:
+            raise ValueError(f'Frame too large: {msg_size}')
+        return await self.reader.readexactly(msg_size)
 
 
 class AproveUserRequest(BaseBackendRequest):
@@ -2,7 +2,6 @@ import asyncio
 import sys
 import json
 import time
-import base64
 import struct
 from pathlib import Path
 base_dir = Path(__file__).resolve().parent.parent.parent
@@ -133,8 +132,8 @@ class StreamConnection(BaseConnection):
         _, writer = await self.get_connection(self.request)
         path = Path(__file__).resolve().parent
         with open(f"{path}/test.jpg", "rb") as image_file:
-            encoded_image = base64.b64encode(image_file.read())
-        message = struct.pack("Q", len(encoded_image)) + encoded_image
+            jpeg = image_file.read()
+        message = struct.pack("Q", len(jpeg)) + jpeg
         while True:
             try:
                 writer.write(message)
@@ -0,0 +1,159 @@
+import pytest
+import asyncio
+import socket
+import json
+import codec
+from cam_server import AsyncServer
+from session import (
+    PREFACE,
+    Session
+)
+
+pytest_plugins = ('pytest_asyncio', )
+
+
+class EchoHandler:
+
+    @classmethod
+    async def handle(self, request):
+        if request.request_type != 'echo':
+            return
+        data = await request.reader.read(4)
+        request.writer.write(data)
+        await request.writer.drain()
+        request.writer.close()
+        await request.writer.wait_closed()
+        return True
+
+
+@pytest.fixture
+def server_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(10)
+    yield sock
+    sock.close()
+
+
+async def start_server(sock):
+    server = AsyncServer(sock)
+    server.add_handler(EchoHandler)
+    asyncio.get_running_loop().create_task(server.run_server())
+    return await asyncio.open_connection(*sock.getsockname())
+
+
+def echo_request():
+    return (json.dumps({'request_type': 'echo'}) + '\n').encode()
+
+
+# -----------------------------------------------
+# ------------ Test Async Server ----------------
+# -----------------------------------------------
+
+@pytest.mark.asyncio
+async def test_legacy_connection(server_socket):
+    reader, writer = await start_server(server_socket)
+    writer.write(echo_request())
+    await writer.drain()
+    assert await reader.read(8) == b'accepted'
+    writer.write(b'data')
+    await writer.drain()
+    assert await asyncio.wait_for(reader.read(), 1) == b'data'
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_legacy_split_request(server_socket):
+    reader, writer = await start_server(server_socket)
+    request = echo_request()
+    writer.write(request[:5])
+    await writer.drain()
+    await asyncio.sleep(0.05)
+    writer.write(request[5:])
+    await writer.drain()
+    assert await asyncio.wait_for(reader.read(8), 1) == b'accepted'
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_codec_request(server_socket):
+    reader, writer = await start_server(server_socket)
+    request = codec.encode({'request_type': 'echo'})
+    writer.write(request[:3])
+    await writer.drain()
+    await asyncio.sleep(0.05)
+    writer.write(request[3:])
+    await writer.drain()
+    assert await asyncio.wait_for(reader.read(8), 1) == b'accepted'
+    writer.write(b'data')
+    await writer.drain()
+    assert await asyncio.wait_for(reader.read(), 1) == b'data'
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_incomplete_request(server_socket):
+    reader, writer = await start_server(server_socket)
+    writer.write(echo_request()[:10])
+    writer.write_eof()
+    assert await asyncio.wait_for(reader.read(), 1) == b''
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_session_channels(server_socket):
+    reader, writer = await start_server(server_socket)
+    writer.write(PREFACE)
+    session = Session(reader, writer)
+    task = asyncio.get_running_loop().create_task(session.run())
+    request = codec.encode({'request_type': 'echo'})
+    channels = [session.open_channel(request) for _ in range(3)]
+    for number, channel in enumerate(channels):
+        channel.write(f'msg{number}'.encode())
+        await channel.drain()
+    for number, channel in enumerate(channels):
+        data = await asyncio.wait_for(channel.read(), 1)
+        assert data == f'msg{number}'.encode()
+        assert await asyncio.wait_for(channel.read(), 1) == b''
+    session.abort()
+    await task
+
+
+@pytest.mark.asyncio
+async def test_session_wrong_request(server_socket):
+    reader, writer = await start_server(server_socket)
+    writer.write(PREFACE)
+    session = Session(reader, writer)
+    task = asyncio.get_running_loop().create_task(session.run())
+    request = (json.dumps({'request_type': 'wrong'}) + '\n').encode()
+    channel = session.open_channel(request)
+    assert await asyncio.wait_for(channel.read(), 1) == b''
+    session.abort()
+    await task
+
+
+def wrong_body_request():
+    body = b'{"request_type": echo}'
+    return codec.header.pack(codec.MAGIC, codec.VERSION,
+                             codec.JSON, len(body)) + body
+
+
+@pytest.mark.asyncio
+async def test_codec_request_wrong_body(server_socket):
+    reader, writer = await start_server(server_socket)
+    writer.write(wrong_body_request())
+    await writer.drain()
+    assert await asyncio.wait_for(reader.read(), 1) == b''
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_session_wrong_body(server_socket):
+    reader, writer = await start_server(server_socket)
+    writer.write(PREFACE)
+    session = Session(reader, writer)
+    task = asyncio.get_running_loop().create_task(session.run())
+    channel = session.open_channel(wrong_body_request())
+    assert await asyncio.wait_for(channel.read(), 1) == b''
+    session.abort()
+    await task
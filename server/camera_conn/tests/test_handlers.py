@@ -1,5 +1,8 @@
 import pytest
 import sys
+import asyncio
+import os
+import time
 from pathlib import Path
 base_dir = Path(__file__).resolve().parent.parent
 sys.path.insert(1, str(base_dir))
@@ -9,9 +12,13 @@ from handlers import (SignalHandler,
                       VideoStreamResponseHandler,
                       VideoRequestHandler,
                       VideoResponseHandler,
-                      AproveUserRequestHandler)
+                      AproveUserRequestHandler,
+                      ModelUpdateRequestHandler,
+                      ModelUpdateResponseHandler)
 from cam_server import RequestBuilder
+import codec
 from db import NewVideoRecord, CameraRecord, UserRecord
+from settings import PART_FILE_TIMEOUT
 
 pytest_plugins = ('pytest_asyncio', )
 
@@ -166,6 +173,22 @@ async def test_queue_record_put(new_camera_record, new_record_handler):
                                                  .decode())
 
 
+@pytest.mark.asyncio
+async def test_save_video_record_with_stats(new_video_record_request,
+                                            mocker):
+    record_handler = NewVideoRecord(new_video_record_request)
+    record_handler.cur = mocker.AsyncMock()
+    await record_handler.save_record({
+        'human_det': True,
+        'camera_id': 'test_camera',
+        'detection_stats': {'human_det': {'frames': 3, 'peak': 2}}
+    })
+    query = record_handler.cur.execute.call_args.args[0].as_string(None)
+    assert '"detection_stats"' in query
+    assert '\'{"human_det": {"frames": 3, "peak": 2}}\'::jsonb' in query
+    assert "true,'test_camera'" in query
+
+
 # -----------------------------------------------
 # ------------ VideoStream request --------------
 # -----------------------------------------------
@@ -361,6 +384,81 @@ async def test_successfully_receive_video(video_response,
     assert result is True
 
 
+@pytest.fixture
+def resumable_response(video_response, tmp_path, mocker):
+    mocker.patch('handlers.GLOBAL_TEST', False)
+    mocker.patch.object(VideoResponseHandler,
+                        'video_save_path',
+                        str(tmp_path) + '/')
+    video_response.resumable = True
+    video_response.video_name = 'test_video|test_camera'
+    video_response.video_size = 1000
+    video_response.writer = mocker.Mock()
+    video_response.writer.drain = mocker.AsyncMock()
+    video_response.writer.wait_closed = mocker.AsyncMock()
+    return video_response
+
+
+@pytest.mark.asyncio
+async def test_receive_video_to_part_file(resumable_response,
+                                          video_response_handler,
+                                          tmp_path,
+                                          mocker):
+    video = bytes(range(250)) * 4
+    resumable_response.reader.read.side_effect = [video[:600],
+                                                  video[600:]]
+    result = await video_response_handler.handle(resumable_response)
+    assert result is True
+    assert resumable_response.writer.write.call_args_list == [
+        mocker.call(codec.encode({'offset': 0})),
+        mocker.call(codec.encode({'offset': 1000}))]
+    assert (tmp_path / 'test_video.mp4').read_bytes() == video
+    assert not (tmp_path / 'test_video.mp4.part').exists()
+
+
+@pytest.mark.asyncio
+async def test_resume_video_upload(resumable_response,
+                                   video_response_handler,
+                                   tmp_path):
+    video = bytes(range(250)) * 4
+    (tmp_path / 'test_video.mp4.part').write_bytes(video[:300])
+    resumable_response.reader.read.side_effect = [video[300:700], b""]
+    await video_response_handler.handle(resumable_response)
+    resumable_response.writer.write.assert_any_call(
+        codec.encode({'offset': 300}))
+    resumable_response.writer.write.assert_called_with(
+        codec.encode({'offset': 700}))
+    assert not (tmp_path / 'test_video.mp4').exists()
+    assert (tmp_path / 'test_video.mp4.part').read_bytes() == video[:700]
+    video_response_handler.manager.responses.put.assert_not_called()
+
+    resumable_response.writer.write.reset_mock()
+    resumable_response.reader.read.side_effect = [video[700:]]
+    await video_response_handler.handle(resumable_response)
+    resumable_response.writer.write.assert_any_call(
+        codec.encode({'offset': 700}))
+    assert (tmp_path / 'test_video.mp4').read_bytes() == video
+    response = video_response_handler.manager.responses.put.call_args.args[0]
+    assert response.request_result == 'success'
+
+
+def test_remove_stale_part_files(resumable_response,
+                                 video_response_handler,
+                                 tmp_path):
+    stale = tmp_path / 'stale.mp4.part'
+    fresh = tmp_path / 'fresh.mp4.part'
+    video = tmp_path / 'video.mp4'
+    for path in (stale, fresh, video):
+        path.write_bytes(b'video')
+    old = time.time() - PART_FILE_TIMEOUT - 60
+    os.utime(stale, (old, old))
+    os.utime(video, (old, old))
+    video_response_handler.remove_stale_parts()
+    assert not stale.exists()
+    assert fresh.exists()
+    assert video.exists()
+
+
 # -----------------------------------------------
 # ------------ Aprove User Request --------------
 # -----------------------------------------------
@@ -400,3 +498,72 @@ async def test_aprove_user_request_handler_request(
         .put \
         .assert_called_with(aprove_request)
     assert result is True
+
+
+# -----------------------------------------------
+# ------------ Model Update Request -------------
+# -----------------------------------------------
+
+@pytest.fixture
+def model_update_request(mocker):
+    writer = mocker.AsyncMock()
+    builder = RequestBuilder().with_args(request_type='model_update',
+                                         weights='weights/new.pt',
+                                         writer=writer)
+    return builder.build()
+
+
+@pytest.fixture
+def model_update_request_handler(mocker):
+    handler = ModelUpdateRequestHandler
+    handler.signal.signal_queue = mocker.AsyncMock()
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_model_update_request_handler_wrong_request(
+    wrong_request,
+    model_update_request_handler
+):
+    result = await model_update_request_handler.handle(wrong_request)
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_model_update_request_handler_request(
+    model_update_request,
+    model_update_request_handler,
+    mocker
+):
+    mocker.patch('handlers.MODEL_UPDATE_TIMEOUT', 0.01)
+    result = await model_update_request_handler.handle(model_update_request)
+    model_update_request_handler.signal \
+        .signal_queue \
+        .put \
+        .assert_called_with(model_update_request)
+    model_update_request.writer.write.assert_called_once_with(
+        b'timeout_error')
+    model_update_request.writer.close.assert_called_once()
+    assert result is True
+    assert model_update_request_handler.waiters == {}
+
+
+@pytest.mark.asyncio
+async def test_model_update_result_sent_to_requester(
+    model_update_request,
+    model_update_request_handler,
+    mocker
+):
+    builder = RequestBuilder().with_args(
+        request_type='model_update_response',
+        weights='weights/new.pt',
+        request_result='success',
+        writer=mocker.AsyncMock())
+    response = builder.build()
+    task = asyncio.get_running_loop().create_task(
+        model_update_request_handler.handle(model_update_request))
+    await asyncio.sleep(0)
+    assert await ModelUpdateResponseHandler.handle(response) is True
+    assert await asyncio.wait_for(task, 1) is True
+    model_update_request.writer.write.assert_called_once_with(b'success')
+    response.writer.close.assert_called_once()
@@ -528,3 +528,41 @@ async def test_process_signal(client, custom_signal):
     excpected_result = (custom_signal.serialize()).encode()
     client.client.writer.write.assert_called_once_with(excpected_result)
     client.client.writer.drain.assert_awaited_once()
+
+
+# -----------------------------------------------
+# ------------ Client subscription --------------
+# -----------------------------------------------
+
+@pytest.fixture
+def subscriber(client_request, mocker):
+    mocker.patch('managers.HEARTBEAT_INTERVAL', 0.01)
+    client_request.subscribe = True
+    client_request.writer = mocker.Mock()
+    client_request.writer.drain = mocker.AsyncMock()
+    client_request.writer.wait_closed = mocker.AsyncMock()
+    subscriber = Client('test_client')
+    subscriber.update_connection(client_request)
+    return subscriber
+
+
+@pytest.mark.asyncio
+async def test_push_signal_and_heartbeat(subscriber, custom_signal):
+    subscriber.writer.drain.side_effect = [None, None, BrokenPipeError]
+    await subscriber.signal_queue.put(custom_signal)
+    await subscriber.push_signals()
+    heartbeat = RequestBuilder().with_args(request_type='heartbeat').build()
+    writes = [call.args[0] for call in subscriber.writer.write.mock_calls]
+    assert writes[0] == custom_signal.pack()
+    assert writes[1] == heartbeat.pack()
+    assert subscriber.signal_queue.empty()
+    subscriber.writer.close.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_push_signal_lost_connection(subscriber, custom_signal):
+    subscriber.writer.drain.side_effect = BrokenPipeError
+    await subscriber.signal_queue.put(custom_signal)
+    await subscriber.push_signals()
+    assert subscriber.signal_queue.qsize() == 1
+    assert await subscriber.signal_queue.get() is custom_signal
@@ -57,7 +57,7 @@ class VideoStreamConsumer(WebsocketConsumer):
             frame = self.get_frame()
             if frame:
                 try:
-                    self.send(frame.decode('utf-8'))
+                    self.send(bytes_data=frame)
                 except Exception:
                     self.pause_stream()
 
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_rename_camera_name_archivevideo_camera'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivevideo',
+            name='detection_stats',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -24,6 +24,7 @@ class ArchiveVideo(models.Model):
     chiken_det = models.BooleanField(default=False)
     car_det = models.BooleanField(default=False)
     camera = models.ForeignKey(Camera, on_delete=models.SET_NULL, null=True)
+    detection_stats = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         return str(self.date_created)
@@ -22,7 +22,7 @@ class TestVideoStream(SimpleTestCase):
         )
         connected, subprotocol = await self.communicator.connect()
         response = await self.communicator.receive_from()
-        self.assertEqual(response, 'frame')
+        self.assertEqual(response, b'frame')
         manager.consumer_queue.put.assert_called_once()
         await self.communicator.disconnect()
 
@@ -71,6 +71,6 @@ class TestVideoStream(SimpleTestCase):
         self.assertIsNone(response)
         await self.communicator.send_json_to({"signal": "play"})
         response = await self.communicator.receive_from()
-        self.assertEqual(response, 'frame')
+        self.assertEqual(response, b'frame')
         manager.consumer_queue.put.assert_called_once()
         await self.communicator.disconnect()
@@ -1,7 +1,8 @@
 from django.test import TestCase
 from ..utils import VideoStreamManager, VideoStreamSource
 from ..models import Camera
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
+import struct
 
 
 class TestVideoStreamManagerStreamSource(TestCase):
@@ -47,6 +48,38 @@ class TestVideoStreamManagerStreamSource(TestCase):
         self.test_object.wait_end_thread()
         self.test_consumer.disconnect.assert_called_once()
 
+    @patch('main.utils.socket.socket')
+    def test_recv_split_package(self, stream_socket):
+        package = struct.pack("Q", 5) + b'frame' + struct.pack("Q", 3)
+        stream_socket.return_value.recv.side_effect = [b'acce',
+                                                       b'pted',
+                                                       package[:3],
+                                                       package[3:10],
+                                                       package[10:]]
+        self.assertTrue(self.test_object.get_connection())
+        frame, data = self.test_object.recv_package(b"")
+        self.assertEqual(frame, b'frame')
+        self.assertEqual(data, struct.pack("Q", 3))
+
+    @patch('main.utils.socket.socket')
+    def test_stream_request_not_accepted(self, stream_socket):
+        stream_socket.return_value.recv.side_effect = [b'fail', b'']
+        self.assertFalse(self.test_object.get_connection())
+        stream_socket.return_value.close.assert_called_once()
+
+    def test_recv_package_too_large(self):
+        self.test_object.stream_socket = Mock()
+        frame, data = self.test_object.recv_package(
+            struct.pack("Q", self.test_object.max_frame_size + 1))
+        self.assertIsNone(frame)
+        self.test_object.stream_socket.recv.assert_not_called()
+
+    def test_recv_package_connection_lost(self):
+        self.test_object.stream_socket = Mock()
+        self.test_object.stream_socket.recv.return_value = b""
+        frame, data = self.test_object.recv_package(struct.pack("Q", 5))
+        self.assertIsNone(frame)
+
 
 class TestVideoStreamManagerValidateStreamSource(TestCase):
 
@@ -33,6 +33,8 @@ class VideoStreamSource:
         self._consumer_number = 0
         self.camera_name = camera_name
         self.payload_size = struct.calcsize("Q")
+        self.max_frame_size = int(
+            os.environ.get('STREAM_FRAME_MAX_SIZE', 10485760))
         self.stream_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.stream_socket.settimeout(5.0)
 
@@ -101,8 +103,21 @@ class VideoStreamSource:
             'camera_name': self.camera_name
         }
         self.stream_socket.send(json.dumps(msg).encode())
+        if self.recv_reply() != b'accepted':
+            self.thread_dead()
+            self.stream_socket.close()
+            return False
         return True
 
+    def recv_reply(self):
+        reply = b''
+        while len(reply) < len(b'accepted'):
+            packet = self.recv_packet(len(b'accepted') - len(reply))
+            if not packet:
+                break
+            reply += packet
+        return reply
+
     @new_thread
     def stream_source(self):
         data = b""
@@ -135,31 +150,33 @@ class VideoStreamSource:
         self.thread_dead()
 
     def recv_package(self, data):
-        try:
-            packet = self.stream_socket.recv(4096)
-        except Exception:
+        while len(data) < self.payload_size:
+            packet = self.recv_packet()
+            if not packet:
+                return None, None
+            data += packet
+        msg_size = struct.unpack("Q", data[:self.payload_size])[0]
+        data = data[self.payload_size:]
+        if msg_size > self.max_frame_size:
             return None, None
-        if packet != b"":
+
+        while len(data) < msg_size:
+            packet = self.recv_packet()
+            if not packet:
+                return None, None
             data += packet
-            packed_msg_size = data[:self.payload_size]
-            data = data[self.payload_size:]
-            msg_size = struct.unpack("Q", packed_msg_size)[0]
-
-            while len(data) < msg_size:
-                try:
-                    packet = self.stream_socket.recv(1048576)
-                except Exception:
-                    return None, None
-                if (not self.thread_working()) or packet == b"":
-                    return None, None
-                if msg_size > 100000:
-                    return packet, b""
-                data += packet
-
-            frame_data = data[:msg_size]
-            data = data[msg_size:]
-            return frame_data, data
-        return None, None
+
+        frame_data = data[:msg_size]
+        data = data[msg_size:]
+        return frame_data, data
+
+    def recv_packet(self, size=1048576):
+        if not self.thread_working():
+            return None
+        try:
+            return self.stream_socket.recv(size)
+        except Exception:
+            return None
 
 
 class VideoStreamManager: